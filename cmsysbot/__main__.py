@@ -1,9 +1,41 @@
+import os
+
 from telegram.error import InvalidToken
 from telegram.ext import Updater
 
 from . import controller
 from cmsysbot.system import log
-from cmsysbot.utils import Config, states
+from cmsysbot.utils import Config, inventory, sqlite_storage, states
+
+
+CONFIG_PATH = "config/config.json"
+
+
+def reload_config(bot, job):
+    """
+    Load again the config.json if it has been modified. The new config replaces the
+    old one for every handler, while the connected sessions are kept.
+    """
+
+    config = states.config_file
+
+    if not config.is_outdated():
+        return
+
+    try:
+        new_config = Config(CONFIG_PATH)
+    except Exception as e:
+        # Not only a bad file: a wrong structure (e.g. "structure": null) can fail
+        # anywhere while loading it
+        log.getLogger().error(f"Unable to reload {CONFIG_PATH}: {e}")
+
+        # Don't try again until the file is modified again
+        if os.path.exists(CONFIG_PATH):
+            config.mtime = os.stat(CONFIG_PATH).st_mtime_ns
+        return
+
+    states.config_file = new_config
+    log.getLogger().info(f"{CONFIG_PATH} reloaded")
 
 
 # Error handlers also receive the raised TelegramError object in error.
@@ -14,11 +46,18 @@ def error(bot, update, error):
 
 def main():
     # Load the config file
-    states.config_file = Config("config/config.json")
+    states.config_file = Config(CONFIG_PATH)
 
     # Initial logger config
     log.generate_log_config()
 
+    # Move the sections not yet on the database from their .json files
+    if states.config_file.storage == inventory.STORAGE_SQLITE:
+        database = sqlite_storage.get_database(states.config_file.database)
+
+        for section in database.import_json_tree(states.config_file):
+            log.getLogger().info(f"Imported {section} into {database.path}")
+
     # Create the EventHandler and pass your bot's token.
     try:
         updater = Updater(states.config_file.token)
@@ -37,6 +76,11 @@ def main():
     # Enable error loggin
     dp.add_error_handler(error)
 
+    # Watch the config.json for changes
+    updater.job_queue.run_repeating(
+        reload_config, interval=states.config_file.reload_interval
+    )
+
     # Start the bot!!
     print("%s started! Running..." % states.config_file.bot_name)
     updater.start_polling()
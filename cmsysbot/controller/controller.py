@@ -9,6 +9,10 @@ Note:
     /start, the function menu.main should be called...)
 """
 
+import re
+from typing import Callable, Dict
+
+from telegram import Bot
 from telegram.ext import (
     CallbackQueryHandler,
     CommandHandler,
@@ -17,13 +21,48 @@ from telegram.ext import (
     Filters,
     MessageHandler,
     RegexHandler,
+    Updater,
 )
 
-from cmsysbot.utils import State, states
+from cmsysbot import view
+from cmsysbot.utils import State, callback
 
 from . import command, conversation, general, menu
 
 
+class CallbackRouter:
+    """
+    Callback for a single :obj:`telegram.ext.CallbackQueryHandler` that routes the
+    callback queries with structured data (``action:payload``, see
+    :mod:`cmsysbot.utils.callback`) to the callback registered for their action,
+    through a dict lookup.
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, Callable] = {}
+
+    def add(self, action: str, function: Callable):
+        self.routes[action] = function
+
+    @property
+    def pattern(self) -> str:
+        """Regex that matches only the callback data of the registered actions."""
+
+        actions = "|".join(re.escape(action) for action in self.routes)
+
+        return f"^({actions}){re.escape(callback.SEPARATOR)}"
+
+    def __call__(self, bot: Bot, update: Updater, user_data: dict):
+        action, payload = callback.decode(update.callback_query.data)
+
+        # The token of the payload has expired: show a new main menu
+        if payload is None:
+            view.button_expired().reply(update)
+            return menu.new_main(bot, update, user_data)
+
+        return self.routes[action](bot, update, user_data)
+
+
 def add_callbacks(dp: Dispatcher):
     """
     Register all the callbacks defined in :mod:`cmsysbot.controller.menu`
@@ -34,115 +73,40 @@ def add_callbacks(dp: Dispatcher):
         handlers.
     """
 
+    router = CallbackRouter()
+
     # Show Main Menu
-    dp.add_handler(
-        CallbackQueryHandler(menu.main, pattern=State.MAIN, pass_user_data=True)
-    )
+    router.add(State.MAIN, menu.main)
 
     # Show Connect Menu
-    dp.add_handler(
-        CallbackQueryHandler(
-            menu.select_department, pattern=State.CONNECT, pass_user_data=True
-        )
-    )
-
-    # Settings for the structure menu:
-    with_subsections = []
-    without_subsections = []
-
-    for section in states.config_file.get_all_sections():
-        if section.has_subsections():
-            with_subsections.append(f"^{section.name}$")
-        else:
-            without_subsections.append(f"^{section.name}$")
+    router.add(State.CONNECT, menu.select_department)
 
     # On the structure menu (when selecting a department/subsection), the
-    # returned value after clicking on a button will be the name of the
-    # section, so a regex that matches all the possible section names must be
-    # crafted.
-    #
-    # For example, given the following structure:
-    # OSL
-    #  \- A
-    #  \- B
-    #     \- C
-    #
-    # The content of the regex will be:
-    # with_subsections_regex = OSL|B
-    # without_subsections_regex = A|C
-    #
-    # So, if we click on 'OSL', the callback return  data will be 'OSL', which
-    # matches the `with_subsections_regex`. This pattern is associated to the
-    # function menu.structure, which then shows the subsections for 'OSL'
-    # On the other hand, if we click on 'A', which doesn't has any subsections,
-    # the return data from the callback ('A') will match
-    # `withouth_subsections_regex`, calling the function `menu.ip_selection`
-    # instead.
-
-    with_subsections_regex = "|".join(with_subsections)
-    without_subsections_regex = "|".join(without_subsections)
-
-    # Show structure of department (and subdepartments)
-    dp.add_handler(
-        CallbackQueryHandler(
-            menu.structure, pattern=with_subsections_regex, pass_user_data=True
-        )
-    )
-
-    # When clicked in a section without subsections, show ip list
-    dp.add_handler(
-        CallbackQueryHandler(
-            menu.ip_selection, pattern=without_subsections_regex, pass_user_data=True
-        )
-    )
+    # payload of the callback data is the id of the clicked section. If it has
+    # subsections, they are shown. Otherwise, the computers of the section are
+    # shown to select the bridge computer.
+    router.add(State.SECTION, menu.select_section)
 
     # When clicked on an ip, show a menu asking if it should continue with
     # the connection
-    dp.add_handler(
-        CallbackQueryHandler(
-            menu.confirm_connect_ip, pattern=State.CONFIRM_CONNECT, pass_user_data=True
-        )
-    )
+    router.add(State.CONFIRM_CONNECT, menu.confirm_connect_ip)
 
     # Triggered when clicking on Disconnect button from main menu.
-    dp.add_handler(
-        CallbackQueryHandler(
-            general.disconnect, pattern=State.DISCONNECT, pass_user_data=True
-        )
-    )
+    router.add(State.DISCONNECT, general.disconnect)
 
     # Show menu for filtering computers
-    dp.add_handler(
-        CallbackQueryHandler(
-            menu.filter_computers, pattern=State.FILTER_COMPUTERS, pass_user_data=True
-        )
-    )
+    router.add(State.FILTER_COMPUTERS, menu.filter_computers)
 
-    # Triggered when clicking on the Include button from the filter computers
-    # menu
-    dp.add_handler(
-        CallbackQueryHandler(
-            general.include_computers,
-            pattern=State.INCLUDE_COMPUTERS,
-            pass_user_data=True,
-        )
-    )
-
-    # Triggered when clicking on the Exclude button from the filter computers
-    # menu
-    dp.add_handler(
-        CallbackQueryHandler(
-            general.exclude_computers,
-            pattern=State.EXCLUDE_COMPUTERS,
-            pass_user_data=True,
-        )
-    )
+    # Triggered when clicking on the Include/Exclude buttons from the filter
+    # computers menu
+    router.add(State.INCLUDE_COMPUTERS, general.include_computers)
+    router.add(State.EXCLUDE_COMPUTERS, general.exclude_computers)
 
     # Triggered when clicking on the Update Ips button from the main menu
+    router.add(State.UPDATE_IPS, general.update_ips)
+
     dp.add_handler(
-        CallbackQueryHandler(
-            general.update_ips, pattern=State.UPDATE_IPS, pass_user_data=True
-        )
+        CallbackQueryHandler(router, pattern=router.pattern, pass_user_data=True)
     )
 
 
@@ -7,16 +7,19 @@ Note:
     machine.
 """
 
+import io
 import os
 import re
+import threading
 
 from telegram import Bot
 from telegram.ext import ConversationHandler, Updater
 
 from cmsysbot import view
-from cmsysbot.system import Plugin
-from cmsysbot.utils import Session, State, states
+from cmsysbot.system import Plugin, PluginProgress, ResultDigest, status
+from cmsysbot.utils import Session, State, callback, states
 from cmsysbot.utils.decorators import connected, send_typing_action
+from cmsysbot.view.outbox import PendingMessage, outbox
 
 from . import general, menu
 
@@ -33,7 +36,14 @@ def start_plugin_from_callback(bot: Bot, update: Updater, user_data: dict):
     query = update.callback_query
 
     # Plugin path in server
-    plugin_path_server = re.search(State.START_PLUGIN, query.data).group(1)
+    token = re.search(State.START_PLUGIN, query.data).group(1)
+    plugin_path_server = callback.tokens.get(token)
+
+    # The button is from an old message
+    if plugin_path_server is None:
+        view.button_expired().reply(update)
+        menu.new_main(bot, update, user_data)
+        return ConversationHandler.END
 
     user_data["plugin"] = Plugin(plugin_path_server)
 
@@ -90,9 +100,51 @@ def execute_plugin(bot: Bot, update: Updater, user_data: dict):
     session = Session.get_from(user_data)
     plugin: Plugin = user_data["plugin"]
 
-    for name, ip, stdout, stderr in plugin.run(session):
-        view.plugin_output(name, ip, plugin.name, stdout, stderr).reply(
-            update, parse_mode=None
+    # Single message, edited while the computers finish
+    progress = PluginProgress(min_interval=states.config_file.progress_interval)
+    progress_message = view.plugin_progress(plugin.name, progress).reply(
+        update, parse_mode=None, mergeable=False
+    )
+
+    # Refreshed on a timer, so the elapsed times move while no computer finishes
+    stop = threading.Event()
+    refresher = threading.Thread(
+        target=keep_refreshing,
+        args=(plugin, progress, progress_message, stop),
+        daemon=True,
+    )
+    refresher.start()
+
+    # Computers with the same output are grouped on a single message
+    digest = ResultDigest()
+
+    try:
+        for name, ip, stdout, stderr in plugin.run(session, progress):
+            digest.add(name, ip, stdout, stderr)
+    finally:
+        # Joined first, so the last edit is always the final state
+        stop.set()
+        refresher.join()
+
+    refresh_progress(plugin, progress, progress_message)
+
+    # Check soon if the computers are really turned on/off
+    if plugin.power:
+        status.hurry(session)
+
+    for group in digest.groups():
+        view.plugin_group_output(plugin.name, group).reply(update, parse_mode=None)
+
+    # The full output of each computer is sent as a file
+    if len(digest) > 1:
+        message = update.effective_message
+        report = io.BytesIO(digest.report().encode("utf-8"))
+
+        outbox.send(
+            message.chat_id,
+            lambda: message.reply_document(
+                document=report, filename=f"{plugin.name}-report.txt"
+            ),
         )
 
     menu.new_main(bot, update, user_data)
@@ -100,6 +152,36 @@ def execute_plugin(bot: Bot, update: Updater, user_data: dict):
     return ConversationHandler.END
 
 
+def refresh_progress(
+    plugin: Plugin, progress: PluginProgress, message: PendingMessage
+):
+    """Edit the progress message of a plugin run with its current state"""
+
+    view.plugin_progress(plugin.name, progress).edit(message, parse_mode=None)
+
+
+def keep_refreshing(
+    plugin: Plugin,
+    progress: PluginProgress,
+    message: PendingMessage,
+    stop: threading.Event,
+):
+    """
+    Refresh the progress message every :obj:`PluginProgress.min_interval` seconds
+    until `stop` is set. The message is only edited if its text has changed
+    (Telegram refuses edits that don't modify the message).
+    """
+
+    last_text = None
+
+    while not stop.wait(progress.min_interval):
+        keyboard = view.plugin_progress(plugin.name, progress)
+
+        if keyboard.text != last_text and progress.should_refresh():
+            keyboard.edit(message, parse_mode=None)
+            last_text = keyboard.text
+
+
 @connected
 def get_answer(bot: Bot, update: Updater, user_data: dict) -> int:
 
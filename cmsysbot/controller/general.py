@@ -11,14 +11,12 @@ Note:
 connecting, disconnecting, sending commands, sending messages, etc.
 """
 
-import re
-
 from telegram import Bot
-from telegram.ext import Job, JobQueue, Updater
+from telegram.ext import JobQueue, Updater
 
 from cmsysbot import view
-from cmsysbot.system import Plugin
-from cmsysbot.utils import Session, State, states
+from cmsysbot.system import Plugin, status
+from cmsysbot.utils import Session, arp_cache, callback, states
 from cmsysbot.utils.decorators import connected, not_connected, send_typing_action
 
 from . import menu
@@ -52,13 +50,18 @@ def connect(bot: Bot, update: Updater, user_data: dict, job_queue: JobQueue):
         # Check if the bridge computer has all the required dependencies
         initialize_bridge(bot, update, user_data)
 
-        # Check the status of each computers (which are alive or unreachable)
-        update_computers_status(user_data)
+        # Check the status of each computers (which are alive or unreachable),
+        # sharing the checks with the other users on the same bridge and section
+        message = update.effective_message
+
+        def notify(changes: status.StatusChanges):
+            view.status_changes_output(changes).reply(message)
 
-        job_queue.run_repeating(
-            job_update_computers_status,
+        status.subscribe(
+            session,
+            job_queue,
             interval=states.config_file.check_status_interval,
-            context=user_data,
+            listener=notify if states.config_file.notify_status_changes else None,
         )
 
     # Show the main menu again
@@ -82,8 +85,11 @@ def disconnect(bot: Bot, update: Updater, user_data: dict):
 
     bridge_ip = Session.get_from(user_data).bridge_ip
 
+    # Stop receiving the status of the computers
+    status.unsubscribe(Session.get_from(user_data))
+
     # Save the new status of the computers
-    Session.get_from(user_data).computers.save()
+    Session.get_from(user_data).computers.save(states.config_file.save_delay)
 
     # Close the connection
     Session.get_from(user_data).end_connetion()
@@ -108,32 +114,6 @@ def initialize_bridge(bot: Bot, update: Updater, user_data: dict):
     ).reply(update)
 
 
-def job_update_computers_status(bot: Bot, job: Job):
-    user_data = job.context
-
-    if Session.get_from(user_data).connected:
-        update_computers_status(user_data)
-    else:
-        job.schedule_removal()
-
-
-def update_computers_status(user_data: dict):
-
-    session = Session.get_from(user_data)
-
-    plugin = Plugin("plugins/_computers_status")
-    _, _, stdout, _ = next(plugin.run(session))
-    # The stdout has the format `{ip} is {status}`
-
-    # TODO: Remove n^2 loop by adding dicts to the computers_json structure
-    for line in stdout.splitlines():
-        ip, _, status = line.split()
-
-        for computer in session.computers:
-            if ip == computer.ip:
-                computer.status = status
-
-
 @connected
 def update_ips(bot: Bot, update: Updater, user_data: dict):
     """
@@ -142,6 +122,9 @@ def update_ips(bot: Bot, update: Updater, user_data: dict):
     computer macs match with one of the local macs, update its associated ip to
     the new value.
 
+    The local network is only scanned again if the mapping of any of the included
+    computers is unknown or has expired (see :obj:`cmsysbot.utils.arp_cache`).
+
     Args:
         bot (:obj:`telegram.bot.Bot`): The telegram bot instance.
         update (:obj:`telegram.ext.update.Updater`): The Updater associated to
@@ -150,27 +133,37 @@ def update_ips(bot: Bot, update: Updater, user_data: dict):
     """
     session = Session.get_from(user_data)
 
-    # Get all the local ips for every local mac
-    plugin = Plugin("plugins/_local_arp_scan")
+    cache = arp_cache.get_cache(
+        session.bridge_ip,
+        states.config_file.arp_cache_ttl,
+        states.config_file.arp_cache_miss_ttl,
+    )
+    macs = [computer.mac for computer in session.computers.get_included()]
 
-    # Change view to executing
-    view.plugin_start(plugin.name).edit(update)
+    # Only one scan at a time on the same network
+    with cache.lock:
+        if cache.needs_scan(macs):
+            # Get all the local ips for every local mac
+            plugin = Plugin("plugins/_local_arp_scan")
 
-    _, _, stdout, _ = next(plugin.run(session))
+            # Change view to executing
+            view.plugin_start(plugin.name).edit(update)
 
-    local_ips = {}
-    for line in stdout.splitlines():
-        ip, mac = line.strip().split()
-        local_ips[mac] = ip
+            # The whole output is parsed, so it must not be truncated
+            _, _, stdout, _ = next(plugin.run(session, truncate=False))
 
-    for computer in session.computers.get_included_computers():
-        if computer.mac.lower() in local_ips:
-            last_ip = computer.ip
-            computer.ip = local_ips[computer.mac.lower()]
+            cache.update(arp_cache.parse_arp_scan(stdout), macs)
 
-            view.update_ip_output(computer, last_ip).reply(update)
+        local_ips = cache.lookup(macs)
 
-    session.computers.save()
+    updated = session.computers.update_ips(local_ips)
+
+    # A single message with all the changes
+    view.update_ips_output(
+        [(computer, last_ip) for computer, last_ip in updated if computer.ip != last_ip]
+    ).reply(update)
+
+    session.computers.save(states.config_file.save_delay)
 
     menu.new_main(bot, update, user_data)
 
@@ -184,8 +177,8 @@ def include_computers(bot: Bot, update: Updater, user_data: dict):
 
     Note:
         The :obj:`query.data` value used by this function will be either the
-        string ``include-all`` for all computers, or ``include-[mac_address]``
-        for one computer.
+        string ``inc:all`` for all computers, or ``inc:[mac_address]`` for one
+        computer.
 
     Args:
         bot (:obj:`telegram.bot.Bot`): The telegram bot instance.
@@ -194,10 +187,8 @@ def include_computers(bot: Bot, update: Updater, user_data: dict):
         user_data (:obj:`dict`): The dictionary with user variables.
     """
 
-    query = update.callback_query
-
-    # Extract the target from the string. Values: 'all' or '[mac_address]'
-    target = re.search(State.INCLUDE_COMPUTERS, query.data).group(1)
+    # Extract the target from the payload. Values: 'all' or '[mac_address]'
+    target = callback.get_payload(update)
 
     computers = Session.get_from(user_data).computers
 
@@ -223,8 +214,8 @@ def exclude_computers(bot: Bot, update: Updater, user_data: dict):
 
     Note:
         The :obj:`query.data` value used by this function will be either the
-        string ``exclude-all`` for all computers, or ``exclude-[mac_address]``
-        for one computer.
+        string ``exc:all`` for all computers, or ``exc:[mac_address]`` for one
+        computer.
 
     Args:
         bot (:obj:`telegram.bot.Bot`): The telegram bot instance.
@@ -233,10 +224,8 @@ def exclude_computers(bot: Bot, update: Updater, user_data: dict):
         user_data (:obj:`dict`): The dictionary with user variables.
     """
 
-    query = update.callback_query
-
-    # Extract the target from the string. Values: 'all' or '[mac_address]'
-    target = re.search(State.EXCLUDE_COMPUTERS, query.data).group(1)
+    # Extract the target from the payload. Values: 'all' or '[mac_address]'
+    target = callback.get_payload(update)
 
     computers = Session.get_from(user_data).computers
 
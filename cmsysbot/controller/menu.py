@@ -18,15 +18,42 @@ Callbacks that perform an action (like waking or shutting down computers,
 updating computers/ips...) must be defined inside the :obj:`general` module.
 """
 
+from typing import List
+
 from telegram import Bot
 from telegram.ext import Updater
 
 from cmsysbot import view
 from cmsysbot.system import Plugin
-from cmsysbot.utils import Computers, Session, State, states
+from cmsysbot.utils import Session, State, callback, inventory, states
 from cmsysbot.utils.decorators import connected, not_connected, send_typing_action
 
 
+def accessible_sections(update: Updater, user_data: dict, route: List[str]) -> list:
+    """
+    Return the sections on `route` that the user can access (see
+    :obj:`Config.accessible_sections`).
+
+    Note:
+        The user is identified by its Telegram username, or by the username of the
+        session if it's already known: the username used to connect is only asked
+        after choosing the section. It's checked again when connecting.
+    """
+
+    usernames = {Session.get_from(user_data).username}
+    if update.effective_user:
+        usernames.add(update.effective_user.username)
+
+    # Without any username, only the sections without ACL are shown
+    visible = {
+        section.id
+        for username in (usernames - {"", None}) or {""}
+        for section in states.config_file.accessible_sections(username, route)
+    }
+
+    return [s for s in states.config_file.get_sections(route) if s.id in visible]
+
+
 @send_typing_action
 def new_main(bot: Bot, update: Updater, user_data: dict):
     """
@@ -88,7 +115,9 @@ def select_department(bot: Bot, update: Updater, user_data: dict):
 
     # View
     view.structure(
-        route, states.config_file.get_sections(route), return_to=State.MAIN
+        route,
+        accessible_sections(update, user_data, route),
+        return_to=callback.encode(State.MAIN),
     ).edit(update)
 
 
@@ -129,31 +158,18 @@ def structure(bot: Bot, update: Updater, user_data: dict):
         user_data (:obj:`dict`): The dictionary with user variables.
     """
 
-    # Get the clicked section
-    next_section = update.callback_query.data
-
     route = Session.get_from(user_data).route
+    section = states.config_file.get_section(route)
 
-    # Remove section from the route if going backwards, otherwise append
-    if route and route[-1] == next_section:
-        route.pop()
-    else:
-        route.append(next_section)
-
-    # Return to the last section, or to the Connect menu if its the start oits
-    # the start of the route
-    return_to = ""
-    if len(route) <= 1:
-        return_to = State.CONNECT
-    else:
-        return_to = route[-1]
-
-    # Update the route
-    Session.get_from(user_data).route = route
+    # Return to the parent section, or to the Connect menu if its the start of
+    # the route
+    return_to = callback.encode(State.CONNECT)
+    if section.parent:
+        return_to = callback.encode(State.SECTION, section.parent.id, compact=False)
 
     # View
     view.structure(
-        route, states.config_file.get_sections(route), return_to=return_to
+        route, accessible_sections(update, user_data, route), return_to=return_to
     ).edit(update)
 
 
@@ -165,35 +181,57 @@ def ip_selection(bot: Bot, update: Updater, user_data: dict):
     """
 
     route = Session.get_from(user_data).route
+    section = states.config_file.get_section(route)
 
-    # Get the clicked section
-    next_section = update.callback_query.data
-    route.append(next_section)
+    Session.get_from(user_data).computers = inventory.get_section_view(route)
 
-    # Create a path to the .json file from the route
-    filepath = f"config/{'/'.join(route)}.json"
-    Session.get_from(user_data).computers = Computers(filepath)
-
-    Session.get_from(user_data).route = route
+    # Return to the parent section, or to the Connect menu
+    return_to = callback.encode(State.CONNECT)
+    if section.parent:
+        return_to = callback.encode(State.SECTION, section.parent.id, compact=False)
 
     # View
     view.ip_selection(
         route,
         Session.get_from(user_data).computers.get_computers(),
-        return_to=State.CONNECT,
+        return_to=return_to,
     ).edit(update)
 
 
+@not_connected
+def select_section(bot: Bot, update: Updater, user_data: dict):
+    """
+    Called when clicking on a section. Its id is the payload of the callback data.
+    Shows its subsections (:obj:`structure`) or, if it has no subsections, its
+    computers (:obj:`ip_selection`).
+    """
+
+    section = states.config_file.get_section_by_id(callback.get_payload(update))
+
+    # The section may have been removed from the config.json
+    if section is None:
+        return select_department(bot, update, user_data)
+
+    Session.get_from(user_data).route = list(section.route)
+
+    if section.has_subsections():
+        return structure(bot, update, user_data)
+
+    return ip_selection(bot, update, user_data)
+
+
 @not_connected
 def confirm_connect_ip(bot: Bot, update: Updater, user_data: dict):
 
     # Get the clicked ip
-    Session.get_from(user_data).bridge_ip = update.callback_query.data
+    Session.get_from(user_data).bridge_ip = callback.get_payload(update)
 
     # View
     text = f"Connect to {Session.get_from(user_data).bridge_ip}"
     view.yes_no(
-        text, yes_callback_data=State.GET_CREDENTIALS, no_callback_data=State.MAIN
+        text,
+        yes_callback_data=State.GET_CREDENTIALS,
+        no_callback_data=callback.encode(State.MAIN),
     ).edit(update)
 
 
@@ -1 +1,4 @@
-from .plugin import Plugin, PluginVar
+from .digest import ResultDigest, ResultGroup
+from .plugin import Plugin, PluginContext, PluginVar
+from .progress import PluginProgress
+from .status import StatusChanges
@@ -0,0 +1,68 @@
+from typing import Dict, List, Tuple
+
+from .plugin import clean_stderr
+
+
+class ResultGroup:
+    """Computers that returned exactly the same (normalized) output."""
+
+    def __init__(self, stdout: str, stderr: str):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.computers: List[str] = []
+
+    def __len__(self):
+        return len(self.computers)
+
+
+class ResultDigest:
+    """
+    Aggregates the results of a plugin run, grouping the computers with identical
+    outputs, so a single message can be sent for each distinct output instead of
+    one per computer.
+
+    The outputs are normalized before comparing them: the sudo prompt is removed
+    from stderr, and the leading/trailing whitespace from both streams.
+    """
+
+    def __init__(self):
+        self.__groups: Dict[Tuple[str, str], ResultGroup] = {}
+        self.__results: List[Tuple[str, str, str, str]] = []
+
+    def add(self, name: str, ip: str, stdout: str, stderr: str):
+        self.__results.append((name, ip, stdout, stderr))
+
+        key = (stdout.strip(), clean_stderr(stderr))
+
+        if key not in self.__groups:
+            self.__groups[key] = ResultGroup(*key)
+
+        self.__groups[key].computers.append(f"{name} ({ip})")
+
+    def groups(self) -> List[ResultGroup]:
+        """Return the groups of computers, from the biggest to the smallest."""
+
+        return sorted(self.__groups.values(), key=len, reverse=True)
+
+    def report(self) -> str:
+        """Return the full (not grouped) output of every computer as plain text."""
+
+        sections = []
+
+        for name, ip, stdout, stderr in sorted(self.__results):
+            section = f"===== {name} ({ip}) =====\n"
+
+            stderr = clean_stderr(stderr)
+            if stderr:
+                section += f"-> [Error]: {stderr}\n"
+
+            section += stdout
+
+            sections.append(section)
+
+        return "\n\n".join(sections)
+
+    def __len__(self):
+        """Return the number of computers added"""
+
+        return len(self.__results)
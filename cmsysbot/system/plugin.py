@@ -1,11 +1,51 @@
 import glob
+import hashlib
 import json
+import logging
 import os.path
 import re
+import threading
 from concurrent import futures
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple
 
-from cmsysbot.utils import Computer, Session, states
+from cmsysbot.utils import Computer, Session, callback, states
+from cmsysbot.utils.remote_connections import CONNECTION_ERRORS
+
+from .progress import PluginProgress
+
+
+# (path, modification time, size) -> sha256 of the file content
+_digests: Dict[Tuple[str, float, int], str] = {}
+_digests_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """
+    Return the sha256 of the file content. The digest is only computed again if the
+    file has been modified.
+    """
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime, stat.st_size)
+
+    with _digests_lock:
+        if key in _digests:
+            return _digests[key]
+
+    with open(path, "rb") as plugin_file:
+        digest = hashlib.sha256(plugin_file.read()).hexdigest()
+
+    with _digests_lock:
+        _digests[key] = digest
+
+    return digest
+
+
+def clean_stderr(stderr: str) -> str:
+    """Remove the "[sudo] password for X:" prompt from the stderr of a plugin."""
+
+    return re.sub(r"\[sudo\].*?:", "", stderr).strip()
 
 
 class PluginVar:
@@ -18,9 +58,45 @@ class PluginVar:
     IPS_LIST = "$IPS_LIST"
     SOURCE_BRIDGE = "bridge"
     SOURCE_REMOTE = "remote"
+    EXECUTION_COPY = "copy"
+    EXECUTION_STDIN = "stdin"
     ROOT = False
 
 
+class PluginContext:
+    """
+    Read-only arguments of a single plugin run. The arguments that depend on the
+    target computer ($TARGET_IP, $TARGET_MAC) are rendered on a new list for each
+    computer, so the same context can be shared by several threads.
+    """
+
+    def __init__(self, arguments: Dict[str, str]):
+        self.__arguments = MappingProxyType(dict(arguments))
+
+    @property
+    def arguments(self) -> Mapping[str, str]:
+        return self.__arguments
+
+    def render(self, computer: Computer = None) -> List[str]:
+        """Return the argument values for `computer`, in the plugin order."""
+
+        values = []
+        for key, value in self.__arguments.items():
+            if computer and key == PluginVar.TARGET_IP:
+                value = computer.ip
+            elif computer and key == PluginVar.TARGET_MAC:
+                value = computer.mac
+
+            values.append(value)
+
+        return values
+
+    def command(self, path: str, computer: Computer = None) -> str:
+        """Return the command that runs the plugin on `path` for `computer`."""
+
+        return f"{path} {' '.join(self.render(computer))}"
+
+
 class Plugin:
     BODY_REGEX = re.compile(
         r"CMSysBot:\s*({.*?})\s*\n", re.IGNORECASE | re.MULTILINE | re.DOTALL
@@ -29,6 +105,8 @@ class Plugin:
 
     COPY_MODE = 0o555
 
+    FANOUT_PATH = "plugins/_remote_fanout"
+
     def __init__(self, server_path: str):
         self.server_path = server_path
         self.data = self.parse_cmsysbot_body()
@@ -38,24 +116,53 @@ class Plugin:
             self.arguments[key] = ""
 
     @property
-    def root(self):
-        return self.data["root"]
+    def root(self) -> bool:
+        # The header may define it as a boolean or as a "True"/"False" string
+        return str(self.data["root"]).lower() == "true"
+
+    @property
+    def power(self) -> bool:
+        """If the plugin turns the computers on or off (like wake_computers)"""
+
+        return str(self.data.get("power", False)).lower() == "true"
 
     @property
     def source(self):
         return self.data["source"]
 
+    @property
+    def execution(self) -> str:
+        """
+        How the plugin is run on the remote computers: "copy" copies the file to each
+        computer before running it, and "stdin" sends its content to ``bash -s`` on
+        the same connection used to run it.
+        """
+
+        return self.data.get("execution", PluginVar.EXECUTION_COPY)
+
     @property
     def name(self):
         return os.path.basename(self.server_path)
 
     @property
-    def bridge_path(self):
-        return f"{states.config_file.bridge_tmp_dir}/{self.name}"
+    def digest(self) -> str:
+        return file_digest(self.server_path)
 
     @property
-    def remote_path(self):
-        return f"{states.config_file.remote_tmp_dir}/{self.name}"
+    def file_name(self) -> str:
+        # Named after the content, so an edited plugin is always uploaded again. The
+        # copies are read-only, so they can't be overwritten by the next run either
+        return f"{self.name}-{self.digest[:16]}"
+
+    def bridge_path(self, session: Session) -> str:
+        """Path of the plugin on the bridge, in the private dir of the user"""
+
+        return f"{session.bridge_dir}/{self.file_name}"
+
+    def remote_path(self, session: Session) -> str:
+        """Path of the plugin on the remote computers, in the private dir of the user"""
+
+        return f"{session.remote_dir}/{self.file_name}"
 
     def parse_cmsysbot_body(self):
         with open(self.server_path, "r") as textfile:
@@ -75,76 +182,247 @@ class Plugin:
 
         return None
 
-    def run(self, session: Session):
-        session.copy_to_bridge(self.server_path, self.bridge_path, Plugin.COPY_MODE)
+    def run(
+        self,
+        session: Session,
+        progress: PluginProgress = None,
+        computers: List[Computer] = None,
+        truncate: bool = True,
+    ):
+        """
+        Run the plugin, yielding a tuple (name, ip, stdout, stderr) for each computer
+        as soon as it finishes. If `progress` is passed, the state of each computer
+        is reported to it. See :obj:`create_context` for `computers`.
+
+        Only the end of very long outputs is returned, unless not `truncate` (for
+        plugins run on the bridge whose output is parsed by the bot).
+        """
+
+        progress = progress or PluginProgress()
+
+        session.copy_to_bridge(
+            self.server_path, self.bridge_path(session), Plugin.COPY_MODE
+        )
 
         # Replace the session $arguments (username, password...)
-        self.fill_session_arguments(session)
+        context = self.create_context(session, computers)
 
         # RUN ON BRIDGE
         if self.source == PluginVar.SOURCE_BRIDGE:
-            command = f"{self.bridge_path} {' '.join(self.arguments.values())}"
+            command = context.command(self.bridge_path(session))
 
-            yield "Bridge", session.bridge_ip, (
-                *session.run_on_bridge(command, root=self.root)
-            )
+            results = self.__run_on_bridge(session, command, progress, truncate)
+
+        # RUN ON REMOTE, DRIVEN FROM THE BRIDGE (if it can run the helper)
+        elif states.config_file.fanout and session.has_python3():
+            results = self.__run_fanout(session, context, progress)
 
         # RUN ON REMOTE
         else:
-            with futures.ThreadPoolExecutor() as executor:
-                result_futures = [
-                    executor.submit(self.__run_on_remote, computer, session)
-                    for computer in session.computers.get_included_computers()
-                ]
+            results = self.__run_on_remotes(session, context, progress)
+
+        for name, ip, stdout, stderr in results:
+            progress.finish(f"{name} ({ip})", failed=bool(clean_stderr(stderr)))
+
+            yield name, ip, stdout, stderr
+
+    def __run_on_bridge(
+        self,
+        session: Session,
+        command: str,
+        progress: PluginProgress,
+        truncate: bool = True,
+    ):
+        progress.start(f"Bridge ({session.bridge_ip})")
+
+        yield (
+            "Bridge",
+            session.bridge_ip,
+            *session.run_on_bridge(command, root=self.root, truncate=truncate),
+        )
+
+    def __run_on_remotes(
+        self, session: Session, context: "PluginContext", progress: PluginProgress
+    ):
+        executor = session.executor
+
+        script = None
+        if self.execution == PluginVar.EXECUTION_STDIN:
+            script = self.read_script()
+
+        computers = list(session.computers.get_included_computers())
+
+        for computer in computers:
+            progress.add(str(computer))
+
+        result_futures = [
+            executor.submit(
+                self.__run_on_remote, computer, session, context, script, progress
+            )
+            for computer in computers
+        ]
+
+        for future in futures.as_completed(result_futures):
+            yield future.result()
+
+    def __run_fanout(
+        self, session: Session, context: "PluginContext", progress: PluginProgress
+    ):
+        """
+        Send a single job to the bridge computer, which runs the plugin on all the
+        included computers in parallel and writes back one JSON line per computer.
+        """
+
+        hosts = []
+        for computer in session.computers.get_included_computers():
+            if not computer.on():
+                yield (computer.name, computer.ip, "The computer is off", "")
+                continue
+
+            hosts.append(
+                {
+                    "name": computer.name,
+                    "ip": computer.ip,
+                    "arguments": context.render(computer),
+                }
+            )
 
-                for future in futures.as_completed(result_futures):
-                    yield future.result()
+        if not hosts:
+            return
 
-    def __run_on_remote(self, computer: Computer, session: Session):
+        for host in hosts:
+            progress.start(f"{host['name']} ({host['ip']})")
+
+        fanout = Plugin(Plugin.FANOUT_PATH)
+        session.copy_to_bridge(
+            fanout.server_path, fanout.bridge_path(session), Plugin.COPY_MODE
+        )
+
+        job = {
+            "plugin": self.bridge_path(session),
+            "remote_path": self.remote_path(session),
+            "stdin": self.execution == PluginVar.EXECUTION_STDIN,
+            "root": self.root,
+            "password": session.password,
+            "concurrency": states.config_file.get_max_workers(session.route),
+            "max_output": states.config_file.output_max_size,
+            "hosts": hosts,
+        }
+
+        # Hosts without a result yet
+        pending = [(host["name"], host["ip"]) for host in hosts]
+        error = "No result from the bridge computer"
+
+        try:
+            for line in session.stream_on_bridge(
+                fanout.bridge_path(session), json.dumps(job)
+            ):
+                try:
+                    result = json.loads(line)
+                    name, ip = result["name"], result["ip"]
+                    stdout, stderr = result["stdout"], result["stderr"]
+
+                    pending.remove((name, ip))
+                except (ValueError, KeyError, TypeError):
+                    logging.getLogger().warning(
+                        f"({session.username}) - Unexpected output from "
+                        f"{fanout.name} on {session.bridge_ip}: {line}"
+                    )
+                    continue
+
+                yield name, ip, stdout, stderr
+
+        except CONNECTION_ERRORS as e:
+            error = f"Connection lost with the bridge computer: {e}"
+
+        # The helper stopped before finishing (for example, it couldn't run)
+        for name, ip in pending:
+            yield name, ip, "", error
+
+    def __run_on_remote(
+        self,
+        computer: Computer,
+        session: Session,
+        context: "PluginContext",
+        script: str = None,
+        progress: PluginProgress = None,
+    ):
 
         if not computer.on():
             return (computer.name, computer.ip, "The computer is off", "")
 
-        session.copy_to_remote(computer.ip, self.bridge_path, self.remote_path)
+        if progress:
+            progress.start(str(computer))
+
+        # Send the plugin through stdin, without copying it to the computer
+        if script is not None:
+            command = context.command("bash -s --", computer)
+
+            return (
+                computer.name,
+                computer.ip,
+                *session.run_on_remote(computer.ip, command, self.root, script),
+            )
+
+        remote_path = self.remote_path(session)
+
+        try:
+            session.copy_to_remote(
+                computer.ip, self.server_path, remote_path, Plugin.COPY_MODE
+            )
+        except CONNECTION_ERRORS as e:
+            return (computer.name, computer.ip, "", f"Unable to connect: {e}")
+        except PermissionError as e:
+            return (computer.name, computer.ip, "", str(e))
 
         # Replace the computer arguments (ip, mac...)
-        self.fill_computer_arguments(computer)
-        command = f"{self.remote_path} {' '.join(self.arguments.values())}"
+        command = context.command(remote_path, computer)
 
         return (
             computer.name,
             computer.ip,
-            (*session.run_on_remote(computer.ip, command, self.root)),
+            *session.run_on_remote(computer.ip, command, self.root),
         )
 
-    def fill_session_arguments(self, session: Session):
+    def read_script(self) -> str:
+        """Return the content of the plugin file."""
 
-        if PluginVar.USERNAME in self.arguments:
-            self.arguments[PluginVar.USERNAME] = session.username
+        with open(self.server_path, "r") as textfile:
+            return textfile.read()
 
-        if PluginVar.PASSWORD in self.arguments:
-            self.arguments[PluginVar.PASSWORD] = session.password
+    def create_context(
+        self, session: Session, computers: List[Computer] = None
+    ) -> "PluginContext":
+        """
+        Return the context for a new run of the plugin, with the session arguments
+        (username, password...) already replaced. The plugin arguments are not
+        modified, so the same plugin can be run again.
 
-        if PluginVar.BRIDGE_IP in self.arguments:
-            self.arguments[PluginVar.BRIDGE_IP] = session.bridge_ip
+        $MACS_LIST and $IPS_LIST are the MACs/ips of `computers`, or of the included
+        computers of the session if not passed.
+        """
 
-        if PluginVar.MACS_LIST in self.arguments:
-            self.arguments[PluginVar.MACS_LIST] = " ".join(
-                list(map(lambda c: c.mac, session.computers.get_included()))
-            )
+        if computers is None:
+            computers = list(session.computers.get_included())
 
-        if PluginVar.IPS_LIST in self.arguments:
-            self.arguments[PluginVar.IPS_LIST] = " ".join(
-                list(map(lambda c: c.ip, session.computers.get_included()))
-            )
+        arguments = dict(self.arguments)
+
+        if PluginVar.USERNAME in arguments:
+            arguments[PluginVar.USERNAME] = session.username
+
+        if PluginVar.PASSWORD in arguments:
+            arguments[PluginVar.PASSWORD] = session.password
+
+        if PluginVar.BRIDGE_IP in arguments:
+            arguments[PluginVar.BRIDGE_IP] = session.bridge_ip
 
-    def fill_computer_arguments(self, computer: Computer):
+        if PluginVar.MACS_LIST in arguments:
+            arguments[PluginVar.MACS_LIST] = " ".join(c.mac for c in computers)
 
-        if PluginVar.TARGET_IP in self.arguments:
-            self.arguments[PluginVar.TARGET_IP] = computer.ip
+        if PluginVar.IPS_LIST in arguments:
+            arguments[PluginVar.IPS_LIST] = " ".join(c.ip for c in computers)
 
-        if PluginVar.TARGET_MAC in self.arguments:
-            self.arguments[PluginVar.TARGET_MAC] = computer.mac
+        return PluginContext(arguments)
 
     def __getitem__(self, key: str) -> str:
         return self.arguments[key]
@@ -171,7 +449,8 @@ class Plugin:
         for file in files:
             if os.path.basename(file)[0] != "_":
 
-                key = f"plugin-{file}"
+                # The path may be too long for the callback data
+                key = f"plugin-{callback.tokens.put(file)}"
                 names[key] = os.path.basename(file).capitalize().replace("_", " ")
 
         return names
@@ -0,0 +1,98 @@
+import threading
+import time
+from typing import Dict, List, Tuple
+
+
+class PluginProgress:
+    """
+    Thread-safe tracker of the state of each computer during a plugin run, used to
+    show the progress on the chat while the run is still going.
+
+    Computers are identified by their label (``name (ip)``). A computer is
+    ``pending`` after :obj:`add`, ``running`` after :obj:`start`, and ``done`` or
+    ``failed`` after :obj:`finish`.
+
+    Attributes:
+        min_interval (:obj:`float`): Min time (in seconds) between two refreshes
+            of the progress message, to stay below the Telegram flood limits.
+    """
+
+    def __init__(self, min_interval: float = 3):
+        self.min_interval = min_interval
+
+        self.__pending = set()
+        self.__running: Dict[str, float] = {}
+        self.__done = 0
+        self.__failed = 0
+
+        self.__last_refresh = 0.0
+        self.__lock = threading.Lock()
+
+    def add(self, label: str):
+        with self.__lock:
+            self.__pending.add(label)
+
+    def start(self, label: str):
+        with self.__lock:
+            self.__pending.discard(label)
+            self.__running[label] = time.monotonic()
+
+    def finish(self, label: str, failed: bool = False):
+        with self.__lock:
+            self.__pending.discard(label)
+            self.__running.pop(label, None)
+
+            if failed:
+                self.__failed += 1
+            else:
+                self.__done += 1
+
+    @property
+    def pending(self) -> int:
+        return len(self.__pending)
+
+    @property
+    def running(self) -> int:
+        return len(self.__running)
+
+    @property
+    def done(self) -> int:
+        return self.__done
+
+    @property
+    def failed(self) -> int:
+        return self.__failed
+
+    @property
+    def total(self) -> int:
+        return self.pending + self.running + self.done + self.failed
+
+    @property
+    def finished(self) -> bool:
+        return not self.__pending and not self.__running
+
+    def slowest(self, n: int = 3) -> List[Tuple[str, float]]:
+        """Return the `n` running computers that started first, with their elapsed
+        time in seconds."""
+
+        now = time.monotonic()
+
+        with self.__lock:
+            running = sorted(self.__running.items(), key=lambda item: item[1])
+
+        return [(label, now - start) for label, start in running[:n]]
+
+    def should_refresh(self) -> bool:
+        """
+        Return True if enough time has passed since the last refresh (or the run
+        has finished), and mark the progress as refreshed.
+        """
+
+        now = time.monotonic()
+
+        with self.__lock:
+            if not self.finished and now - self.__last_refresh < self.min_interval:
+                return False
+
+            self.__last_refresh = now
+            return True
@@ -0,0 +1,425 @@
+"""
+Status of the computers (alive or unreachable), checked periodically by a single
+poller for all the sessions connected to the same bridge computer and section.
+
+Each computer is checked on its own schedule: computers that have just changed are
+checked often, and computers whose status doesn't change are checked less and less
+often (see :obj:`StatusSchedule`).
+
+With ``"status_agent": true`` on the config.json, the checks are made instead by an
+agent started on the bridge computer (``plugins/_status_agent``), which streams the
+status changes to the bot over a single SSH channel. The agent checks every
+computer on each round, so the schedule (and :obj:`hurry`) doesn't apply to it.
+"""
+
+import json
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from cmsysbot.utils import Session, states
+
+from .plugin import Plugin
+
+STATUS_PLUGIN = "plugins/_computers_status"
+STATUS_AGENT = "plugins/_status_agent"
+
+
+def parse_status(stdout: str) -> Dict[str, str]:
+    """
+    Parse the output of fping (lines `{ip} is {status}`) to a dict ip -> status.
+    Lines with any other format (like errors) are skipped.
+    """
+
+    statuses = {}
+
+    for line in stdout.splitlines():
+        fields = line.split()
+
+        if len(fields) == 3 and fields[1] == "is":
+            ip, _, status = fields
+            statuses[ip] = status
+
+    return statuses
+
+
+class StatusChanges:
+    """
+    Computers whose status changed on a check.
+
+    Attributes:
+        up (:obj:`List`): Computers that are now alive.
+        down (:obj:`List`): Computers that are now unreachable.
+    """
+
+    def __init__(self):
+        self.up = []
+        self.down = []
+
+        self.__seen = set()
+
+    def add(self, computers: list):
+        """Add the changed `computers`, skipping the ones already added."""
+
+        for computer in computers:
+            if computer.mac in self.__seen:
+                continue
+
+            self.__seen.add(computer.mac)
+            (self.up if computer.on() else self.down).append(computer)
+
+    def __len__(self):
+        return len(self.up) + len(self.down)
+
+
+class StatusSchedule:
+    """
+    When the status of each ip must be checked next.
+
+    Ips are checked every `min_interval` seconds at first. Each check that doesn't
+    change their status doubles their interval, up to `max_interval`, and each
+    change (or a call to :obj:`hurry`) sets it back to `min_interval`.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+
+        # ip -> seconds between checks
+        self.intervals: Dict[str, float] = {}
+        # ip -> time of the next check (as returned by time.monotonic)
+        self.next_check: Dict[str, float] = {}
+
+    def is_due(self, ip: str, now: float) -> bool:
+        return self.next_check.get(ip, now) <= now
+
+    def checked(self, ips: Iterable[str], changed: Iterable[str], now: float):
+        """Schedule the next check of `ips`, whose status has just been checked."""
+
+        changed = set(changed)
+
+        for ip in ips:
+            if ip in changed or ip not in self.intervals:
+                interval = self.min_interval
+            else:
+                interval = min(self.intervals[ip] * 2, self.max_interval)
+
+            self.intervals[ip] = interval
+            self.next_check[ip] = now + interval
+
+    def hurry(self, ips: Iterable[str], now: float):
+        """Check `ips` on the next sweep, and often after that."""
+
+        for ip in ips:
+            self.intervals[ip] = self.min_interval
+            self.next_check[ip] = now
+
+
+class StatusPoller:
+    """
+    Checks the status of all the computers of a section, through a bridge computer,
+    and publishes the result to all the subscribed sessions.
+
+    Note:
+        The check runs on the SSH connection of any of the subscribed sessions, so
+        there is a single check per interval no matter how many users are
+        connected. Only the computers due on the :obj:`schedule` are checked.
+    """
+
+    def __init__(
+        self,
+        bridge_ip: str,
+        route: List[str],
+        min_interval: float = 60,
+        max_interval: float = 600,
+    ):
+        self.bridge_ip = bridge_ip
+        self.route = list(route)
+
+        self.schedule = StatusSchedule(min_interval, max_interval)
+
+        self.sessions: List[Session] = []
+        self.last_statuses: Dict[str, str] = {}
+        self.job = None
+
+        # session -> function called with the StatusChanges of each check
+        self.listeners: Dict[Session, Callable[[StatusChanges], None]] = {}
+
+        self.__sweep_lock = threading.Lock()
+
+    def sweep(self, now: float = None):
+        """
+        Check the status of the computers due on the schedule, and publish it to
+        the sessions.
+        """
+
+        now = time.monotonic() if now is None else now
+
+        with self.__sweep_lock:
+            sessions = [s for s in self.sessions if s.connected]
+
+            if not sessions:
+                return
+
+            session = sessions[0]
+
+            computers = [
+                c for c in session.computers if self.schedule.is_due(c.ip, now)
+            ]
+
+            if not computers:
+                return
+
+            try:
+                plugin = Plugin(STATUS_PLUGIN)
+                _, _, stdout, _ = next(
+                    plugin.run(session, computers=computers, truncate=False)
+                )
+
+                statuses = parse_status(stdout)
+            except Exception as e:
+                logging.getLogger().warning(
+                    f"Unable to check the status of the computers on "
+                    f"{'/'.join(self.route)} from {self.bridge_ip}: {e}"
+                )
+                return
+
+            self.last_statuses.update(statuses)
+
+            changes = self.publish(statuses, sessions)
+
+            self.schedule.checked(
+                (c.ip for c in computers),
+                (c.ip for c in changes.up + changes.down),
+                now,
+            )
+
+    def run_agent(self, interval: float):
+        """
+        Start the status agent on the bridge computer, and publish the changes it
+        streams until the last session disconnects. If the session whose
+        connection runs the agent disconnects, the agent is started again on the
+        connection of another session.
+
+        Note:
+            Every restart waits `interval` seconds first. The wait is doubled (up
+            to the max interval of the :obj:`schedule`) each time the agent stops
+            without sending anything, for example if it can't run on the bridge.
+        """
+
+        agent = Plugin(STATUS_AGENT)
+        delay = interval
+
+        session = _prune(self)
+
+        while session:
+            received = False
+
+            try:
+                session.copy_to_bridge(
+                    agent.server_path, agent.bridge_path(session), Plugin.COPY_MODE
+                )
+
+                job = {
+                    "ips": sorted({c.ip for c in session.computers}),
+                    "interval": interval,
+                }
+                lines = session.stream_on_bridge(
+                    agent.bridge_path(session), json.dumps(job)
+                )
+
+                try:
+                    for line in lines:
+                        statuses = json.loads(line)
+                        received = True
+
+                        if statuses:
+                            self.last_statuses.update(statuses)
+                            self.publish(
+                                statuses, [s for s in self.sessions if s.connected]
+                            )
+
+                        if not session.connected or not _prune(self):
+                            break
+                finally:
+                    lines.close()
+
+            except Exception as e:
+                logging.getLogger().warning(
+                    f"The status agent on {self.bridge_ip} for "
+                    f"{'/'.join(self.route)} stopped: {e}"
+                )
+
+            session = _prune(self)
+            if not session:
+                return
+
+            if received:
+                delay = interval
+
+            time.sleep(delay)
+            delay = min(delay * 2, self.schedule.max_interval)
+
+            session = _prune(self)
+
+    def hurry(self, ips: Iterable[str]):
+        """See :obj:`StatusSchedule.hurry`"""
+
+        self.schedule.hurry(ips, time.monotonic())
+
+    def publish(
+        self, statuses: Dict[str, str], sessions: List[Session]
+    ) -> StatusChanges:
+        """
+        Apply `statuses` to the computers of `sessions`, and notify the listeners of
+        the computers that came up or went down (if any).
+        """
+
+        changes = StatusChanges()
+
+        for session in sessions:
+            if session.computers is not None:
+                changes.add(session.computers.apply_status(statuses))
+
+        if changes:
+            for listener in list(self.listeners.values()):
+                try:
+                    listener(changes)
+                except Exception as e:
+                    logging.getLogger().warning(
+                        f"Status change listener failed: {e}"
+                    )
+
+        return changes
+
+
+# (bridge ip, route) -> poller
+_pollers: Dict[Tuple[str, Tuple[str, ...]], StatusPoller] = {}
+_lock = threading.Lock()
+
+
+def _prune(poller: StatusPoller) -> Optional[Session]:
+    """
+    Remove the disconnected sessions from `poller`. Returns the first session left,
+    or None (and removes the poller) if there are no sessions left.
+    """
+
+    with _lock:
+        poller.sessions = [s for s in poller.sessions if s.connected]
+
+        for session in list(poller.listeners):
+            if session not in poller.sessions:
+                del poller.listeners[session]
+
+        if not poller.sessions:
+            if _pollers.get((poller.bridge_ip, tuple(poller.route))) is poller:
+                del _pollers[(poller.bridge_ip, tuple(poller.route))]
+
+            return None
+
+        return poller.sessions[0]
+
+
+def _job_sweep(bot, job):
+    poller: StatusPoller = job.context
+
+    # Stop when the last session has disconnected
+    if not _prune(poller):
+        job.schedule_removal()
+        return
+
+    poller.sweep()
+
+
+def subscribe(
+    session: Session,
+    job_queue,
+    interval: float,
+    listener: Callable[[StatusChanges], None] = None,
+) -> StatusPoller:
+    """
+    Subscribe `session` to the poller of its bridge computer and section. If there
+    wasn't a poller yet, a new one checks the status right now and then looks for
+    computers due every `interval` seconds (using the :obj:`telegram.ext.JobQueue`
+    of the bot). Computers whose status doesn't change are checked less often, up
+    to every ``check_status_max_interval`` seconds (from the config.json).
+
+    If ``status_agent`` is enabled on the config.json, the new poller starts
+    instead the status agent on the bridge computer (on a background thread),
+    which checks all the computers every `interval` seconds (without the adaptive
+    schedule, as each check is cheap on the bridge). If the bridge doesn't
+    have python3 to run it, the computers are polled as usual.
+
+    If `listener` is given, it's called with the :obj:`StatusChanges` of each check
+    that changes the status of any computer, until the session is unsubscribed.
+    """
+
+    key = (session.bridge_ip, tuple(session.route))
+
+    with _lock:
+        poller = _pollers.get(key)
+        is_new = poller is None
+
+        if is_new:
+            poller = StatusPoller(
+                session.bridge_ip,
+                session.route,
+                min_interval=interval,
+                max_interval=states.config_file.check_status_max_interval,
+            )
+            _pollers[key] = poller
+
+        if session not in poller.sessions:
+            poller.sessions.append(session)
+
+    # The agent needs python3 on the bridge, polling is used otherwise
+    if is_new and states.config_file.status_agent and session.has_python3():
+        threading.Thread(
+            target=poller.run_agent, args=(interval,), daemon=True
+        ).start()
+    elif is_new:
+        # Scheduled first, so the poller keeps running even if this check fails
+        poller.job = job_queue.run_repeating(
+            _job_sweep, interval=interval, first=interval, context=poller
+        )
+        poller.sweep()
+    else:
+        poller.publish(poller.last_statuses, [session])
+
+    # Added after loading the current status, which isn't a change for the user
+    if listener:
+        poller.listeners[session] = listener
+
+    return poller
+
+
+def unsubscribe(session: Session):
+    """Remove `session` from its poller. The poller stops on its next check."""
+
+    with _lock:
+        poller = _pollers.get((session.bridge_ip, tuple(session.route)))
+
+        if poller:
+            poller.listeners.pop(session, None)
+
+            if session in poller.sessions:
+                poller.sessions.remove(session)
+
+
+def hurry(session: Session, computers: list = None):
+    """
+    Check the status of `computers` (by default, the included computers of
+    `session`) on the next sweep of its poller, and often after that. Used after
+    running plugins that turn computers on or off. Does nothing with the status
+    agent, which already checks every computer on each round.
+    """
+
+    if computers is None:
+        computers = list(session.computers.get_included())
+
+    with _lock:
+        poller = _pollers.get((session.bridge_ip, tuple(session.route)))
+
+    if poller:
+        poller.hurry(c.ip for c in computers)
@@ -0,0 +1,123 @@
+"""
+Cache of the MAC -> ip mappings found by ``arp-scan`` on the network of each bridge
+computer, so "Update ips" only scans the network again when it's needed.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+
+def parse_arp_scan(stdout: str) -> Dict[str, str]:
+    """Parse the output of ``plugins/_local_arp_scan`` (lines `{ip} {mac}`) to a dict
+    mac (lowercase) -> ip"""
+
+    local_ips = {}
+
+    for line in stdout.splitlines():
+        fields = line.split()
+
+        if len(fields) == 2:
+            ip, mac = fields
+            local_ips[mac.lower()] = ip
+
+    return local_ips
+
+
+class ArpCache:
+    """
+    MAC -> ip mappings found on the network of a bridge computer, each one with the
+    time it was found.
+
+    Note:
+        MACs that were looked for but not found by a scan (for example, computers
+        turned off) are remembered too, but only for :obj:`miss_ttl` seconds: long
+        enough to not scan again on repeated presses, but a computer that has just
+        been turned on is found on the next scan. Hold :obj:`lock` while scanning,
+        so several users don't scan the same network at the same time.
+
+    Attributes:
+        ttl (:obj:`float`): Seconds that a mapping is valid.
+        miss_ttl (:obj:`float`): Seconds that a MAC not found is not looked for
+            again.
+    """
+
+    def __init__(self, ttl: float, miss_ttl: float = 15):
+        self.ttl = ttl
+        self.miss_ttl = miss_ttl
+        self.lock = threading.RLock()
+
+        # mac -> (ip or None if not found, time of the scan)
+        self.__leases: Dict[str, Tuple[str, float]] = {}
+
+    def needs_scan(self, macs: Iterable[str], now: float = None) -> bool:
+        """Test if any of `macs` has never been looked for, or its mapping expired."""
+
+        now = time.monotonic() if now is None else now
+
+        with self.lock:
+            for mac in macs:
+                lease = self.__leases.get(mac.lower())
+
+                if lease is None:
+                    return True
+
+                ip, found_at = lease
+                ttl = self.ttl if ip is not None else min(self.miss_ttl, self.ttl)
+
+                if now - found_at >= ttl:
+                    return True
+
+        return False
+
+    def update(self, local_ips: Dict[str, str], macs: Iterable[str], now: float = None):
+        """
+        Store the result of a scan: `local_ips` (a dict mac -> ip) and the `macs`
+        that were looked for, which are remembered as not found if they are not on
+        `local_ips`.
+        """
+
+        now = time.monotonic() if now is None else now
+
+        with self.lock:
+            for mac in macs:
+                self.__leases[mac.lower()] = (None, now)
+
+            for mac, ip in local_ips.items():
+                self.__leases[mac.lower()] = (ip, now)
+
+    def lookup(self, macs: Iterable[str]) -> Dict[str, str]:
+        """Return the known ip of each of `macs` that was found, as a dict mac -> ip"""
+
+        local_ips = {}
+
+        with self.lock:
+            for mac in macs:
+                ip, _ = self.__leases.get(mac.lower(), (None, 0))
+
+                if ip is not None:
+                    local_ips[mac.lower()] = ip
+
+        return local_ips
+
+    def __len__(self):
+        return len(self.__leases)
+
+
+# bridge_ip -> cache
+_caches: Dict[str, ArpCache] = {}
+_lock = threading.Lock()
+
+
+def get_cache(bridge_ip: str, ttl: float, miss_ttl: float = 15) -> ArpCache:
+    """Return the cache of the network of `bridge_ip`, shared by all the sessions."""
+
+    with _lock:
+        if bridge_ip not in _caches:
+            _caches[bridge_ip] = ArpCache(ttl, miss_ttl)
+
+        cache = _caches[bridge_ip]
+        cache.ttl = ttl
+        cache.miss_ttl = miss_ttl
+
+        return cache
@@ -1,4 +1,8 @@
 import json
+import os
+import stat
+import tempfile
+import threading
 from typing import Any, Dict
 
 
@@ -6,6 +10,12 @@ class BaseJson:
     """
     Base class for all the JSON files used by the program. Has some utilities to load
     JSON files as dictionaries and save them again as files.
+
+    Note:
+        The files are written to a temporary file that replaces the original one, so
+        a crash while saving never leaves a half written file. Saves of a content
+        that hasn't changed are skipped, and :obj:`save_later` groups several saves
+        on a single write.
     """
 
     def __init__(self, filepath: str):
@@ -13,6 +23,15 @@ class BaseJson:
         self.data: Dict[str, Any] = {}
         self.filepath: str = filepath
 
+        # Held while the data is modified or written
+        self.lock = threading.RLock()
+
+        # Modification time of the file when it was last loaded or written
+        self.mtime: int = 0
+
+        self.__last_written: str = None
+        self.__timer: threading.Timer = None
+
         self.load(filepath)
 
     # IO methods
@@ -21,9 +40,93 @@ class BaseJson:
 
         with open(filepath) as json_file:
             self.data = json.load(json_file)
+            self.mtime = os.fstat(json_file.fileno()).st_mtime_ns
+
+        self.__last_written = self.dumps()
+
+    def dumps(self) -> str:
+        """Return the content of the .json file as a string."""
+
+        return json.dumps(self.data, indent=2)
+
+    def is_outdated(self) -> bool:
+        """Test if the file has been modified since it was loaded or last written."""
+
+        try:
+            return os.stat(self.filepath).st_mtime_ns != self.mtime
+        except OSError:
+            return True
 
     def save(self):
-        """Write the changes made in the dictionary to the .json file"""
+        """
+        Write the changes made in the dictionary to the .json file. Does nothing if
+        the content is the same that was loaded or last written.
+        """
+
+        with self.lock:
+            content = self.dumps()
+            if content == self.__last_written:
+                return
+
+            # A symlink is kept, replacing the file it points to
+            path = os.path.realpath(self.filepath)
+
+            directory = os.path.dirname(path)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+            try:
+                with os.fdopen(fd, "w") as json_file:
+                    json_file.write(content)
+                    json_file.flush()
+
+                    # mkstemp creates the file only readable by the owner
+                    os.chmod(tmp_path, self.__file_mode(path))
+
+                    os.fsync(json_file.fileno())
+
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            self.__last_written = content
+            self.mtime = os.stat(self.filepath).st_mtime_ns
+
+    @staticmethod
+    def __file_mode(path: str) -> int:
+        """Mode of the file on `path`, or 0644 if it doesn't exist."""
+
+        try:
+            return stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            return 0o644
+
+    def save_later(self, delay: float):
+        """
+        Save the file after `delay` seconds. Calling it again before the file is
+        written doesn't reset the timer, so a burst of saves is written only once.
+        """
+
+        with self.lock:
+            if self.__timer is not None:
+                return
+
+            if delay <= 0:
+                self.save()
+                return
+
+            self.__timer = threading.Timer(delay, self.flush)
+            self.__timer.start()
+
+    def flush(self):
+        """Write now the changes waiting for :obj:`save_later`."""
+
+        with self.lock:
+            if self.__timer is None:
+                return
+
+            self.__timer.cancel()
+            self.__timer = None
 
-        with open(self.filepath, "w") as json_file:
-            json.dump(self.data, json_file, indent=2)
+            self.save()
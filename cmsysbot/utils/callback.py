@@ -0,0 +1,107 @@
+"""
+Structured callback data for the buttons handled by the callback router:
+``action:payload`` (for example ``sec:1b2c3d4e5f`` or ``inc:~Zm9vYmFy``).
+
+Only the first separator splits the action from the payload, so the payload can
+contain any character.
+
+Payloads are usually replaced by short tokens (prefixed with ``~``), kept on a
+server-side table. The table only holds the last :obj:`MAX_TOKENS` payloads
+(and is lost when the bot restarts), so a button from an old message may have
+an expired token: its payload is decoded as None.
+"""
+
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Tuple, Union
+
+SEPARATOR = ":"
+TOKEN_PREFIX = "~"
+
+MAX_TOKENS = 10000
+
+
+class TokenTable:
+    """
+    LRU table of tokens -> payloads. The token of a payload is derived from its
+    hash, so the same payload always gets the same token.
+    """
+
+    def __init__(self, max_size: int = MAX_TOKENS):
+        self.max_size = max_size
+
+        self.__payloads: "OrderedDict[str, str]" = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def token_for(payload: str) -> str:
+        digest = hashlib.sha1(payload.encode("utf-8")).digest()
+
+        return base64.urlsafe_b64encode(digest[:6]).decode("ascii")
+
+    def put(self, payload: str) -> str:
+        """Add `payload` to the table and return its token."""
+
+        token = TokenTable.token_for(payload)
+
+        with self.__lock:
+            self.__payloads[token] = payload
+            self.__payloads.move_to_end(token)
+
+            while len(self.__payloads) > self.max_size:
+                self.__payloads.popitem(last=False)
+
+        return token
+
+    def get(self, token: str) -> Union[str, None]:
+        """Return the payload of `token`, or None if it has expired."""
+
+        with self.__lock:
+            payload = self.__payloads.get(token)
+
+            if payload is not None:
+                self.__payloads.move_to_end(token)
+
+        return payload
+
+    def __len__(self):
+        return len(self.__payloads)
+
+
+# Table shared by all the keyboards
+tokens = TokenTable()
+
+
+def encode(action: str, payload: str = "", compact: bool = True) -> str:
+    """
+    Return the callback data for `action` with `payload`. If `compact`, the
+    payload is replaced by a token. Use `compact=False` only for payloads that are
+    already short and must never expire.
+    """
+
+    if compact and payload:
+        payload = TOKEN_PREFIX + tokens.put(payload)
+
+    return f"{action}{SEPARATOR}{payload}"
+
+
+def decode(data: str) -> Tuple[str, Union[str, None]]:
+    """
+    Return the action and payload of the callback data. The payload is None if its
+    token has expired.
+    """
+
+    action, _, payload = data.partition(SEPARATOR)
+
+    if payload.startswith(TOKEN_PREFIX):
+        return action, tokens.get(payload[len(TOKEN_PREFIX) :])
+
+    return action, payload
+
+
+def get_payload(update) -> Union[str, None]:
+    """Return the payload of the callback data of the button pressed."""
+
+    return decode(update.callback_query.data)[1]
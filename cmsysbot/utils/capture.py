@@ -0,0 +1,146 @@
+"""
+Utilities for reading the output of the commands run through SSH without keeping
+all of it in memory.
+"""
+
+import select
+import tempfile
+from typing import Iterator, Tuple
+
+import paramiko
+
+STDOUT = "stdout"
+STDERR = "stderr"
+
+CHUNK_SIZE = 32768
+
+
+def iter_channel(channel: paramiko.Channel) -> Iterator[Tuple[str, bytes]]:
+    """
+    Yield the chunks of stdout and stderr of `channel` as soon as they are received,
+    as tuples (`STDOUT` or `STDERR`, data), until the command finishes.
+
+    Both streams are drained at the same time, so a command that writes a lot on
+    stderr can't block while only stdout is being read.
+    """
+
+    while not channel.exit_status_ready():
+        received = False
+
+        if channel.recv_ready():
+            received = True
+            yield STDOUT, channel.recv(CHUNK_SIZE)
+
+        if channel.recv_stderr_ready():
+            received = True
+            yield STDERR, channel.recv_stderr(CHUNK_SIZE)
+
+        # Wait until there is more data (the channel fileno is signaled for both
+        # stdout and stderr)
+        if not received:
+            select.select([channel], [], [], 0.1)
+
+    # The command has finished: read whatever is left on both streams
+    for data in iter(lambda: channel.recv(CHUNK_SIZE), b""):
+        yield STDOUT, data
+
+    for data in iter(lambda: channel.recv_stderr(CHUNK_SIZE), b""):
+        yield STDERR, data
+
+
+class StreamCapture:
+    """
+    Bounded buffer for the output of a command.
+
+    Only the last `max_size` bytes of the output are kept in memory, so the end of
+    the output (usually the most interesting part) can be returned as text.
+
+    With `keep_all`, the whole output is written too to a
+    :obj:`tempfile.SpooledTemporaryFile` (which stays in memory until it grows past
+    `spill_size` bytes and is moved to disk afterwards), and :obj:`text` returns
+    all of it. Used for the outputs parsed by the bot, which must not be cut.
+    """
+
+    def __init__(
+        self, spill_size: int = 1048576, max_size: int = 65536, keep_all: bool = False
+    ):
+        self.max_size = max_size
+        self.size = 0
+
+        self.__file = None
+        if keep_all:
+            self.__file = tempfile.SpooledTemporaryFile(max_size=spill_size)
+
+        self.__tail = bytearray()
+
+    def write(self, data: bytes):
+        if self.__file is not None:
+            self.__file.write(data)
+
+        self.size += len(data)
+
+        self.__tail += data
+        if len(self.__tail) > self.max_size:
+            del self.__tail[: len(self.__tail) - self.max_size]
+
+    @property
+    def truncated(self) -> bool:
+        return self.__file is None and self.size > self.max_size
+
+    def text(self) -> str:
+        """
+        Return the output as a string. If it's bigger than `max_size` (and not
+        `keep_all`), only the last `max_size` bytes are returned, preceded by a
+        note with the omitted size.
+        """
+
+        if self.__file is not None:
+            return b"".join(self.chunks()).decode("utf-8", "replace")
+
+        text = self.__tail.decode("utf-8", "replace")
+
+        if self.truncated:
+            text = f"[... {self.size - self.max_size} bytes omitted ...]\n{text}"
+
+        return text
+
+    def chunks(self) -> Iterator[bytes]:
+        """Yield the whole output by chunks. Only available with `keep_all`."""
+
+        if self.__file is None:
+            raise ValueError("The whole output is only kept with keep_all")
+
+        self.__file.seek(0)
+
+        yield from iter(lambda: self.__file.read(CHUNK_SIZE), b"")
+
+        self.__file.seek(0, 2)
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def capture_channel(
+    channel: paramiko.Channel, spill_size: int, max_size: int, keep_all: bool = False
+) -> Tuple[StreamCapture, StreamCapture]:
+    """
+    Read the stdout and stderr of `channel` into two :obj:`StreamCapture`. With
+    `keep_all`, the whole stdout is kept (see :obj:`StreamCapture`).
+    """
+
+    captures = {
+        STDOUT: StreamCapture(spill_size, max_size, keep_all),
+        STDERR: StreamCapture(spill_size, max_size),
+    }
+
+    for stream, data in iter_channel(channel):
+        captures[stream].write(data)
+
+    return captures[STDOUT], captures[STDERR]
@@ -1,6 +1,8 @@
 import json
+import os
+import sys
 from enum import Enum
-from typing import Any, Dict, Iterator, List, Union
+from typing import Any, Dict, Iterator, List, Tuple, Union
 
 from .base_json import BaseJson
 
@@ -9,8 +11,14 @@ class Computer:
     """
     This class represents a computer. Provides getters and setters to avoid interacting
     directly with the dictionary
+
+    Note:
+        The attributes are stored on :obj:`__slots__`, as a single inventory may have
+        thousands of computers.
     """
 
+    __slots__ = ("name", "ip", "mac", "included", "status")
+
     class Status:
         ON = "alive"
         OFF = "unreachable"
@@ -22,20 +30,15 @@ class Computer:
         """
 
         # Initialize with N/A string to avoid having empty strings
-        self.name: str = "N/A"
-        self.ip: str = "N/A"
-        self.mac: str = "N/A"
-        self.included: bool = True
-        self.status = Computer.Status.OFF
-
-        # If a dictionary is passed, save the keys (name, ip, mac...) as attributes
-        # values
-        for key in computer_data:
-            try:
-                getattr(self, key)
-                setattr(self, key, computer_data[key])
-            except AttributeError:
-                pass
+        self.name: str = computer_data.get("name", "N/A")
+        self.ip: str = computer_data.get("ip", "N/A")
+        self.mac: str = computer_data.get("mac", "N/A")
+        self.included: bool = computer_data.get("included", True)
+
+        # Share a single string between all the computers with the same status
+        self.status: str = sys.intern(
+            computer_data.get("status", Computer.Status.OFF)
+        )
 
     # TODO: Change to "is_on?"
     def on(self) -> bool:
@@ -69,6 +72,15 @@ class Computers(BaseJson):
     This class provides an interface for using the .json files created on config/ (not
     config.json). Provides functions to get the names/ips/macs of the computers and
     easily save changes on the .json
+
+    Note:
+        The computers are indexed by MAC and by ip, so finding a computer doesn't
+        require going through the whole list. Use :obj:`set_ip` to change the ip of
+        a computer, so the index is kept up to date and the change is saved.
+
+        The changes made to the file by someone else are never overwritten: if the
+        file has been modified, :obj:`save` loads it again instead (see
+        :obj:`reload`).
     """
 
     def __init__(self, filepath: str):
@@ -78,24 +90,94 @@ class Computers(BaseJson):
 
         self.__index = 0
 
+        # Number of times the computers have been loaded again from the file
+        self.generation = 0
+
         super().__init__(filepath)
 
-        # Transform dict to array of Computer objects
-        self.computers = [Computer(entry) for entry in self.data["computers"]]
+        self.__build()
+
+    def __build(self):
+        # Transform dict to array of Computer objects. The dicts are dropped, so each
+        # computer is only kept once in memory
+        self.computers = [Computer(entry) for entry in self.data.pop("computers")]
+
+        self.__by_mac: Dict[str, Computer] = {}
+        self.__by_ip: Dict[str, List[Computer]] = {}
+        self.reindex()
+
+        # Kept up to date by add(), remove() and apply_status()
+        self.__n_connected = sum(1 for c in self.computers if c.on())
+
+        # If there are changes not written to the file yet
+        self.dirty = False
+
+    def reload(self):
+        """
+        Load again the computers from the file, dropping the changes not saved yet.
+        The computers are replaced by new :obj:`Computer` objects, and
+        :obj:`generation` is incremented.
+        """
+
+        with self.lock:
+            self.load(self.filepath)
+            self.__build()
+            self.generation += 1
 
     @property
     def n_connected_computers(self):
         """Return the number of computers with Status.ON"""
 
-        return len(list(filter(lambda c: c.on(), self.computers)))
+        return self.__n_connected
 
     def save(self):
         """
         Transform each Computer object to a Dict and write the changes to the file.
+        Does nothing if no computer has been added, removed or modified.
         """
-        self.data["computers"] = [computer.asdict() for computer in self.computers]
 
-        super().save()
+        with self.lock:
+            if not self.dirty:
+                return
+
+            # Someone else modified the file: their changes win
+            if os.path.exists(self.filepath) and self.is_outdated():
+                self.reload()
+                return
+
+            self.data["computers"] = [c.asdict() for c in self.computers]
+
+            try:
+                super().save()
+            finally:
+                del self.data["computers"]
+
+            self.dirty = False
+
+    def reindex(self):
+        """Build again the MAC and ip indexes from the list of computers."""
+
+        self.__by_mac = {}
+        self.__by_ip = {}
+
+        for computer in self.computers:
+            self.__index_computer(computer)
+
+    def __index_computer(self, computer: Computer):
+        # On duplicated MACs, the first computer is the one found
+        self.__by_mac.setdefault(computer.mac.lower(), computer)
+        self.__by_ip.setdefault(computer.ip, []).append(computer)
+
+    def __unindex_computer(self, computer: Computer, ip: str):
+        if self.__by_mac.get(computer.mac.lower()) is computer:
+            del self.__by_mac[computer.mac.lower()]
+
+        same_ip = self.__by_ip.get(ip, [])
+        if computer in same_ip:
+            same_ip.remove(computer)
+
+        if not same_ip:
+            self.__by_ip.pop(ip, None)
 
     @staticmethod
     def create(filepath: str):
@@ -114,40 +196,111 @@ class Computers(BaseJson):
     # Operators
     def add(self, name: str, ip: str, mac: str):
         """
-        Add a new computer. NOTE: Changes are only made in the dictionary. To make the
+        Add a new computer. NOTE: Changes are only made in memory. To make the
         changes permanent in the .json file, use save() afterwards
         """
 
-        self.data["computers"].append({"name": name, "ip": ip, "mac": mac})
+        computer = Computer({"name": name, "ip": ip, "mac": mac})
+
+        self.computers.append(computer)
+        self.__index_computer(computer)
+
+        if computer.on():
+            self.__n_connected += 1
+
+        self.dirty = True
 
     def remove(self, mac: str):
         """
         Remove a computer with the same mac value. If the computer to be removed is not
-        found, it does nothing. NOTE: Changes are only made in the dictionary. To make
-        the changes permanent in the .json file, use save() afterwards
+        found, it does nothing. NOTE: Changes are only made in memory. To make the
+        changes permanent in the .json file, use save() afterwards
         """
 
-        for i, computer in enumerate(self.get_computers()):
-            if computer.mac == mac:
-                del self.data["computers"][i]
-                break
+        computer = self.find(mac)
+
+        if computer:
+            self.computers.remove(computer)
+            self.__unindex_computer(computer, computer.ip)
+
+            if computer.on():
+                self.__n_connected -= 1
+
+            self.dirty = True
 
     def find(self, mac: str) -> Union[Computer, None]:
         """
-        Find and return the first computer found with the same MAC address. Returns
-        "None" if couldn't find a computer.
+        Find and return the computer with the same MAC address (case insensitive).
+        Returns "None" if couldn't find a computer.
         """
 
-        for computer in self.get_computers():
-            if computer.mac == mac:
-                return computer
+        return self.__by_mac.get(mac.lower())
 
-        return None
+    def find_by_ip(self, ip: str) -> List[Computer]:
+        """Return all the computers with the specified ip."""
+
+        return list(self.__by_ip.get(ip, []))
+
+    def set_ip(self, computer: Computer, ip: str):
+        """Change the ip of a computer, updating the ip index."""
+
+        if computer.ip == ip:
+            return
+
+        self.__unindex_computer(computer, computer.ip)
+        computer.ip = ip
+        self.__index_computer(computer)
+
+        self.dirty = True
+
+    def update_ips(self, local_ips: Dict[str, str]) -> List[Tuple[Computer, str]]:
+        """
+        Update the ip of each included computer whose MAC is in `local_ips` (a dict
+        MAC -> ip). Returns a list of tuples (computer, last ip) with the updated
+        computers.
+        """
+
+        updated = []
+
+        for computer in self.get_included_computers():
+            mac = computer.mac.lower()
+
+            if mac in local_ips:
+                last_ip = computer.ip
+                self.set_ip(computer, local_ips[mac])
+
+                updated.append((computer, last_ip))
+
+        return updated
+
+    def apply_status(self, statuses: Dict[str, str]) -> List[Computer]:
+        """
+        Set the status of the computers, from a dict ip -> status. Returns the
+        computers whose status has changed.
+        """
+
+        changed = []
+
+        for ip, status in statuses.items():
+            status = sys.intern(status)
+
+            for computer in self.find_by_ip(ip):
+                if computer.status != status:
+                    self.__n_connected -= computer.on()
+                    computer.status = status
+                    self.__n_connected += computer.on()
+
+                    changed.append(computer)
+
+        if changed:
+            self.dirty = True
+
+        return changed
 
     def __len__(self):
         """Return the number of computers defined on the config file"""
 
-        return len(self.data["computers"])
+        return len(self.computers)
 
     # Generators
     def __iter__(self):
@@ -1,15 +1,43 @@
+import hashlib
 import os
-from typing import Iterator, List, Union
+from typing import Dict, FrozenSet, Iterator, List, Tuple, Union
 
 from .base_json import BaseJson
 from .computers_json import Computers
 
 
 class Section:
+    """
+    A section of the structure defined on the config.json.
+
+    Note:
+        The sections returned by :obj:`Config` are built once, when the config.json
+        is loaded, and are shared: they must not be modified. Besides the values
+        read from the config.json, they know their position on the tree
+        (:obj:`route`, :obj:`parent`, :obj:`children` and :obj:`path`).
+    """
+
+    # Keys that can be read from a Dictionary
+    KEYS = ("name", "sections", "allowed_users", "max_workers")
+
     def __init__(self, section_data: Union[str, dict, None] = None):
         self.name = "N/A"
         self.sections = []
         self.allowed_users = []
+        self.max_workers = None
+
+        # Position on the tree (set by Config)
+        self.route: Tuple[str, ...] = ()
+        self.parent: Union["Section", None] = None
+        self.children: Tuple["Section", ...] = ()
+
+        # Users with access to the section, including the ones inherited from its
+        # parents, or None if no ACL is defined (set by Config)
+        self.acl: Union[FrozenSet[str], None] = None
+
+        # Users with access to the section or any of its subsections, or None if
+        # any of them has no ACL (set by Config)
+        self.visible_to: Union[FrozenSet[str], None] = None
 
         # Initialiize Section from a string
         if isinstance(section_data, str):
@@ -17,12 +45,25 @@ class Section:
 
         # Initialize Section from a dict
         if isinstance(section_data, dict):
-            for key in section_data:
-                try:
-                    getattr(self, key)
+            for key in Section.KEYS:
+                if key in section_data:
                     setattr(self, key, section_data[key])
-                except AttributeError:
-                    pass
+
+    @property
+    def path(self) -> str:
+        """Route of the section joined with "/" (like its .json file)."""
+
+        return "/".join(self.route)
+
+    @property
+    def id(self) -> str:
+        """
+        Short identifier of the section, derived from its path (so it doesn't change
+        when the config.json is reloaded). Used on the callback data of the buttons,
+        which is limited to 64 bytes.
+        """
+
+        return hashlib.sha1(self.path.encode("utf-8")).hexdigest()[:10]
 
     @property
     def subsections(self):
@@ -52,6 +93,8 @@ class Config(BaseJson):
         super().__init__(filepath)
 
         self.root_folder = os.path.dirname(filepath) + "/"
+        self.__admins = frozenset(self.data["admins"])
+        self.__build_section_tree()
         self.__create_folder_structure()
 
     @property
@@ -118,30 +161,245 @@ class Config(BaseJson):
 
         return self.data["check_status_interval"]
 
+    @property
+    def check_status_max_interval(self) -> int:
+        """Get the max interval of time (in seconds) between two checks of the status
+        of a computer. Computers whose status doesn't change are checked less and
+        less often, from :obj:`check_status_interval` up to this interval. Not used
+        by the :obj:`status_agent`, which checks all of them every time"""
+
+        return self.data.get("check_status_max_interval", 600)
+
+    @property
+    def status_agent(self) -> bool:
+        """Get if the status of the computers is checked by an agent running on the
+        bridge computer, which streams the changes to the bot, instead of running a
+        new command on the bridge for each check"""
+
+        return self.data.get("status_agent", False)
+
+    @property
+    def remote_idle_timeout(self) -> int:
+        """Get the time (in seconds) that an unused connection to a remote computer is
+        kept open before closing it"""
+
+        return self.data.get("remote_idle_timeout", 300)
+
+    @property
+    def fanout(self) -> bool:
+        """Get if the plugins with "remote" source should be run on all the computers
+        by the bridge itself, sending a single command from the bot server"""
+
+        return self.data.get("fanout", False)
+
+    @property
+    def max_workers(self) -> int:
+        """Get the default max number of remote computers that a bridge computer can
+        process at the same time"""
+
+        return self.data.get("max_workers", 8)
+
+    @property
+    def output_spill_size(self) -> int:
+        """Get the size (in bytes) from which the whole output of a command parsed
+        by the bot (like the status of the computers) is stored on a temporary file
+        instead of memory"""
+
+        return self.data.get("output_spill_size", 1048576)
+
+    @property
+    def output_max_size(self) -> int:
+        """Get the max size (in bytes) of the output of a command returned to the
+        chat. Only the end of longer outputs is shown"""
+
+        return self.data.get("output_max_size", 65536)
+
+    @property
+    def save_delay(self) -> int:
+        """Get the time (in seconds) that the changes on the computers are kept in
+        memory before writing them to the section .json file, so several changes
+        are written at once"""
+
+        return self.data.get("save_delay", 2)
+
+    @property
+    def storage(self) -> str:
+        """Get where the computers of each section are stored: "json" (a .json file
+        per section) or "sqlite" (a single database, see :obj:`database`)"""
+
+        return self.data.get("storage", "json")
+
+    @property
+    def database(self) -> str:
+        """Get the path of the SQLite database used when :obj:`storage` is "sqlite"
+        """
+
+        return self.data.get("database", self.root_folder + "computers.db")
+
+    @property
+    def notify_status_changes(self) -> bool:
+        """Get if the users connected to a section receive a message when any of its
+        computers is turned on or off"""
+
+        return self.data.get("notify_status_changes", False)
+
+    @property
+    def arp_cache_ttl(self) -> int:
+        """Get the time (in seconds) that the MAC -> ip mappings found on the network
+        of a bridge computer are reused by "Update ips" before scanning it again"""
+
+        return self.data.get("arp_cache_ttl", 300)
+
+    @property
+    def arp_cache_miss_ttl(self) -> int:
+        """Get the time (in seconds) that a computer not found on the network of a
+        bridge computer doesn't trigger a new scan. Kept short, so computers that
+        have just been turned on are found soon"""
+
+        return self.data.get("arp_cache_miss_ttl", 15)
+
+    @property
+    def reload_interval(self) -> int:
+        """Get the interval of time (in seconds) between each check for changes on
+        the config.json, which is loaded again without restarting the bot"""
+
+        return self.data.get("reload_interval", 5)
+
+    @property
+    def progress_interval(self) -> int:
+        """Get the min time (in seconds) between two updates of the progress message
+        shown while a plugin is running"""
+
+        return self.data.get("progress_interval", 3)
+
     @property
     def admins(self) -> List[str]:
         """Return a list with all the users defined as admin on the config.json"""
 
         return self.data["admins"]
 
+    def __build_section_tree(self):
+        """
+        Build the Section objects of the whole structure, indexed by their route.
+        """
+
+        self.__root = Section({"name": "", "sections": self.data["structure"]})
+        self.__sections: Dict[Tuple[str, ...], Section] = {}
+
+        pending = [self.__root]
+        while pending:
+            parent = pending.pop()
+
+            children = []
+            for section_data in parent.sections:
+                section = Section(section_data)
+                section.route = parent.route + (section.name,)
+                section.parent = parent if parent is not self.__root else None
+
+                # With repeated names, the first section is the one found
+                self.__sections.setdefault(section.route, section)
+
+                # Access permissions propagate to subsections
+                if section.allowed_users or parent.acl is not None:
+                    section.acl = frozenset(section.allowed_users) | (
+                        parent.acl or frozenset()
+                    )
+
+                children.append(section)
+                pending.append(section)
+
+            parent.children = tuple(children)
+
+        self.__compute_visibility(self.__root)
+
+        self.__sections_by_id: Dict[str, Section] = {}
+        for section in self.__sections.values():
+            self.__sections_by_id.setdefault(section.id, section)
+
+    def __compute_visibility(self, section: Section):
+        """Set :obj:`Section.visible_to` for `section` and its subsections."""
+
+        for child in section.children:
+            self.__compute_visibility(child)
+
+        visible_to = [section.acl] + [child.visible_to for child in section.children]
+
+        if any(users is None for users in visible_to):
+            section.visible_to = None
+        else:
+            section.visible_to = frozenset().union(*visible_to)
+
+    def get_section_by_id(self, section_id: str) -> Union[Section, None]:
+        """Return the Section with the :obj:`Section.id`, or None if not found."""
+
+        return self.__sections_by_id.get(section_id)
+
+    def is_admin(self, username: str) -> bool:
+        return username in self.__admins
+
+    def has_access(self, username: str, route: List[str]) -> bool:
+        """
+        Test if `username` has access to the section on `route`.
+
+        Note:
+            Access permissions propagate to subsections. That means that if you give
+            access to one user, you're also giving him access to all the subsections
+            below. If no ACL is defined on the section or its parents, all users have
+            access to it. Admins have access to all the sections.
+        """
+
+        if self.is_admin(username):
+            return True
+
+        section = self.get_section(route)
+        if section is None:
+            return not route
+
+        return section.acl is None or username in section.acl
+
+    def accessible_sections(
+        self, username: str, route: List[str] = None
+    ) -> Iterator[Section]:
+        """
+        Like :obj:`get_sections`, but only with the sections that `username` can
+        access, or that have some subsection that `username` can access.
+        """
+
+        for section in self.get_sections(route):
+            users = section.visible_to
+
+            if users is None or username in users or self.is_admin(username):
+                yield section
+
     def get_section(self, route: List[str] = None) -> Section:
         """
-        Return the Section object corresponding to the passed route.
+        Return the Section object corresponding to the passed route, or None if there
+        isn't a section on that route.
+        """
+
+        return self.__sections.get(tuple(route or []))
+
+    def get_max_workers(self, route: List[str]) -> int:
+        """
+        Return the max number of remote computers processed at the same time for the
+        section on `route`. The value defined on the closest section (or its parents)
+        overrides the global `max_workers`.
         """
 
-        parent_route = route[:-1]
-        section_name = route[-1]
+        section = self.get_section(route)
+        while section:
+            if section.max_workers:
+                return section.max_workers
 
-        for section in self.get_sections(parent_route):
-            if section_name == section.name:
-                return section
+            section = section.parent
 
-        return None
+        return self.max_workers
 
     def get_sections(self, route: List[str] = None) -> Iterator[Section]:
         """
         Return an Iterator with the next direct childs (subsections) from a route, as
-        Section objects.
+        Section objects. Sections without subsections (or unknown routes) have no
+        childs.
 
         Example:
             For a structure like
@@ -155,18 +413,10 @@ class Config(BaseJson):
             And, from A1 would return: [Section(B1), Section(B2)]
         """
 
-        route = route or []
-
-        sections = [Section(s) for s in self.data["structure"]]
-
-        for part in route:
-            for section in sections:
-                if part == section.name and section.has_subsections():
-                    sections = [Section(s) for s in section.subsections]
-                    break
+        section = self.get_section(route) if route else self.__root
 
-        for section in sections:
-            yield section
+        if section:
+            yield from section.children
 
     def get_all_sections(self, route: List[str] = None) -> Iterator[Section]:
         """
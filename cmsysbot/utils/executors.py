@@ -0,0 +1,124 @@
+import collections
+import threading
+from concurrent import futures
+from typing import Deque, Dict
+
+
+class BridgeExecutor(futures.Executor):
+    """
+    Executor that runs at most :obj:`max_workers` tasks at the same time. Unlike
+    :obj:`futures.ThreadPoolExecutor`, the limit can be changed while tasks are
+    running: the tasks already running are not interrupted, and the queued tasks
+    start when there are fewer running tasks than the new limit.
+
+    Note:
+        The queued tasks wait on a queue of the executor, not on a thread: only
+        the running tasks take one of the threads of the pool (up to
+        :obj:`MAX_THREADS`, created only when needed, so that's also the highest
+        possible limit). Each thread keeps running queued tasks until there are no
+        more, or there are more running tasks than the limit.
+    """
+
+    MAX_THREADS = 256
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = ""):
+        self.max_workers = max_workers
+
+        # Workers started, and how many of them are running a task (the rest are
+        # about to take one from the queue)
+        self.running = 0
+        self.busy = 0
+
+        self.__lock = threading.Lock()
+        self.__queue: Deque[tuple] = collections.deque()
+        self.__pool = futures.ThreadPoolExecutor(
+            max_workers=self.MAX_THREADS, thread_name_prefix=thread_name_prefix
+        )
+
+    def set_max_workers(self, max_workers: int):
+        with self.__lock:
+            self.max_workers = max_workers
+            self.__start_workers()
+
+    def submit(self, fn, *args, **kwargs) -> futures.Future:
+        future = futures.Future()
+
+        with self.__lock:
+            self.__queue.append((future, fn, args, kwargs))
+            self.__start_workers()
+
+        return future
+
+    def shutdown(self, wait: bool = True):
+        # The queued tasks are still run, as with futures.ThreadPoolExecutor
+        self.__pool.shutdown(wait=wait)
+
+    def __start_workers(self):
+        """Start a worker for each queued task that fits on the limit. Hold the
+        lock while calling it."""
+
+        while self.running < self.max_workers:
+            # Each worker not busy yet is about to take one of the queued tasks
+            if len(self.__queue) <= self.running - self.busy:
+                return
+
+            self.running += 1
+            self.__pool.submit(self.__work)
+
+    def __work(self):
+        while True:
+            with self.__lock:
+                if not self.__queue or self.running > self.max_workers:
+                    self.running -= 1
+                    return
+
+                future, fn, args, kwargs = self.__queue.popleft()
+                self.busy += 1
+
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(fn(*args, **kwargs))
+                    except BaseException as e:
+                        future.set_exception(e)
+            finally:
+                with self.__lock:
+                    self.busy -= 1
+
+
+# bridge_ip -> executor
+_executors: Dict[str, BridgeExecutor] = {}
+
+# bridge_ip -> {section -> max_workers of the section}
+_limits: Dict[str, Dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def get_executor(bridge_ip: str, section: str, max_workers: int) -> BridgeExecutor:
+    """
+    Return the executor shared by all the plugin runs against the same bridge
+    computer, so the number of simultaneous connections to the bridge never exceeds
+    the limit, no matter how many users or plugins are running.
+
+    The limit of the bridge is the lowest `max_workers` of the sections used with
+    it, as any of them may be the one that the bridge (or its network) can't handle
+    more than. The value of a section replaces its previous one (for example, after
+    reloading the config.json), and the executor is resized if the limit changes
+    (see :obj:`BridgeExecutor`).
+    """
+
+    with _lock:
+        limits = _limits.setdefault(bridge_ip, {})
+        limits[section] = max_workers
+
+        limit = min(limits.values())
+        executor = _executors.get(bridge_ip)
+
+        if executor is None:
+            executor = BridgeExecutor(limit, thread_name_prefix=f"bridge-{bridge_ip}")
+            _executors[bridge_ip] = executor
+
+        elif executor.max_workers != limit:
+            executor.set_max_workers(limit)
+
+        return executor
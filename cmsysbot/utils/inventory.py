@@ -0,0 +1,260 @@
+"""
+Registry of the computers of each section, shared by all the sessions of the bot.
+
+Each .json file is parsed only once (and again only if it's modified by someone
+else), and each session gets a :obj:`ComputersView` over it: the shared fields of
+the computers (ip, status...) are stored only once, while the per-user state (the
+:obj:`included` filter) is kept on the view. When the file is loaded again, every
+view switches to the new computers.
+"""
+
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Tuple, Union
+
+from . import sqlite_storage, states
+from .computers_json import Computer, Computers
+
+STORAGE_JSON = "json"
+STORAGE_SQLITE = "sqlite"
+
+
+class SharedComputers:
+    """
+    A :obj:`Computers` shared by several sessions, with the lock that must be held
+    to modify it.
+    """
+
+    def __init__(self, computers: Computers):
+        self.computers = computers
+        self.lock = computers.lock
+
+    @property
+    def filepath(self) -> str:
+        return self.computers.filepath
+
+    def is_outdated(self) -> bool:
+        """Test if the computers have been modified outside the bot."""
+
+        return self.computers.is_outdated()
+
+    def reload(self):
+        """Load again the computers, in place. See :obj:`Computers.reload`"""
+
+        self.computers.reload()
+
+    def save(self, delay: float = 0):
+        """Save the computers, waiting `delay` seconds for more changes first."""
+
+        self.computers.save_later(delay)
+
+
+class ComputerView:
+    """
+    A :obj:`Computer` as seen by a single session. The attribute :obj:`included` is
+    only visible to the session, while the rest are read from (and written to) the
+    shared computer.
+    """
+
+    __slots__ = ("_record", "included")
+
+    def __init__(self, record: Computer):
+        self._record = record
+        self.included = record.included
+
+    @property
+    def name(self) -> str:
+        return self._record.name
+
+    @property
+    def ip(self) -> str:
+        return self._record.ip
+
+    @property
+    def mac(self) -> str:
+        return self._record.mac
+
+    @property
+    def status(self) -> str:
+        return self._record.status
+
+    def on(self) -> bool:
+        return self._record.on()
+
+    def asdict(self) -> dict:
+        return self._record.asdict()
+
+    def __str__(self) -> str:
+        return str(self._record)
+
+
+class ComputersView:
+    """
+    Interface of :obj:`Computers` for a single session. The changes on the ips and
+    status are made on the shared computers, holding their lock.
+
+    Note:
+        If the shared computers are loaded again from the file, the views of the
+        computers are built again, keeping :obj:`included` for the same MACs.
+    """
+
+    def __init__(self, shared: SharedComputers):
+        self.__shared = shared
+
+        self.__generation = None
+        self.__views: Dict[Computer, ComputerView] = {}
+        self.__sync()
+
+    def __sync(self) -> Dict[Computer, ComputerView]:
+        """Return the views of the computers, built again if they were reloaded."""
+
+        computers = self.__shared.computers
+
+        if self.__generation != computers.generation:
+            with self.__shared.lock:
+                included = {
+                    view.mac.lower(): view.included for view in self.__views.values()
+                }
+
+                self.__generation = computers.generation
+                self.__views = {record: ComputerView(record) for record in computers}
+
+                for view in self.__views.values():
+                    view.included = included.get(view.mac.lower(), view.included)
+
+        return self.__views
+
+    @property
+    def filepath(self) -> str:
+        return self.__shared.filepath
+
+    @property
+    def n_connected_computers(self):
+        """Return the number of computers with Status.ON"""
+
+        return self.__shared.computers.n_connected_computers
+
+    def save(self, delay: float = 0):
+        """See :obj:`SharedComputers.save`"""
+
+        self.__shared.save(delay)
+
+    def find(self, mac: str) -> Union[ComputerView, None]:
+        """See :obj:`Computers.find`"""
+
+        return self.__sync().get(self.__shared.computers.find(mac))
+
+    def find_by_ip(self, ip: str) -> List[ComputerView]:
+        """See :obj:`Computers.find_by_ip`"""
+
+        views = self.__sync()
+
+        return [
+            views[record]
+            for record in self.__shared.computers.find_by_ip(ip)
+            if record in views
+        ]
+
+    def update_ips(self, local_ips: Dict[str, str]) -> List[Tuple[ComputerView, str]]:
+        """
+        Update the ip of each computer included by this session whose MAC is in
+        `local_ips`. See :obj:`Computers.update_ips`
+        """
+
+        updated = []
+
+        with self.__shared.lock:
+            for view in self.get_included_computers():
+                mac = view.mac.lower()
+
+                if mac in local_ips:
+                    last_ip = view.ip
+                    self.__shared.computers.set_ip(view._record, local_ips[mac])
+
+                    updated.append((view, last_ip))
+
+        return updated
+
+    def apply_status(self, statuses: Dict[str, str]) -> List[ComputerView]:
+        """See :obj:`Computers.apply_status`"""
+
+        views = self.__sync()
+
+        with self.__shared.lock:
+            changed = self.__shared.computers.apply_status(statuses)
+
+        return [views[record] for record in changed if record in views]
+
+    def __len__(self):
+        return len(self.__sync())
+
+    # Generators
+    def __iter__(self):
+        return self.get_computers()
+
+    def get_computers(self) -> Iterator[ComputerView]:
+        yield from self.__sync().values()
+
+    def get_included(self):
+        """Alias for `get_included_computers()`"""
+        return self.get_included_computers()
+
+    def get_included_computers(self) -> Iterator[ComputerView]:
+        for view in self.__sync().values():
+            if view.included:
+                yield view
+
+
+# filepath (or section on the database) -> computers loaded from it
+_inventories: Dict[str, SharedComputers] = {}
+_lock = threading.Lock()
+
+
+def _get_shared(key: str, loader: Callable[[], Computers]) -> SharedComputers:
+    with _lock:
+        shared = _inventories.get(key)
+
+        if shared is None:
+            shared = SharedComputers(loader())
+            _inventories[key] = shared
+
+        # Loaded again in place, so the views already created see the changes too
+        elif shared.is_outdated():
+            shared.reload()
+
+        return shared
+
+
+def get_view(filepath: str) -> ComputersView:
+    """
+    Return a new view over the computers defined on `filepath`. The file is only
+    parsed the first time, or if it has been modified since then.
+    """
+
+    filepath = os.path.abspath(filepath)
+
+    return ComputersView(_get_shared(filepath, lambda: Computers(filepath)))
+
+
+def get_section_view(route: List[str]) -> ComputersView:
+    """
+    Return a new view over the computers of the section on `route`, read from the
+    storage defined on the config.json (its .json file, or the SQLite database).
+    """
+
+    config = states.config_file
+    section = "/".join(route)
+
+    if config.storage == STORAGE_SQLITE:
+        database = sqlite_storage.get_database(config.database)
+
+        def load() -> Computers:
+            # Sections added after the start (reloading the config.json) are
+            # imported from their .json file the first time they are used
+            database.import_json(config, section)
+
+            return sqlite_storage.SqliteComputers(database, section)
+
+        return ComputersView(_get_shared(f"{database.path}#{section}", load))
+
+    return get_view(f"{config.root_folder}{section}.json")
@@ -0,0 +1,211 @@
+import logging
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+import paramiko
+from paramiko import ssh_exception
+
+# Errors raised when a remote computer can't be reached through the bridge
+CONNECTION_ERRORS = (EOFError, socket.error, ssh_exception.SSHException)
+
+
+class _Connection:
+    """Client connected to a remote computer, and the number of threads using it."""
+
+    def __init__(self, client: paramiko.SSHClient):
+        self.client = client
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+class RemoteConnections:
+    """
+    Pool of SSH connections from the bot server to the remote computers, tunnelled
+    through the already open connection with the bridge computer.
+
+    Each remote computer is reached by opening a ``direct-tcpip`` channel on the
+    bridge transport, and an authenticated :obj:`paramiko.SSHClient` is kept alive
+    on top of it. Subsequent commands to the same computer only need to open a new
+    session channel instead of doing a full SSH handshake.
+
+    Connections that have not been used for more than :obj:`idle_timeout` seconds
+    are closed, and dead connections are replaced transparently. A connection is
+    in use from :obj:`get` until :obj:`release` (see :obj:`connection`), and it's
+    never closed for being idle while in use.
+    """
+
+    CONNECT_TIMEOUT = 3
+    SSH_PORT = 22
+
+    def __init__(
+        self,
+        bridge_client: paramiko.SSHClient,
+        username: str,
+        password: str,
+        idle_timeout: int = 300,
+    ):
+        self.bridge_client = bridge_client
+        self.username = username
+        self.password = password
+        self.idle_timeout = idle_timeout
+
+        # target_host -> connection
+        self.__clients: Dict[str, _Connection] = {}
+        self.__host_locks: Dict[str, threading.Lock] = {}
+        self.__lock = threading.Lock()
+
+    def get(self, target_host: str) -> paramiko.SSHClient:
+        """
+        Return an authenticated client connected to `target_host`, reusing the
+        existing connection if it's still alive. Throws the paramiko/socket exception
+        if the connection couldn't be established.
+
+        The client is in use until it's passed to :obj:`release`.
+        """
+
+        self.evict_idle()
+
+        # Only one thread at a time can open the connection to the same host
+        with self.__lock_for(target_host):
+            with self.__lock:
+                connection = self.__clients.get(target_host)
+
+            if connection is None or not self.is_alive(connection.client):
+                if connection:
+                    connection.client.close()
+
+                # The threads still using the dead client don't count for the new one
+                connection = _Connection(self.__connect(target_host))
+
+            with self.__lock:
+                self.__clients[target_host] = connection
+                connection.in_use += 1
+                connection.last_used = time.monotonic()
+
+            return connection.client
+
+    def release(self, target_host: str, client: paramiko.SSHClient):
+        """Mark `client` (returned by :obj:`get`) as no longer in use."""
+
+        with self.__lock:
+            connection = self.__clients.get(target_host)
+
+            # Ignore clients already replaced or closed
+            if connection and connection.client is client:
+                connection.in_use -= 1
+                connection.last_used = time.monotonic()
+
+    @contextmanager
+    def connection(self, target_host: str) -> Iterator[paramiko.SSHClient]:
+        """Use the client returned by :obj:`get` while inside the `with` block."""
+
+        client = self.get(target_host)
+
+        try:
+            yield client
+        finally:
+            self.release(target_host, client)
+
+    @staticmethod
+    def is_alive(client: paramiko.SSHClient) -> bool:
+        """Health check of a connection: the transport must be active and writable."""
+
+        transport = client.get_transport()
+
+        if transport is None or not transport.is_active():
+            return False
+
+        try:
+            transport.send_ignore()
+        except CONNECTION_ERRORS:
+            return False
+
+        return True
+
+    def evict_idle(self):
+        """
+        Close the connections not in use that haven't been used for `idle_timeout`
+        seconds.
+        """
+
+        now = time.monotonic()
+
+        with self.__lock:
+            expired = [
+                host
+                for host, connection in self.__clients.items()
+                if not connection.in_use
+                if now - connection.last_used > self.idle_timeout
+            ]
+
+            clients = [self.__clients.pop(host).client for host in expired]
+
+        for host, client in zip(expired, clients):
+            client.close()
+
+            logging.getLogger().info(
+                f"({self.username}) - Closed idle connection to {host}"
+            )
+
+    def close(self, target_host: str = None):
+        """Close the connection to `target_host`, or all the connections if None."""
+
+        with self.__lock:
+            if target_host is None:
+                clients = list(self.__clients.values())
+                self.__clients.clear()
+            elif target_host in self.__clients:
+                clients = [self.__clients.pop(target_host)]
+            else:
+                clients = []
+
+        for connection in clients:
+            connection.client.close()
+
+    def __len__(self):
+        """Return the number of open connections"""
+
+        return len(self.__clients)
+
+    def __lock_for(self, target_host: str) -> threading.Lock:
+        with self.__lock:
+            return self.__host_locks.setdefault(target_host, threading.Lock())
+
+    def __connect(self, target_host: str) -> paramiko.SSHClient:
+        """Open a new SSH connection to `target_host` through the bridge."""
+
+        channel = self.bridge_client.get_transport().open_channel(
+            "direct-tcpip",
+            (target_host, self.SSH_PORT),
+            ("127.0.0.1", 0),
+            timeout=self.CONNECT_TIMEOUT,
+        )
+
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy)
+
+        try:
+            client.connect(
+                target_host,
+                self.SSH_PORT,
+                self.username,
+                self.password,
+                sock=channel,
+                timeout=self.CONNECT_TIMEOUT,
+                banner_timeout=self.CONNECT_TIMEOUT,
+                auth_timeout=self.CONNECT_TIMEOUT,
+                allow_agent=False,
+                look_for_keys=False,
+            )
+        except Exception:
+            client.close()
+            raise
+
+        logging.getLogger().info(
+            f"({self.username}) - Opened connection to {target_host}"
+        )
+
+        return client
@@ -1,9 +1,33 @@
 import logging
+import posixpath
+import shlex
+import threading
+from typing import Iterator, Set, Tuple
 
 import paramiko
 from paramiko import ssh_exception
 
-from . import states
+from . import executors, states
+from .capture import STDERR, StreamCapture, capture_channel, iter_channel
+from .remote_connections import CONNECTION_ERRORS, RemoteConnections
+
+
+# Validates sudo with the password on the first line of stdin, consumed by `read`
+# so it never reaches the command (which runs with the cached credentials and reads
+# the rest of stdin)
+SUDO_FROM_STDIN = "IFS= read -r p; printf '%s\\n' \"$p\" | sudo -S -p '' -v && sudo -n "
+
+# Creates the private directory {0} (where the plugins are copied), and fails unless
+# it's a real directory owned by the user: on a shared tmp dir, anyone could have
+# created it before to plant the files that are later run (maybe with sudo)
+PRIVATE_DIR_CHECK = (
+    "mkdir -p -m 700 {0} && [ -d {0} ] && [ ! -L {0} ] && [ -O {0} ] && chmod 700 {0}"
+)
+
+
+# Exits with 0 if python3 >= 3.6 (needed by the fan-out helper and the status agent)
+# is installed
+PYTHON3_CHECK = "python3 -c 'import sys; sys.exit(sys.version_info < (3, 6))'"
 
 
 class Session:
@@ -18,6 +42,40 @@ class Session:
         self.is_allowed = False
         self.connected = False
         self.client: paramiko.SSHClient = None
+        self.remotes: RemoteConnections = None
+
+        # SFTP channel to the bridge, and files already present on it
+        self.__sftp: paramiko.SFTPClient = None
+        self.__sftp_lock = threading.Lock()
+        self.__bridge_files: Set[str] = set()
+
+        # If python3 has been found on the bridge
+        self.__python3 = False
+
+    @property
+    def executor(self) -> executors.BridgeExecutor:
+        """Executor shared by all the sessions connected to the same bridge computer"""
+
+        return executors.get_executor(
+            self.bridge_ip,
+            "/".join(self.route),
+            states.config_file.get_max_workers(self.route),
+        )
+
+    @property
+    def bridge_dir(self) -> str:
+        """Private directory of the user on the bridge computer"""
+
+        return self.__private_dir(states.config_file.bridge_tmp_dir)
+
+    @property
+    def remote_dir(self) -> str:
+        """Private directory of the user on the remote computers"""
+
+        return self.__private_dir(states.config_file.remote_tmp_dir)
+
+    def __private_dir(self, tmp_dir: str) -> str:
+        return posixpath.join(tmp_dir, f"cmsysbot-{self.username}")
 
     @staticmethod
     def get_from(user_data):
@@ -48,6 +106,13 @@ class Session:
                 look_for_keys=False,
             )
 
+            self.remotes = RemoteConnections(
+                self.client,
+                self.username,
+                self.password,
+                idle_timeout=states.config_file.remote_idle_timeout,
+            )
+
             self.connected = True
 
             logging.getLogger().info(
@@ -84,106 +149,267 @@ class Session:
         self.is_allowed = False
 
         self.connected = False
+
+        if self.remotes:
+            self.remotes.close()
+            self.remotes = None
+
+        with self.__sftp_lock:
+            if self.__sftp:
+                self.__sftp.close()
+                self.__sftp = None
+
+            self.__bridge_files.clear()
+
+        self.__python3 = False
+
         self.client.close()
 
     def __user_acl(self) -> bool:
         """
         Checks if the user has access to the current defined Section (using the
-        self.route attribute).
+        self.route attribute). See :obj:`Config.has_access`
+        """
+
+        return states.config_file.has_access(self.username, self.route)
+
+    def copy_to_bridge(self, source_path: str, bridge_path: str, permissions: int):
+        """
+        Copy a file to the bridge computer, unless it's already there.
 
         Note:
-            Access permissions propagate to subsections. That means that if you give
-            access to one user, you're also giving him access to all the subsections
-            below.
+            The `bridge_path` is expected to be content-addressed (it changes
+            whenever the content of the file changes) and inside :obj:`bridge_dir`,
+            so a file found on the destination path is never outdated nor placed
+            there by another user. The paths already present on the bridge are
+            remembered for the rest of the session, so they are only checked once.
         """
 
-        # Check first if the username is an admin
-        if self.username in states.config_file.admins:
-            return True
+        with self.__sftp_lock:
+            if bridge_path in self.__bridge_files:
+                return
 
-        # If no ACL is defined, all users have access to the section
-        no_acl_defined = True
+            bridge_dir = posixpath.dirname(bridge_path)
 
-        # Iterate through each Section and its parent, and check the ACL for each one
-        route = self.route[:]
-        while route:
-            section = states.config_file.get_section(route)
+            if bridge_dir not in self.__bridge_files:
+                self.__make_private_dir(self.client, self.bridge_ip, bridge_dir)
+                self.__bridge_files.add(bridge_dir)
 
-            if section.allowed_users:
-                no_acl_defined = False
+            sftp = self.__get_sftp()
 
-                if self.username in section.allowed_users:
-                    return True
+            try:
+                # Check if the file is already on the bridge computer
+                sftp.stat(bridge_path)
 
-            route.pop()
+                logging.getLogger().info(
+                    f"({self.username}) - Tried to copy the file {source_path} but is "
+                    f"already present on the destiny path ({bridge_path})"
+                )
 
-        # If any ACL was defined on this Section or its parents, this will be True.
-        # Otherwise, the user has no access, so it will return False.
-        return no_acl_defined
+            # Copy the file otherwise
+            except FileNotFoundError:
+                sftp.put(source_path, bridge_path, confirm=True)
+                sftp.chmod(bridge_path, permissions)
 
-    def copy_to_bridge(self, source_path: str, bridge_path: str, permissions: int):
+                logging.getLogger().info(
+                    f"({self.username}) - The file {source_path} has been copied to "
+                    f"{bridge_path}"
+                )
 
-        sftp = self.client.open_sftp()
+            self.__bridge_files.add(bridge_path)
 
-        try:
-            # Check if the file is already on the bridge computer
-            sftp.stat(bridge_path)
+    def __make_private_dir(
+        self, client: paramiko.SSHClient, target_ip: str, path: str
+    ):
+        """
+        Create the directory `path`, only accessible by the user. Throws
+        :obj:`PermissionError` if it already exists but it's not private.
+        """
 
-            logging.getLogger().info(
-                f"({self.username}) - Tried to copy the file {source_path} but is "
-                f"already present on the destiny path ({bridge_path})"
+        _, stdout, _ = client.exec_command(PRIVATE_DIR_CHECK.format(shlex.quote(path)))
+
+        if stdout.channel.recv_exit_status() != 0:
+            raise PermissionError(
+                f"{path} on {target_ip} is not a private directory of {self.username}"
             )
 
-        # Copy the file otherwise
-        except FileNotFoundError:
-            sftp.put(source_path, bridge_path, confirm=True)
-            sftp.chmod(bridge_path, permissions)
+    def has_python3(self) -> bool:
+        """
+        Test if the bridge computer has python3 >= 3.6, needed by the helpers that
+        run on the bridge (the fan-out and the status agent). Once found, it's not
+        checked again for the rest of the session.
+        """
+
+        if self.__python3:
+            return True
 
-            logging.getLogger().info(
-                f"({self.username}) - The file {source_path} has been copied to "
-                f"{bridge_path}"
+        try:
+            _, stdout, _ = self.client.exec_command(PYTHON3_CHECK)
+            self.__python3 = stdout.channel.recv_exit_status() == 0
+        except CONNECTION_ERRORS:
+            return False
+
+        if not self.__python3:
+            logging.getLogger().warning(
+                f"({self.username}) - python3 >= 3.6 not found on {self.bridge_ip}, "
+                "run the bridge initialization"
             )
 
-        sftp.close()
+        return self.__python3
+
+    def __get_sftp(self) -> paramiko.SFTPClient:
+        """Return the SFTP channel to the bridge, opening it the first time."""
+
+        if self.__sftp is None or self.__sftp.sock.closed:
+            self.__sftp = self.client.open_sftp()
 
-    def run_on_bridge(self, command: str, root: bool):
+        return self.__sftp
+
+    def run_on_bridge(self, command: str, root: bool, truncate: bool = True):
+        """
+        Run a command on the bridge computer, and return its stdout and stderr. If
+        not `truncate`, the whole stdout is returned (see :obj:`StreamCapture`).
+        """
 
         self.__log_command(self.bridge_ip, command, root)
 
         if root:
             command = f" echo {self.password} | sudo -kS {command}"
 
-        _, stdout, stderr = self.client.exec_command(command)
+        _, stdout, _ = self.client.exec_command(command)
 
-        return stdout.read().decode("utf-8"), stderr.read().decode("utf-8")
+        return self.__read_output(stdout.channel, truncate)
 
-    def copy_to_remote(self, target_host: str, source_path: str, remote_path: str):
+    def stream_on_bridge(self, command: str, data: str) -> Iterator[str]:
+        """
+        Run a command on the bridge computer writing `data` to its stdin, and yield
+        each line of its stdout as soon as it's received. Closing the generator
+        before the command finishes closes its channel.
+        """
 
-        scp_command = (
-            f" sshpass -p {self.password} scp {source_path}"
-            f" {target_host}:{remote_path}"
-        )
+        self.__log_command(self.bridge_ip, command, False)
+
+        stdin, stdout, _ = self.client.exec_command(command)
+
+        stdin.write(data)
+        stdin.flush()
+        stdin.channel.shutdown_write()
+
+        buffer = bytearray()
+
+        with StreamCapture(*self.__capture_sizes()) as stderr:
+            try:
+                for stream, chunk in iter_channel(stdout.channel):
+                    if stream == STDERR:
+                        stderr.write(chunk)
+                        continue
+
+                    # Only the new data is searched, so a long line is not scanned
+                    # again for every chunk
+                    start = len(buffer)
+                    buffer += chunk
+                    newline = buffer.find(b"\n", start)
 
-        _, stdout, _ = self.client.exec_command(scp_command)
+                    while newline != -1:
+                        yield buffer[:newline].decode("utf-8")
 
-        # Wait for command to finish
-        stdout.read()
+                        del buffer[: newline + 1]
+                        newline = buffer.find(b"\n")
+            finally:
+                stdout.channel.close()
 
-    def run_on_remote(self, target_host: str, command: str, root: bool):
+            if buffer:
+                yield buffer.decode("utf-8")
+
+            if stderr.size:
+                logging.getLogger().warning(
+                    f"({self.username}) - The command {command} on {self.bridge_ip} "
+                    f"wrote to stderr: {stderr.text()}"
+                )
+
+    def copy_to_remote(
+        self, target_host: str, source_path: str, remote_path: str, permissions: int
+    ):
+        """
+        Copy a file to a remote computer, unless it's already there. As with
+        :obj:`copy_to_bridge`, `remote_path` is expected to be content-addressed and
+        inside :obj:`remote_dir`.
+        """
+
+        with self.remotes.connection(target_host) as client:
+            # Checked every time, as the tmp dir is emptied when the computer reboots
+            self.__make_private_dir(
+                client, target_host, posixpath.dirname(remote_path)
+            )
+
+            sftp = client.open_sftp()
+
+            try:
+                sftp.stat(remote_path)
+            except FileNotFoundError:
+                sftp.put(source_path, remote_path, confirm=True)
+                sftp.chmod(remote_path, permissions)
+            finally:
+                sftp.close()
+
+    def run_on_remote(
+        self, target_host: str, command: str, root: bool, data: str = None
+    ):
+        """
+        Run a command on a remote computer. If `data` is passed, it's written to the
+        stdin of the command (for example, a script for ``bash -s``).
+        """
 
         self.__log_command(target_host, command, root)
 
-        if root:
+        if root and data is not None:
+            # The password is sent on the first line of stdin, so it never appears
+            # on the command line (see SUDO_FROM_STDIN)
+            command = SUDO_FROM_STDIN + command
+            data = f"{self.password}\n{data}"
+        elif root:
             command = f" echo {self.password} | sudo -kS {command}"
 
-        ssh_command = (
-            f" sshpass -p {self.password} ssh -o ConnectTimeout=3"
-            f" -o StrictHostKeyChecking=no {target_host} '{command}'"
+        try:
+            client = self.remotes.get(target_host)
+        except CONNECTION_ERRORS as e:
+            return "", f"Unable to connect: {e}"
+
+        # The connection may die (or refuse a new channel) after the health check
+        try:
+            stdin, stdout, _ = client.exec_command(command)
+
+            if data is not None:
+                stdin.write(data)
+                stdin.flush()
+                stdin.channel.shutdown_write()
+
+            return self.__read_output(stdout.channel)
+        except CONNECTION_ERRORS as e:
+            return "", f"Connection lost: {e}"
+        finally:
+            # Not closed for being idle while the command was running
+            self.remotes.release(target_host, client)
+
+    def __read_output(
+        self, channel: paramiko.Channel, truncate: bool = True
+    ) -> Tuple[str, str]:
+        """
+        Wait for the command on `channel` to finish, and return its stdout and
+        stderr. Only the end of very long outputs is returned, unless the stdout is
+        not `truncate` (see :obj:`StreamCapture`).
+        """
+
+        stdout, stderr = capture_channel(
+            channel, *self.__capture_sizes(), keep_all=not truncate
         )
 
-        _, stdout, stderr = self.client.exec_command(ssh_command)
+        with stdout, stderr:
+            return stdout.text(), stderr.text()
 
-        return stdout.read().decode("utf-8"), stderr.read().decode("utf-8")
+    @staticmethod
+    def __capture_sizes() -> Tuple[int, int]:
+        return states.config_file.output_spill_size, states.config_file.output_max_size
 
     def __log_command(self, target_ip: str, command: str, root: bool):
         msg = (
@@ -0,0 +1,260 @@
+"""
+SQLite storage for the computers of all the sections, used instead of the
+``config/<route>.json`` files when ``"storage": "sqlite"`` is set on the config.json.
+
+Besides the computers, the database keeps the history of the status changes found
+by the status poller, so questions like "which computers have been unreachable for
+3 days?" can be answered without loading every section.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from .computers_json import Computer, Computers
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS computers (
+    section TEXT NOT NULL,
+    mac TEXT NOT NULL,
+    name TEXT NOT NULL,
+    ip TEXT NOT NULL,
+    status TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (section, position)
+);
+CREATE INDEX IF NOT EXISTS computers_section_mac ON computers (section, mac);
+CREATE INDEX IF NOT EXISTS computers_mac ON computers (mac);
+CREATE INDEX IF NOT EXISTS computers_ip ON computers (ip);
+
+CREATE TABLE IF NOT EXISTS status_history (
+    section TEXT NOT NULL,
+    mac TEXT NOT NULL,
+    ip TEXT NOT NULL,
+    status TEXT NOT NULL,
+    time REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS status_history_host
+    ON status_history (section, mac, time);
+"""
+
+
+class Database:
+    """
+    Connection to the SQLite database, shared by all the threads of the bot (the
+    queries are serialized with a lock).
+
+    Note:
+        Sections are identified by their route joined with "/" (like the path of
+        their .json file, without the extension).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.executescript(SCHEMA)
+
+    def load(self, section: str) -> List[Dict[str, str]]:
+        """Return the computers of `section` as dicts, in their original order."""
+
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT name, ip, mac, status FROM computers "
+                "WHERE section = ? ORDER BY position",
+                (section,),
+            ).fetchall()
+
+        return [
+            {"name": name, "ip": ip, "mac": mac, "status": status}
+            for name, ip, mac, status in rows
+        ]
+
+    def has_section(self, section: str) -> bool:
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT 1 FROM computers WHERE section = ? LIMIT 1", (section,)
+            ).fetchone()
+
+        return row is not None
+
+    def save(self, section: str, computers: List[Dict[str, str]]):
+        """Replace the computers of `section`, in a single transaction."""
+
+        rows = [
+            (section, c["mac"], c["name"], c["ip"], c["status"], position)
+            for position, c in enumerate(computers)
+        ]
+
+        with self.__lock, self.__connection:
+            self.__connection.execute(
+                "DELETE FROM computers WHERE section = ?", (section,)
+            )
+            self.__connection.executemany(
+                "INSERT INTO computers "
+                "(section, mac, name, ip, status, position) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def append_history(self, section: str, computers: List[Computer]):
+        """Record the current status of `computers` on the history."""
+
+        now = time.time()
+        rows = [(section, c.mac, c.ip, c.status, now) for c in computers]
+
+        with self.__lock, self.__connection:
+            self.__connection.executemany(
+                "INSERT INTO status_history (section, mac, ip, status, time) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def start_history(self, section: str, computers: List[Computer]):
+        """
+        Record the current status of the `computers` that have nothing on the
+        history yet. Otherwise, a computer that never changes (like one that was
+        already unreachable when it was imported) would never be found by
+        :obj:`unreachable_for`.
+        """
+
+        now = time.time()
+        rows = [
+            (section, c.mac, c.ip, c.status, now, section, c.mac) for c in computers
+        ]
+
+        with self.__lock, self.__connection:
+            self.__connection.executemany(
+                "INSERT INTO status_history (section, mac, ip, status, time) "
+                "SELECT ?, ?, ?, ?, ? WHERE NOT EXISTS ("
+                "    SELECT 1 FROM status_history WHERE section = ? AND mac = ?"
+                ")",
+                rows,
+            )
+
+    def unreachable_for(self, seconds: float) -> List[Tuple[str, str, str, float]]:
+        """
+        Return the computers whose last recorded status is unreachable, and that
+        changed to it more than `seconds` ago, as tuples (section, mac, ip, since).
+        """
+
+        with self.__lock:
+            return self.__connection.execute(
+                "SELECT h.section, h.mac, h.ip, h.time FROM status_history h "
+                "WHERE h.status = ? AND h.time <= ? AND h.rowid = ("
+                "    SELECT rowid FROM status_history "
+                "    WHERE section = h.section AND mac = h.mac "
+                "    ORDER BY time DESC, rowid DESC LIMIT 1"
+                ") ORDER BY h.time, h.rowid",
+                (Computer.Status.OFF, time.time() - seconds),
+            ).fetchall()
+
+    def import_json_tree(self, config) -> List[str]:
+        """
+        Import the computers from the .json file of each section defined on `config`
+        (a :obj:`cmsysbot.utils.Config`). Sections already on the database are
+        skipped, so it's safe to call it on every start. Returns the imported
+        sections.
+        """
+
+        return [
+            "/".join(route)
+            for route in _leaf_routes(config)
+            if self.import_json(config, "/".join(route))
+        ]
+
+    def import_json(self, config, section: str) -> bool:
+        """
+        Import the computers of `section` from its .json file, if the section is
+        not on the database yet and the file exists. Returns if it was imported.
+        """
+
+        filepath = config.root_folder + section + ".json"
+
+        if self.has_section(section) or not os.path.exists(filepath):
+            return False
+
+        with open(filepath) as json_file:
+            computers = [
+                Computer(entry).asdict() for entry in json.load(json_file)["computers"]
+            ]
+
+        self.save(section, computers)
+
+        return True
+
+    def close(self):
+        with self.__lock:
+            self.__connection.close()
+
+
+def _leaf_routes(config, route: List[str] = None):
+    """Yield the route of each section without subsections."""
+
+    route = route or []
+
+    for section in config.get_sections(route):
+        if section.has_subsections():
+            yield from _leaf_routes(config, route + [section.name])
+        else:
+            yield route + [section.name]
+
+
+class SqliteComputers(Computers):
+    """
+    :obj:`Computers` of a section stored on a :obj:`Database`. The status of the
+    computers when they are first loaded, and every status change found by
+    :obj:`apply_status`, are appended to the status history.
+    """
+
+    def __init__(self, database: Database, section: str):
+        self.database = database
+        self.section = section
+
+        super().__init__(f"{database.path}#{section}")
+
+        # The status they are loaded with is the first one on the history
+        database.start_history(section, self.computers)
+
+    def load(self, filepath: str):
+        self.data = {"computers": self.database.load(self.section)}
+
+    def is_outdated(self) -> bool:
+        # Only the bot writes to the database
+        return False
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+
+            self.database.save(self.section, [c.asdict() for c in self.computers])
+            self.dirty = False
+
+    def apply_status(self, statuses: Dict[str, str]) -> List[Computer]:
+        with self.lock:
+            changed = super().apply_status(statuses)
+
+            if changed:
+                self.database.append_history(self.section, changed)
+
+        return changed
+
+
+# path -> database
+_databases: Dict[str, Database] = {}
+_lock = threading.Lock()
+
+
+def get_database(path: str) -> Database:
+    """Return the database on `path`, shared by all the sections."""
+
+    with _lock:
+        if path not in _databases:
+            _databases[path] = Database(path)
+
+        return _databases[path]
@@ -2,13 +2,17 @@ config_file = None
 
 
 class State:
+    # Actions routed by the callback router (see :mod:`cmsysbot.utils.callback`)
     MAIN = "main"
     CONNECT = "connect"
-    CONFIRM_CONNECT = r"^[\d*\.*]*$"  # TODO: Make a better regex
-    GET_CREDENTIALS = "get-credentials"
+    SECTION = "sec"
+    CONFIRM_CONNECT = "ip"
     DISCONNECT = "disconnect"
     FILTER_COMPUTERS = "filter-computers"
-    INCLUDE_COMPUTERS = "include-(.*)"
-    EXCLUDE_COMPUTERS = "exclude-(.*)"
+    INCLUDE_COMPUTERS = "inc"
+    EXCLUDE_COMPUTERS = "exc"
     UPDATE_IPS = "update-ips"
+
+    # Entry points of the conversations
+    GET_CREDENTIALS = "get-credentials"
     START_PLUGIN = "plugin-(.*)"
@@ -9,6 +9,8 @@ from typing import List
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Message, ParseMode
 from telegram.ext import Updater
 
+from .outbox import PendingMessage, outbox
+
 
 def Button(text: str, callback_data: str = None) -> InlineKeyboardButton:
     """
@@ -68,28 +70,52 @@ class Keyboard:
         self.main_buttons = main_buttons
         self.footer_buttons = footer_buttons
 
-    def reply(self, update: Updater, parse_mode: ParseMode = ParseMode.HTML):
+    def reply(
+        self,
+        update: Updater,
+        parse_mode: ParseMode = ParseMode.HTML,
+        mergeable: bool = True,
+    ) -> PendingMessage:
         """
         Reply to the message attached to the :obj:`update`, constructing a new
         message with the defined text and buttons. Uses :obj:`_get_message` for
         extracting the message from the :obj:`update`.
 
+        Note:
+            The message is queued on the :obj:`cmsysbot.view.outbox.Outbox`, so
+            this function returns without waiting for it to be sent.
+
         Args:
             update (:obj:`telegram.ext.update.Updater`): The Updater associated
                 to the bot.
+            mergeable (:obj:`bool`): If the message can be merged with other
+                messages to the same chat. Must be False if the message will be
+                edited later.
+
+        Returns:
+            :obj:`cmsysbot.view.outbox.PendingMessage`: The last message queued,
+            which can be edited later with :obj:`edit`.
         """
 
+        message = self.__get_message(update)
+
         # 4096 is the max allowed length for a telegram message
         # https://core.telegram.org/method/messages.sendMessage
         wrapper = textwrap.TextWrapper(width=4096, replace_whitespace=False)
 
+        pending = None
         for text_chunk in wrapper.wrap(self.text):
-            self.__get_message(update).reply_text(
-                text=text_chunk,
-                reply_markup=self.__generate_keyboard(),
+            pending = outbox.send_text(
+                message.bot,
+                message.chat_id,
+                text_chunk,
                 parse_mode=parse_mode,
+                reply_markup=self.__generate_keyboard(),
+                mergeable=mergeable,
             )
 
+        return pending
+
     def edit(self, update: Updater, parse_mode: ParseMode = ParseMode.HTML):
         """
         Edit the message attached to the :obj:`update`, replacing it with the
@@ -98,13 +124,30 @@ class Keyboard:
 
         Args:
             update (:obj:`telegram.ext.update.Updater`): The Updater associated
-                to the bot.
+                to the bot, or directly the message to edit (for example, the
+                :obj:`cmsysbot.view.outbox.PendingMessage` returned by
+                :obj:`reply`).
         """
 
-        self.__get_message(update).edit_text(
-            text=self.text,
-            reply_markup=self.__generate_keyboard(),
-            parse_mode=parse_mode,
+        reply_markup = self.__generate_keyboard()
+
+        if isinstance(update, PendingMessage):
+            # The message is sent before the edit, as both are on the same chat
+            def request():
+                return update.result().edit_text(
+                    text=self.text, reply_markup=reply_markup, parse_mode=parse_mode
+                )
+
+            outbox.send(update.chat_id, request)
+            return
+
+        message = self.__get_message(update)
+
+        outbox.send(
+            message.chat_id,
+            lambda: message.edit_text(
+                text=self.text, reply_markup=reply_markup, parse_mode=parse_mode
+            ),
         )
 
     @staticmethod
@@ -112,7 +155,8 @@ class Keyboard:
         """
         Get the attached message to 'update' or 'update.callback_query'. Useful
         when a function can be called from both :obj:`telegram.CommandHandler`
-        and :obj:`telegram.CallbackQueryHandler`
+        and :obj:`telegram.CallbackQueryHandler`. If 'update' is already a
+        message, it's returned as is.
 
         Args:
             update (:obj:`telegram.ext.update.Updater`): The Updater associated
@@ -122,6 +166,9 @@ class Keyboard:
             :obj:`telegram.Message`: The last message attached to the Updater
         """
 
+        if isinstance(update, Message):
+            return update
+
         if update.message:
             return update.message
 
@@ -133,10 +180,15 @@ class Keyboard:
 
         Returns:
             A :obj:`telegram.InlineKeyboardMarkup` object representing the
-                constructed button keyboard.
+                constructed button keyboard, or None if there are no buttons.
         """
 
-        return InlineKeyboardMarkup(self.__build_menu())
+        menu = self.__build_menu()
+
+        if not menu:
+            return None
+
+        return InlineKeyboardMarkup(menu)
 
     def __build_menu(self) -> List[InlineKeyboardButton]:
         """
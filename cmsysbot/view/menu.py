@@ -8,7 +8,7 @@ from typing import Dict, List
 
 from emoji import emojize
 
-from cmsysbot.utils import Computer, Session, State
+from cmsysbot.utils import Computer, Session, State, callback
 
 from .keyboard import Button, Keyboard
 
@@ -30,7 +30,7 @@ def not_connected() -> Keyboard:
     text = "Status: Not Connected"
 
     # Buttons
-    main_buttons = [Button("Connect", State.CONNECT)]
+    main_buttons = [Button("Connect", callback.encode(State.CONNECT))]
 
     # Keyboard
     return Keyboard(text, main_buttons=main_buttons)
@@ -77,13 +77,13 @@ def connected(session: Session, plugins: Dict[str, str]) -> Keyboard:
 
     # Buttons
     main_buttons = [
-        Button("Update ips", State.UPDATE_IPS),
-        Button("Filter computers", State.FILTER_COMPUTERS),
+        Button("Update ips", callback.encode(State.UPDATE_IPS)),
+        Button("Filter computers", callback.encode(State.FILTER_COMPUTERS)),
     ]
 
     main_buttons.extend([Button(value, key) for key, value in plugins.items()])
 
-    footer_buttons = [Button("Disconnect", State.DISCONNECT)]
+    footer_buttons = [Button("Disconnect", callback.encode(State.DISCONNECT))]
 
     # Keyboard
     return Keyboard(
@@ -107,7 +107,7 @@ def structure(route: List[str], sections: List[str], return_to: str) -> Keyboard
 
     Args:
         route (:obj:`List[str]`): Selected path (structure/substructure/...)
-        sections (:obj:`List[Computer]`): List of the sections for the current
+        sections (:obj:`List[Section]`): List of the sections for the current
             route
         return_to (:obj:`str`): Callback data value for the return button
 
@@ -120,7 +120,10 @@ def structure(route: List[str], sections: List[str], return_to: str) -> Keyboard
     text += f"Route: {'/'.join(route)}"
 
     # Buttons
-    main_buttons = [Button(section.name) for section in sections]
+    main_buttons = [
+        Button(section.name, callback.encode(State.SECTION, section.id, compact=False))
+        for section in sections
+    ]
     footer_buttons = [Button("Return", return_to)]
 
     # Keyboard
@@ -163,7 +166,10 @@ def ip_selection(
     text += "\nNow, select a 'bridge' computer for the local connection"
 
     # Buttons
-    main_buttons = [Button(str(computer), computer.ip) for computer in computers]
+    main_buttons = [
+        Button(str(computer), callback.encode(State.CONFIRM_CONNECT, computer.ip))
+        for computer in computers
+    ]
     footer_buttons = [Button("Return", return_to)]
 
     # Keyboard
@@ -232,8 +238,8 @@ def filter_computers(computers: List[Computer]):
 
     # Buttons
     main_buttons = [
-        Button("Include All", "include-all"),
-        Button("Exclude All", "exclude-all"),
+        Button("Include All", callback.encode(State.INCLUDE_COMPUTERS, "all")),
+        Button("Exclude All", callback.encode(State.EXCLUDE_COMPUTERS, "all")),
     ]
 
     # Add the buttons according to the computer attributes
@@ -245,10 +251,10 @@ def filter_computers(computers: List[Computer]):
         # Add included/excluded status
         if computer.included:
             button_text += ":white_check_mark:"
-            callback_text = f"exclude-{computer.mac}"
+            callback_text = callback.encode(State.EXCLUDE_COMPUTERS, computer.mac)
         else:
             button_text += ":x:"
-            callback_text = f"include-{computer.mac}"
+            callback_text = callback.encode(State.INCLUDE_COMPUTERS, computer.mac)
 
         button_text += " "
 
@@ -264,7 +270,7 @@ def filter_computers(computers: List[Computer]):
 
         main_buttons.append(Button(button_text, callback_text))
 
-    footer_buttons = [Button("Return", State.MAIN)]
+    footer_buttons = [Button("Return", callback.encode(State.MAIN))]
 
     # Keyboard
     return Keyboard(text, main_buttons=main_buttons, footer_buttons=footer_buttons)
@@ -3,8 +3,10 @@ In this module are defined all the messages (without keyboard) returned by the
 bot.
 """
 
-import re
+from typing import List, Tuple
 
+from cmsysbot.system import PluginProgress, ResultGroup, StatusChanges
+from cmsysbot.system.plugin import clean_stderr
 from cmsysbot.utils import Computer, Session
 
 from .keyboard import Keyboard
@@ -68,18 +70,58 @@ def disconnect_output(bridge_ip: str) -> Keyboard:
     return Keyboard(text)
 
 
-def update_ip_output(computer: Computer, last_ip: str) -> Keyboard:
+def update_ips_output(updated: List[Tuple[Computer, str]]) -> Keyboard:
     """
     .. code-block:: python
 
         # Computer [name]: [last_ip] -> [new_ip]
+        # Computer [name]: [last_ip] -> [new_ip]
+        # ...
+
+    Args:
+        updated (:obj:`List[Tuple[Computer, str]]`): The updated computers, with
+            their last ip (as returned by :obj:`Computers.update_ips`).
 
     Returns:
         :obj:`cmsysbot.view.keyboard.Keyboard`
     """
 
     # Text
-    text = f"Computer {computer.name}: {last_ip} --> {computer.ip}"
+    if updated:
+        text = "\n".join(
+            f"Computer {computer.name}: {last_ip} --> {computer.ip}"
+            for computer, last_ip in updated
+        )
+    else:
+        text = "The ips of the computers haven't changed"
+
+    # Keyboard
+    return Keyboard(text)
+
+
+def status_changes_output(changes: StatusChanges) -> Keyboard:
+    """
+    .. code-block:: python
+
+        # Computers turned on:
+        # [name] ([ip])
+        # Computers turned off:
+        # [name] ([ip])
+
+    Returns:
+        :obj:`cmsysbot.view.keyboard.Keyboard`
+    """
+
+    # Text
+    text = ""
+
+    if changes.up:
+        text += "<b>Computers turned on:</b>\n"
+        text += "".join(f"{c.name} ({c.ip})\n" for c in changes.up)
+
+    if changes.down:
+        text += "<b>Computers turned off:</b>\n"
+        text += "".join(f"{c.name} ({c.ip})\n" for c in changes.down)
 
     # Keyboard
     return Keyboard(text)
@@ -90,6 +132,23 @@ def update_ip_output(computer: Computer, last_ip: str) -> Keyboard:
 # ######################################################################
 
 
+def button_expired() -> Keyboard:
+    """
+    .. code-block:: python
+
+        # This button has expired. Please use the new menu
+
+    Returns:
+        :obj:`cmsysbot.view.keyboard.Keyboard`
+    """
+
+    # Text
+    text = "This button has expired. Please use the new menu"
+
+    # Keyboard
+    return Keyboard(text)
+
+
 def login_start() -> Keyboard:
     """
     .. code-block:: python
@@ -188,6 +247,38 @@ def ask_argument(argument_text: str) -> Keyboard:
     return Keyboard(text)
 
 
+def plugin_progress(plugin_name: str, progress: PluginProgress) -> Keyboard:
+    """
+    .. code-block:: python
+
+        # -- [Executing [plugin-name]] --
+        # Done: [done]/[total]. Failed: [failed]. Running: [running]
+        #
+        # Slowest computers:        {Shown only while there are running computers}
+        #  - [name] ([ip]): [elapsed]s
+
+    Returns:
+        :obj:`cmsysbot.view.keyboard.Keyboard`
+    """
+
+    # Text
+    text = f"-- [{'Executed' if progress.finished else 'Executing'} {plugin_name}] --\n"
+    text += (
+        f"Done: {progress.done + progress.failed}/{progress.total}. "
+        f"Failed: {progress.failed}. Running: {progress.running}"
+    )
+
+    slowest = progress.slowest()
+    if slowest:
+        text += "\n\nSlowest computers:"
+
+        for label, elapsed in slowest:
+            text += f"\n - {label}: {int(elapsed)}s"
+
+    # Keyboard
+    return Keyboard(text)
+
+
 def plugin_output(
     name: str, ip: str, plugin_name: str, stdout: str, stderr: str, hide_header=False
 ) -> Keyboard:
@@ -209,7 +300,7 @@ def plugin_output(
     text = ""
 
     # Remove "[sudo] password for X:" prompt"
-    stderr = re.sub(r"\[sudo\].*?:", "", stderr).strip()
+    stderr = clean_stderr(stderr)
 
     # Show error output
     if stderr:
@@ -229,3 +320,45 @@ def plugin_output(
 
     # Keyboard
     return Keyboard(text)
+
+
+def plugin_group_output(plugin_name: str, group: ResultGroup) -> Keyboard:
+    """
+    .. code-block:: python
+
+        # [[plugin-name] - [n] computer(s)]
+        # [name] ([ip]), [name] ([ip]), ...
+        #
+        # -> [Error]: stderr     {Doesn't show if stderr is empty}
+        # stdout
+        #
+        #   or
+        #
+        # -> No output          {Shown only if stderr and stdout are emtpy
+
+    Returns:
+        :obj:`cmsysbot.view.keyboard.Keyboard`
+    """
+
+    # Text
+    text = ""
+
+    # Show error output
+    if group.stderr:
+        text += f"-> [Error]: {group.stderr}\n"
+
+    # Show standard output
+    if group.stdout:
+        text += group.stdout
+
+    # Can't send an empty message in telegram, so send '-> No output' instead
+    if not text:
+        text = "-> No output"
+
+    header_text = (
+        f"[{plugin_name} - {len(group)} computer{'s' if len(group) > 1 else ''}]\n"
+        f"{', '.join(group.computers)}\n\n"
+    )
+
+    # Keyboard
+    return Keyboard(header_text + text)
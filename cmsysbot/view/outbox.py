@@ -0,0 +1,231 @@
+"""
+Module with the scheduler of all the messages sent by the bot, so the handlers
+don't have to wait for the Telegram API, and the Telegram flood limits are never
+exceeded.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent import futures
+from typing import Any, Callable, Deque, Dict, List
+
+from telegram import Bot, InlineKeyboardMarkup
+from telegram.error import RetryAfter
+
+
+class PendingMessage(futures.Future):
+    """
+    :obj:`concurrent.futures.Future` returned for each request added to the
+    :obj:`Outbox`. Its result is the value returned by the Telegram API (usually,
+    the sent :obj:`telegram.Message`).
+
+    Attributes:
+        chat_id (:obj:`int`): Chat where the request is sent.
+    """
+
+    def __init__(self, chat_id: int):
+        super().__init__()
+        self.chat_id = chat_id
+
+
+class Outgoing:
+    """
+    A request waiting to be sent. Plain text messages without keyboard
+    (:obj:`text` is not None) can be merged with the next ones on the same chat.
+    """
+
+    def __init__(
+        self,
+        chat_id: int,
+        request: Callable[[], Any],
+        bot: Bot = None,
+        text: str = None,
+        parse_mode: str = None,
+    ):
+        self.request = request
+        self.future = PendingMessage(chat_id)
+
+        self.bot = bot
+        self.text = text
+        self.parse_mode = parse_mode
+
+    def can_merge(self, other: "Outgoing", length: int) -> bool:
+        """Test if `other` can be appended to a message of `length` characters."""
+
+        if self.text is None or other.text is None:
+            return False
+
+        if self.bot is not other.bot or self.parse_mode != other.parse_mode:
+            return False
+
+        return length + len(Outbox.SEPARATOR) + len(other.text) <= Outbox.MAX_LENGTH
+
+
+class Outbox:
+    """
+    Queue of requests to the Telegram API, sent by a background thread.
+
+    Note:
+        - Requests to the same chat are sent in order, at most one every
+          :obj:`chat_interval` seconds.
+        - At most :obj:`global_rate` requests per second are sent between all
+          the chats.
+        - Consecutive text messages without keyboard to the same chat are merged
+          on a single message (up to 4096 characters).
+        - If Telegram answers with :obj:`telegram.error.RetryAfter`, the request is
+          sent again after the requested time.
+    """
+
+    MAX_LENGTH = 4096
+    SEPARATOR = "\n\n"
+
+    def __init__(self, global_rate: int = 30, chat_interval: float = 1):
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+
+        self.__queues: Dict[int, Deque[Outgoing]] = {}
+        self.__ready_at: Dict[int, float] = {}
+        self.__sent_times: Deque[float] = deque()
+
+        self.__condition = threading.Condition()
+        self.__thread: threading.Thread = None
+
+    def send_text(
+        self,
+        bot: Bot,
+        chat_id: int,
+        text: str,
+        parse_mode: str = None,
+        reply_markup: InlineKeyboardMarkup = None,
+        mergeable: bool = True,
+    ) -> PendingMessage:
+        """
+        Queue a new text message. Returns without waiting for it to be sent. Use
+        `mergeable=False` for messages that will be edited later, so they are never
+        merged with other messages.
+        """
+
+        def request():
+            return bot.send_message(
+                chat_id=chat_id,
+                text=text,
+                parse_mode=parse_mode,
+                reply_markup=reply_markup,
+            )
+
+        # Only messages without keyboard can be merged
+        if reply_markup is not None or not mergeable:
+            return self.__put(Outgoing(chat_id, request))
+
+        return self.__put(Outgoing(chat_id, request, bot, text, parse_mode))
+
+    def send(self, chat_id: int, request: Callable[[], Any]) -> PendingMessage:
+        """
+        Queue any other request to the chat (edits, files...). `request` is called
+        from the outbox thread when the request is sent.
+        """
+
+        return self.__put(Outgoing(chat_id, request))
+
+    def __put(self, outgoing: Outgoing) -> PendingMessage:
+        chat_id = outgoing.future.chat_id
+
+        with self.__condition:
+            self.__queues.setdefault(chat_id, deque()).append(outgoing)
+            self.__ready_at.setdefault(chat_id, 0)
+
+            if self.__thread is None:
+                self.__thread = threading.Thread(
+                    target=self.__run, name="outbox", daemon=True
+                )
+                self.__thread.start()
+
+            self.__condition.notify()
+
+        return outgoing.future
+
+    def __run(self):
+        while True:
+            chat_id, batch = self.__next_batch()
+            self.__deliver(chat_id, batch)
+
+    def __next_batch(self):
+        """Wait until a chat can receive a message, and take its next requests."""
+
+        with self.__condition:
+            while True:
+                now = time.monotonic()
+
+                # Forget the requests sent more than a second ago
+                while self.__sent_times and now - self.__sent_times[0] >= 1:
+                    self.__sent_times.popleft()
+
+                chats = [chat_id for chat_id, queue in self.__queues.items() if queue]
+
+                if not chats:
+                    self.__condition.wait()
+                    continue
+
+                chat_id = min(chats, key=lambda c: self.__ready_at[c])
+
+                wait = self.__ready_at[chat_id] - now
+                if len(self.__sent_times) >= self.global_rate:
+                    wait = max(wait, self.__sent_times[0] + 1 - now)
+
+                if wait > 0:
+                    self.__condition.wait(wait)
+                    continue
+
+                queue = self.__queues[chat_id]
+                batch = [queue.popleft()]
+
+                length = len(batch[0].text or "")
+                while queue and batch[0].can_merge(queue[0], length):
+                    length += len(Outbox.SEPARATOR) + len(queue[0].text)
+                    batch.append(queue.popleft())
+
+                self.__sent_times.append(now)
+                self.__ready_at[chat_id] = now + self.chat_interval
+
+                return chat_id, batch
+
+    def __deliver(self, chat_id: int, batch: List[Outgoing]):
+        first = batch[0]
+
+        try:
+            if len(batch) == 1:
+                result = first.request()
+            else:
+                result = first.bot.send_message(
+                    chat_id=chat_id,
+                    text=Outbox.SEPARATOR.join(o.text for o in batch),
+                    parse_mode=first.parse_mode,
+                )
+
+        except RetryAfter as e:
+            # Put the requests back on the queue, and wait the requested time
+            with self.__condition:
+                self.__queues[chat_id].extendleft(reversed(batch))
+                self.__ready_at[chat_id] = time.monotonic() + e.retry_after
+                self.__condition.notify()
+
+            logging.getLogger().warning(
+                f"Flood limit reached on chat {chat_id}. Retrying in "
+                f"{e.retry_after} seconds"
+            )
+
+        except Exception as e:
+            logging.getLogger().warning(f"Unable to send a message to {chat_id}: {e}")
+
+            for outgoing in batch:
+                outgoing.future.set_exception(e)
+
+        else:
+            for outgoing in batch:
+                outgoing.future.set_result(result)
+
+
+# Outbox shared by all the handlers
+outbox = Outbox()
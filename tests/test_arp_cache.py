@@ -0,0 +1,69 @@
+import unittest
+
+from cmsysbot.utils import arp_cache
+from cmsysbot.utils.arp_cache import ArpCache, parse_arp_scan
+
+
+class TestArpCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = ArpCache(ttl=60)
+
+    def tearDown(self):
+        arp_cache._caches.clear()
+
+    def test_parse_arp_scan(self):
+        stdout = "10.0.0.1\tAA:BB:CC:DD:EE:01\n10.0.0.2\taa:bb:cc:dd:ee:02\n\n"
+
+        assert parse_arp_scan(stdout) == {
+            "aa:bb:cc:dd:ee:01": "10.0.0.1",
+            "aa:bb:cc:dd:ee:02": "10.0.0.2",
+        }
+
+    def test_scan_only_on_misses(self):
+        assert self.cache.needs_scan(["AA:BB:CC:DD:EE:01"], now=0)
+
+        self.cache.update(
+            {"aa:bb:cc:dd:ee:01": "10.0.0.1"},
+            ["AA:BB:CC:DD:EE:01", "aa:bb:cc:dd:ee:02"],
+            now=0,
+        )
+
+        # Repeated presses don't scan again for the computers not found...
+        assert not self.cache.needs_scan(
+            ["AA:BB:CC:DD:EE:01", "aa:bb:cc:dd:ee:02"], now=10
+        )
+        assert self.cache.lookup(["AA:BB:CC:DD:EE:01", "aa:bb:cc:dd:ee:02"]) == {
+            "aa:bb:cc:dd:ee:01": "10.0.0.1"
+        }
+
+        # ...but only for a short time, as they may have been turned on
+        assert self.cache.needs_scan(["aa:bb:cc:dd:ee:02"], now=15)
+        assert not self.cache.needs_scan(["aa:bb:cc:dd:ee:01"], now=30)
+
+        # Unknown MAC
+        assert self.cache.needs_scan(["aa:bb:cc:dd:ee:03"], now=10)
+
+    def test_expired(self):
+        self.cache.update({"aa:bb:cc:dd:ee:01": "10.0.0.1"}, [], now=0)
+
+        assert not self.cache.needs_scan(["aa:bb:cc:dd:ee:01"], now=59)
+        assert self.cache.needs_scan(["aa:bb:cc:dd:ee:01"], now=60)
+
+    def test_rescan_replaces_mappings(self):
+        self.cache.update({"aa:bb:cc:dd:ee:01": "10.0.0.1"}, [], now=0)
+        self.cache.update(
+            {"aa:bb:cc:dd:ee:01": "10.0.0.9"}, ["aa:bb:cc:dd:ee:01"], now=60
+        )
+
+        assert self.cache.lookup(["aa:bb:cc:dd:ee:01"]) == {
+            "aa:bb:cc:dd:ee:01": "10.0.0.9"
+        }
+        assert len(self.cache) == 1
+
+    def test_get_cache(self):
+        cache = arp_cache.get_cache("10.0.0.1", 60)
+
+        assert arp_cache.get_cache("10.0.0.1", 120, 5) is cache
+        assert cache.ttl == 120
+        assert cache.miss_ttl == 5
+        assert arp_cache.get_cache("10.0.0.2", 60) is not cache
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+from os import path
+from unittest.mock import patch
+
+from cmsysbot.utils.base_json import BaseJson
+
+
+class TestBaseJson(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.filepath = path.join(self.test_dir, "file.json")
+
+        with open(self.filepath, "w") as json_file:
+            json.dump({"key": "value"}, json_file)
+
+        self.json = BaseJson(self.filepath)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def read(self):
+        with open(self.filepath) as json_file:
+            return json.load(json_file)
+
+    @patch("os.replace")
+    def test_unchanged_not_written(self, replace_mock):
+        self.json.save()
+
+        replace_mock.assert_not_called()
+
+        self.json.data["key"] = "new value"
+        self.json.save()
+        self.json.save()
+
+        replace_mock.assert_called_once()
+
+    def test_atomic_save(self):
+        self.json.data["key"] = "new value"
+
+        with patch("os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                self.json.save()
+
+        assert self.read() == {"key": "value"}
+        assert os.listdir(self.test_dir) == ["file.json"]
+
+        self.json.save()
+
+        assert self.read() == {"key": "new value"}
+        assert self.json.mtime == os.stat(self.filepath).st_mtime_ns
+
+    def test_save_keeps_mode(self):
+        os.chmod(self.filepath, 0o640)
+
+        self.json.data["key"] = "new value"
+        self.json.save()
+
+        assert stat.S_IMODE(os.stat(self.filepath).st_mode) == 0o640
+
+    def test_save_keeps_symlink(self):
+        link = path.join(self.test_dir, "link.json")
+        os.symlink(self.filepath, link)
+
+        linked = BaseJson(link)
+        linked.data["key"] = "new value"
+        linked.save()
+
+        assert path.islink(link)
+        assert BaseJson(self.filepath).data["key"] == "new value"
+
+    def test_save_later(self):
+        self.json.data["key"] = "first"
+        self.json.save_later(60)
+
+        self.json.data["key"] = "second"
+        self.json.save_later(60)
+
+        assert self.read() == {"key": "value"}
+
+        with patch("os.replace", wraps=os.replace) as replace_mock:
+            self.json.flush()
+
+            replace_mock.assert_called_once()
+
+        assert self.read() == {"key": "second"}
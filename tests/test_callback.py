@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import MagicMock
+
+from cmsysbot.utils import State, callback
+from cmsysbot.utils.callback import TokenTable
+
+
+class TestCallback(unittest.TestCase):
+    def test_encode_decode(self):
+        mac = "aa:bb:cc:dd:ee:ff"
+        data = callback.encode(State.INCLUDE_COMPUTERS, mac)
+
+        assert data.startswith("inc:~")
+        assert len(data) < len(f"inc:{mac}")
+        assert callback.decode(data) == ("inc", mac)
+
+        # The same payload gets the same token
+        assert callback.encode(State.INCLUDE_COMPUTERS, mac) == data
+
+    def test_not_compact(self):
+        data = callback.encode(State.SECTION, "0123456789", compact=False)
+
+        assert data == "sec:0123456789"
+        assert callback.decode(data) == ("sec", "0123456789")
+
+    def test_no_payload(self):
+        data = callback.encode(State.MAIN)
+
+        assert data == "main:"
+        assert callback.decode(data) == ("main", "")
+
+    def test_expired(self):
+        assert callback.decode("ip:~expired") == ("ip", None)
+
+    def test_long_payload(self):
+        name = "Edificio de Servicios al Alumnado de Anchieta" * 3
+        data = callback.encode(State.CONFIRM_CONNECT, name)
+
+        assert len(data.encode("utf-8")) <= 64
+
+    def test_get_payload(self):
+        update = MagicMock()
+        update.callback_query.data = callback.encode(State.CONFIRM_CONNECT, "1.2.3.4")
+
+        assert callback.get_payload(update) == "1.2.3.4"
+
+
+class TestTokenTable(unittest.TestCase):
+    def test_lru(self):
+        table = TokenTable(max_size=2)
+
+        token1 = table.put("payload1")
+        token2 = table.put("payload2")
+
+        # Using the first token makes the second one the least recently used
+        assert table.get(token1) == "payload1"
+
+        table.put("payload3")
+
+        assert len(table) == 2
+        assert table.get(token1) == "payload1"
+        assert table.get(token2) is None
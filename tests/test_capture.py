@@ -0,0 +1,92 @@
+import unittest
+
+from cmsysbot.utils.capture import (
+    STDERR,
+    STDOUT,
+    StreamCapture,
+    capture_channel,
+    iter_channel,
+)
+
+
+class FakeChannel:
+    """Channel that returns the queued chunks and then finishes"""
+
+    def __init__(self, stdout_chunks, stderr_chunks):
+        self.stdout_chunks = list(stdout_chunks)
+        self.stderr_chunks = list(stderr_chunks)
+
+    def exit_status_ready(self):
+        return not self.stdout_chunks and not self.stderr_chunks
+
+    def recv_ready(self):
+        return bool(self.stdout_chunks)
+
+    def recv_stderr_ready(self):
+        return bool(self.stderr_chunks)
+
+    def recv(self, _):
+        return self.stdout_chunks.pop(0) if self.stdout_chunks else b""
+
+    def recv_stderr(self, _):
+        return self.stderr_chunks.pop(0) if self.stderr_chunks else b""
+
+
+class TestStreamCapture(unittest.TestCase):
+    def test_small_output(self):
+        with StreamCapture(spill_size=16, max_size=16) as capture:
+            capture.write(b"hello ")
+            capture.write(b"world")
+
+            assert capture.text() == "hello world"
+            assert not capture.truncated
+
+    def test_truncate_long_output(self):
+        """Only the end of the output should be returned as text"""
+
+        with StreamCapture(spill_size=8, max_size=4) as capture:
+            capture.write(b"0123456789")
+
+            assert capture.truncated
+            assert capture.text() == "[... 6 bytes omitted ...]\n6789"
+
+    def test_keep_all(self):
+        """The whole output should be returned, spilled to disk if needed"""
+
+        with StreamCapture(spill_size=8, max_size=4, keep_all=True) as capture:
+            capture.write(b"0123456789")
+
+            assert not capture.truncated
+            assert capture.text() == "0123456789"
+            assert b"".join(capture.chunks()) == b"0123456789"
+
+
+class TestIterChannel(unittest.TestCase):
+    def test_interleave_streams(self):
+        """Both streams should be drained while the command is running"""
+
+        channel = FakeChannel([b"out1", b"out2"], [b"err1", b"err2"])
+
+        assert list(iter_channel(channel)) == [
+            (STDOUT, b"out1"),
+            (STDERR, b"err1"),
+            (STDOUT, b"out2"),
+            (STDERR, b"err2"),
+        ]
+
+    def test_capture_channel(self):
+        channel = FakeChannel([b"a" * 10, b"b" * 10], [b"error"])
+
+        stdout, stderr = capture_channel(channel, spill_size=8, max_size=15)
+
+        assert stdout.size == 20
+        assert stdout.text().endswith("a" * 5 + "b" * 10)
+        assert stderr.text() == "error"
+
+    def test_capture_channel_keep_all(self):
+        channel = FakeChannel([b"a" * 10, b"b" * 10], [b"e" * 20])
+
+        stdout, stderr = capture_channel(channel, 8, 15, keep_all=True)
+
+        assert stdout.text() == "a" * 10 + "b" * 10
+        assert stderr.truncated
@@ -44,6 +44,13 @@ class TestComputer(unittest.TestCase):
         assert "mac" in computer_dict
         assert "included" not in computer_dict
 
+    def test_slots(self):
+
+        computer = Computer({"status": "".join(["al", "ive"])})
+
+        assert not hasattr(computer, "__dict__")
+        assert computer.status is Computer.Status.ON
+
 
 class TestComputers(unittest.TestCase):
     def setUp(self):
@@ -107,3 +114,103 @@ class TestComputers(unittest.TestCase):
             "PC2",
             "PC4",
         ]
+
+    def test_find_after_add_and_remove(self):
+        self.computers.add("my-name", "10.0.0.1", "AA:BB:CC:DD:EE:FF")
+
+        assert self.computers.find("aa:bb:cc:dd:ee:ff").name == "my-name"
+        assert self.computers.find_by_ip("10.0.0.1")[0].name == "my-name"
+
+        self.computers.remove("aa:bb:cc:dd:ee:ff")
+
+        assert self.computers.find("aa:bb:cc:dd:ee:ff") is None
+        assert self.computers.find_by_ip("10.0.0.1") == []
+
+    def test_set_ip(self):
+        computer = self.computers.find("b4:2a:3b:ef:a6:a3")
+
+        self.computers.set_ip(computer, "10.0.0.2")
+
+        assert self.computers.find_by_ip("10.209.30.34") == []
+        assert self.computers.find_by_ip("10.0.0.2") == [computer]
+
+    def test_update_ips(self):
+        self.computers.find("40:c1:2e:c6:23:03").included = False
+
+        updated = self.computers.update_ips(
+            {"40:c1:2e:c6:23:03": "10.0.0.1", "b3:ca:dc:3f:34:44": "10.0.0.2"}
+        )
+
+        assert [(c.name, last_ip) for c, last_ip in updated] == [
+            ("PC2", "10.209.30.207")
+        ]
+        assert self.computers.find_by_ip("10.0.0.2")[0].name == "PC2"
+        assert self.computers.find("40:c1:2e:c6:23:03").ip == "10.209.30.128"
+
+    def test_apply_status(self):
+        self.computers.apply_status(
+            {
+                "10.209.30.128": Computer.Status.ON,
+                "10.209.30.34": Computer.Status.ON,
+                "10.1.1.1": Computer.Status.ON,
+            }
+        )
+
+        assert [c.name for c in self.computers if c.on()] == ["PC1", "PC3"]
+        assert self.computers.n_connected_computers == 2
+
+    def test_n_connected_computers(self):
+        self.computers.apply_status({"10.209.30.128": Computer.Status.ON})
+        assert self.computers.n_connected_computers == 1
+
+        # Only the changes are counted
+        changed = self.computers.apply_status(
+            {"10.209.30.128": Computer.Status.ON, "10.209.30.34": Computer.Status.ON}
+        )
+        assert [c.name for c in changed] == ["PC3"]
+        assert self.computers.n_connected_computers == 2
+
+        self.computers.apply_status({"10.209.30.128": Computer.Status.OFF})
+        assert self.computers.n_connected_computers == 1
+
+        self.computers.remove(self.computers.find_by_ip("10.209.30.34")[0].mac)
+        assert self.computers.n_connected_computers == 0
+
+    def test_apply_same_status(self):
+        """Equal statuses are not changes, even if they are different objects"""
+
+        computer = self.computers.find_by_ip("10.209.30.128")[0]
+        computer.status = "".join(["ali", "ve"])
+
+        assert self.computers.apply_status({"10.209.30.128": "alive"}) == []
+        assert not self.computers.dirty
+
+    def test_save(self):
+        filepath = path.join(self.test_dir, "computers.json")
+        shutil.copy("tests/res/computers.json", filepath)
+
+        computers = Computers(filepath)
+        computers.add("PC5", "10.0.0.5", "aa:bb:cc:dd:ee:ff")
+        computers.save()
+
+        saved = Computers(filepath)
+
+        assert [c.name for c in saved] == ["PC1", "PC2", "PC3", "PC4", "PC5"]
+        assert "computers" not in saved.data
+
+    def test_save_only_when_dirty(self):
+        filepath = path.join(self.test_dir, "computers.json")
+        shutil.copy("tests/res/computers.json", filepath)
+
+        computers = Computers(filepath)
+
+        with patch("os.replace") as replace_mock:
+            computers.apply_status({"10.209.30.128": Computer.Status.OFF})
+            computers.save()
+
+            replace_mock.assert_not_called()
+
+            computers.apply_status({"10.209.30.128": Computer.Status.ON})
+            computers.save()
+
+            replace_mock.assert_called_once()
@@ -1,4 +1,7 @@
+import shutil
+import tempfile
 import unittest
+from os import path
 from unittest.mock import patch
 
 from cmsysbot.utils import Computers, Config, Section
@@ -79,7 +82,15 @@ class TestSection(unittest.TestCase):
 
 class TestConfig(unittest.TestCase):
     def setUp(self):
-        self.config: Config = Config("tests/res/config.json")
+        # The folders and files of the sections are created next to the config.json
+        self.test_dir = tempfile.mkdtemp()
+        self.filepath = path.join(self.test_dir, "config.json")
+        shutil.copy("tests/res/config.json", self.filepath)
+
+        self.config: Config = Config(self.filepath)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
 
     def test_token(self):
         assert self.config.token == "TH15T0K3N15NTV4L1D"
@@ -108,6 +119,13 @@ class TestConfig(unittest.TestCase):
     def test_admins(self):
         assert self.config.admins == ["aa", "bb"]
 
+    def test_get_max_workers(self):
+        """Sections should inherit the closest max_workers, or the global default"""
+
+        assert self.config.get_max_workers(["A2"]) == self.config.max_workers
+        assert self.config.get_max_workers(["A1", "B1"]) == 4
+        assert self.config.get_max_workers(["A1", "B1", "C1"]) == 4
+
     def test_get_section(self):
         """Should be able to return the individual Section object from its route"""
 
@@ -117,6 +135,64 @@ class TestConfig(unittest.TestCase):
         assert section.name == "B1"
         assert section.subsections == ["C1", "C2"]
 
+    def test_section_tree(self):
+        """The sections should know their position on the tree"""
+
+        section = self.config.get_section(["A1", "B1", "C2"])
+
+        assert section.route == ("A1", "B1", "C2")
+        assert section.path == "A1/B1/C2"
+        assert section.parent is self.config.get_section(["A1", "B1"])
+        assert section.parent.parent.parent is None
+        assert self.config.get_section(["A1", "B1"]).children[1] is section
+
+        # Always the same objects
+        assert list(self.config.get_sections(["A1", "B1"]))[1] is section
+
+        assert self.config.get_section(["A1", "C2"]) is None
+        assert list(self.config.get_sections(["A2"])) == []
+
+    def test_has_access(self):
+        """ACLs propagate to subsections, and admins can access everything"""
+
+        config = Config(self.filepath)
+        config.data["structure"] = [
+            {
+                "name": "A1",
+                "allowed_users": ["u1"],
+                "sections": [{"name": "B1", "allowed_users": ["u2"]}, "B2"],
+            },
+            {"name": "A2", "sections": [{"name": "B3", "allowed_users": ["u3"]}]},
+            "A3",
+        ]
+        config._Config__build_section_tree()
+
+        assert config.has_access("u1", ["A1", "B1"])
+        assert config.has_access("u2", ["A1", "B1"])
+        assert not config.has_access("u2", ["A1", "B2"])
+        assert not config.has_access("u1", ["A2", "B3"])
+        assert config.has_access("u1", ["A2"])
+        assert config.has_access("u1", ["A3"])
+        assert config.has_access("aa", ["A2", "B3"])
+
+        # A2 has no ACL, so it's shown to everyone
+        assert [s.name for s in config.accessible_sections("u3")] == ["A2", "A3"]
+        assert [s.name for s in config.accessible_sections("u3", ["A2"])] == ["B3"]
+        assert [s.name for s in config.accessible_sections("u2", ["A2"])] == []
+        assert [s.name for s in config.accessible_sections("u2", ["A1"])] == ["B1"]
+        assert len(list(config.accessible_sections("aa"))) == 3
+
+    def test_get_section_by_id(self):
+        section = self.config.get_section(["A1", "B1"])
+
+        assert len(section.id) == 10
+        assert self.config.get_section_by_id(section.id) is section
+        assert self.config.get_section_by_id("inexistent") is None
+
+        # Ids don't change when the config is loaded again
+        config = Config(self.filepath)
+        assert config.get_section_by_id(section.id).route == ("A1", "B1")
+
     def test_get_sections(self):
         # Get subsections from root
         subsections = list(self.config.get_sections())
@@ -157,10 +233,12 @@ class TestConfig(unittest.TestCase):
         """Should try to create a folder with a correct route"""
         self.config._Config__create_folder(["A", "B"])
 
-        os_makedirs_mock.assert_called_with("tests/res/A/B")
+        os_makedirs_mock.assert_called_with(path.join(self.test_dir, "A/B"))
 
     @patch("os.path.exists", return_value=True)
     def test_create_file(self, _):
         """Should try to create a file with a correct route"""
 
-        assert self.config._Config__create_file(["A", "B"]) == "tests/res/A/B.json"
+        assert self.config._Config__create_file(["A", "B"]) == path.join(
+            self.test_dir, "A/B.json"
+        )
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from cmsysbot.system import PluginProgress
+
+try:
+    from cmsysbot.controller import conversation
+except ImportError:  # pragma: no cover
+    conversation = None
+
+
+class FakeStop:
+    """Stand-in for the stop event: set after `rounds` waits"""
+
+    def __init__(self, rounds: int):
+        self.rounds = rounds
+        self.waits = []
+
+    def wait(self, timeout=None) -> bool:
+        self.waits.append(timeout)
+
+        return len(self.waits) > self.rounds
+
+
+@unittest.skipIf(conversation is None, "python-telegram-bot is not available")
+class TestConversation(unittest.TestCase):
+    def test_keep_refreshing(self):
+        """The progress is edited on a timer, only when its text changes"""
+
+        plugin = MagicMock()
+        plugin.name = "my_plugin"
+
+        progress = PluginProgress(min_interval=0)
+        progress.add("PC1 (10.0.0.1)")
+
+        message = MagicMock()
+        stop = FakeStop(rounds=3)
+
+        texts = iter(["0s", "0s", "1s"])
+        keyboards = [MagicMock(text=text) for text in texts]
+
+        with patch.object(
+            conversation.view, "plugin_progress", side_effect=keyboards
+        ):
+            conversation.keep_refreshing(plugin, progress, message, stop)
+
+        assert stop.waits == [0, 0, 0, 0]
+
+        keyboards[0].edit.assert_called_once_with(message, parse_mode=None)
+        keyboards[1].edit.assert_not_called()
+        keyboards[2].edit.assert_called_once_with(message, parse_mode=None)
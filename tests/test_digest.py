@@ -0,0 +1,43 @@
+import unittest
+
+from cmsysbot.system import ResultDigest
+
+
+class TestResultDigest(unittest.TestCase):
+    def setUp(self):
+        self.digest = ResultDigest()
+
+        self.digest.add("PC1", "10.0.0.1", "Installed.", "[sudo] password for u:")
+        self.digest.add("PC2", "10.0.0.2", "Installed.\n", "")
+        self.digest.add("PC3", "10.0.0.3", "", "dpkg: error")
+        self.digest.add("PC4", "10.0.0.4", "Installed.", "")
+
+    def test_groups(self):
+        """Computers with the same normalized output should be grouped"""
+
+        groups = self.digest.groups()
+
+        assert len(self.digest) == 4
+        assert len(groups) == 2
+
+        assert groups[0].computers == [
+            "PC1 (10.0.0.1)",
+            "PC2 (10.0.0.2)",
+            "PC4 (10.0.0.4)",
+        ]
+        assert groups[0].stdout == "Installed."
+        assert groups[0].stderr == ""
+
+        assert groups[1].computers == ["PC3 (10.0.0.3)"]
+        assert groups[1].stderr == "dpkg: error"
+
+    def test_report(self):
+        """The report should have the full output of every computer"""
+
+        report = self.digest.report()
+
+        for name in ["PC1", "PC2", "PC3", "PC4"]:
+            assert f"===== {name}" in report
+
+        assert "-> [Error]: dpkg: error" in report
+        assert "[sudo]" not in report
@@ -0,0 +1,97 @@
+import threading
+import time
+import unittest
+from concurrent import futures
+
+from cmsysbot.utils import executors
+from cmsysbot.utils.executors import BridgeExecutor
+
+
+class TestExecutors(unittest.TestCase):
+    def tearDown(self):
+        for executor in executors._executors.values():
+            executor.shutdown()
+
+        executors._executors.clear()
+        executors._limits.clear()
+
+    def run_tasks(self, executor: BridgeExecutor, n_tasks: int) -> int:
+        """Run `n_tasks` slow tasks, and return the max of them running at once"""
+
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        def task():
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+
+            time.sleep(0.02)
+
+            with lock:
+                running[0] -= 1
+
+        futures.wait([executor.submit(task) for _ in range(n_tasks)])
+
+        return max_running[0]
+
+    def test_limit(self):
+        executor = BridgeExecutor(2)
+
+        assert self.run_tasks(executor, 8) == 2
+
+        executor.shutdown()
+
+    def test_queued_tasks_dont_take_threads(self):
+        executor = BridgeExecutor(2)
+        event = threading.Event()
+        threads = threading.active_count()
+
+        tasks = [executor.submit(event.wait) for _ in range(100)]
+
+        assert threading.active_count() - threads <= 2
+
+        event.set()
+        futures.wait(tasks)
+        executor.shutdown()
+
+    def test_failed_task(self):
+        executor = BridgeExecutor(1)
+
+        with self.assertRaises(ValueError):
+            executor.submit(int, "not a number").result()
+
+        assert executor.submit(int, "1").result() == 1
+        executor.shutdown()
+
+    def test_same_executor_per_bridge(self):
+        executor = executors.get_executor("10.0.0.1", "A1", 2)
+
+        assert executors.get_executor("10.0.0.1", "A1", 2) is executor
+        assert executors.get_executor("10.0.0.2", "A1", 2) is not executor
+
+    def test_limit_per_bridge(self):
+        """The lowest limit of the sections is used, whatever the order"""
+
+        executor = executors.get_executor("10.0.0.1", "A1", 4)
+        assert executor.max_workers == 4
+
+        executors.get_executor("10.0.0.1", "A2", 2)
+
+        assert executors.get_executor("10.0.0.1", "A1", 4) is executor
+        assert executor.max_workers == 2
+
+    def test_change_limit(self):
+        """The executor in use is resized, never shut down or replaced"""
+
+        executor = executors.get_executor("10.0.0.1", "A1", 4)
+        future = executor.submit(time.sleep, 0.05)
+
+        # For example, after reloading the config.json
+        assert executors.get_executor("10.0.0.1", "A1", 1) is executor
+        assert executor.max_workers == 1
+
+        # Still accepts new tasks, limited to the new value
+        assert self.run_tasks(executor, 4) == 1
+        future.result()
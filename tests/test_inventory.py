@@ -0,0 +1,148 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from os import path
+from unittest.mock import MagicMock, patch
+
+from cmsysbot.utils import Computer, inventory
+
+
+class TestInventory(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.filepath = path.join(self.test_dir, "computers.json")
+        shutil.copy("tests/res/computers.json", self.filepath)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_shared_fields(self):
+        view1 = inventory.get_view(self.filepath)
+        view2 = inventory.get_view(self.filepath)
+
+        view1.apply_status({"10.209.30.128": Computer.Status.ON})
+
+        assert view2.find("40:c1:2e:c6:23:03").on()
+        assert view2.n_connected_computers == 1
+
+    def test_included_per_view(self):
+        view1 = inventory.get_view(self.filepath)
+        view2 = inventory.get_view(self.filepath)
+
+        view1.find("40:c1:2e:c6:23:03").included = False
+
+        assert len(list(view1.get_included())) == 3
+        assert len(list(view2.get_included())) == 4
+
+    def test_update_ips(self):
+        view1 = inventory.get_view(self.filepath)
+        view2 = inventory.get_view(self.filepath)
+
+        view1.update_ips({"40:c1:2e:c6:23:03": "10.0.0.1"})
+
+        assert view2.find("40:c1:2e:c6:23:03").ip == "10.0.0.1"
+        assert [c.name for c in view2.find_by_ip("10.0.0.1")] == ["PC1"]
+
+    def test_save_keeps_cache(self):
+        view1 = inventory.get_view(self.filepath)
+        view1.update_ips({"40:c1:2e:c6:23:03": "10.0.0.1"})
+        view1.save()
+
+        # Saving from the bot doesn't force a reload
+        view2 = inventory.get_view(self.filepath)
+        view1.apply_status({"10.0.0.1": Computer.Status.ON})
+
+        assert view2.find("40:c1:2e:c6:23:03").on()
+
+    def modify_file(self, **computer):
+        """Add `computer` to the .json file, as someone else editing it by hand"""
+
+        with open(self.filepath) as json_file:
+            data = json.load(json_file)
+
+        data["computers"].append(computer)
+
+        with open(self.filepath, "w") as json_file:
+            json.dump(data, json_file)
+
+        stat = os.stat(self.filepath)
+        os.utime(self.filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+    def test_reload_when_modified(self):
+        """Every view sees the changes, also the ones created before them"""
+
+        view1 = inventory.get_view(self.filepath)
+        view1.find("40:c1:2e:c6:23:03").included = False
+
+        self.modify_file(name="PC5", ip="10.0.0.5", mac="aa:bb:cc:dd:ee:05")
+
+        view2 = inventory.get_view(self.filepath)
+        view1.apply_status({"10.209.30.128": Computer.Status.ON})
+
+        assert len(view1) == len(view2) == 5
+        assert view2.find("40:c1:2e:c6:23:03").on()
+
+        # The per-session state is kept
+        assert not view1.find("40:c1:2e:c6:23:03").included
+        assert view2.find("40:c1:2e:c6:23:03").included
+
+    def test_save_doesnt_overwrite_changes(self):
+        """A view created before the file was modified never overwrites it"""
+
+        view1 = inventory.get_view(self.filepath)
+
+        self.modify_file(name="PC5", ip="10.0.0.5", mac="aa:bb:cc:dd:ee:05")
+
+        view1.apply_status({"10.209.30.128": Computer.Status.ON})
+        view1.save()
+
+        with open(self.filepath) as json_file:
+            names = [c["name"] for c in json.load(json_file)["computers"]]
+
+        assert names == ["PC1", "PC2", "PC3", "PC4", "PC5"]
+        assert view1.find("aa:bb:cc:dd:ee:05").name == "PC5"
+
+    def test_section_view_sqlite(self):
+        config = MagicMock(storage=inventory.STORAGE_SQLITE)
+        config.database = path.join(self.test_dir, "computers.db")
+        config.root_folder = self.test_dir + "/"
+
+        with patch("cmsysbot.utils.states.config_file", config):
+            view1 = inventory.get_section_view(["A1", "B1"])
+            view2 = inventory.get_section_view(["A1", "B1"])
+
+        # The section is empty, as there is no .json file to import
+        assert len(view1) == 0
+
+        config.storage = inventory.STORAGE_JSON
+        shutil.copy(self.filepath, path.join(self.test_dir, "A2.json"))
+
+        with patch("cmsysbot.utils.states.config_file", config):
+            view3 = inventory.get_section_view(["A2"])
+
+        assert len(view3) == 4
+        assert len(view2) == 0
+
+    def test_section_view_sqlite_import(self):
+        """A section added after the start is imported the first time it's used"""
+
+        config = MagicMock(storage=inventory.STORAGE_SQLITE)
+        config.database = path.join(self.test_dir, "computers.db")
+        config.root_folder = self.test_dir + "/"
+
+        os.makedirs(path.join(self.test_dir, "A1"))
+        shutil.copy(self.filepath, path.join(self.test_dir, "A1", "B2.json"))
+
+        with patch("cmsysbot.utils.states.config_file", config):
+            view = inventory.get_section_view(["A1", "B2"])
+
+        assert len(view) == 4
+
+        # Once imported, the database is used instead of the .json file
+        os.remove(path.join(self.test_dir, "A1", "B2.json"))
+        database = inventory.sqlite_storage.get_database(config.database)
+
+        assert not database.import_json(config, "A1/B2")
+        assert database.has_section("A1/B2")
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from os import path
+from unittest.mock import patch
+
+from cmsysbot.utils import Config, states
+
+try:
+    from cmsysbot import __main__ as main
+except ImportError:  # pragma: no cover
+    main = None
+
+
+@unittest.skipIf(main is None, "python-telegram-bot is not available")
+class TestReloadConfig(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.filepath = path.join(self.test_dir, "config.json")
+        shutil.copy("tests/res/config.json", self.filepath)
+
+        self.config = Config(self.filepath)
+
+        for target, value in [
+            ("cmsysbot.__main__.CONFIG_PATH", self.filepath),
+            ("cmsysbot.utils.states.config_file", self.config),
+        ]:
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def modify(self, **changes):
+        """Write `changes` to the config.json, with a newer mtime"""
+
+        with open(self.filepath) as config_file:
+            data = json.load(config_file)
+
+        data.update(changes)
+
+        with open(self.filepath, "w") as config_file:
+            json.dump(data, config_file)
+
+        stat = os.stat(self.filepath)
+        os.utime(self.filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+    def test_not_modified(self):
+        main.reload_config(None, None)
+
+        assert states.config_file is self.config
+
+    def test_reload(self):
+        self.modify(name="New name")
+
+        main.reload_config(None, None)
+
+        assert states.config_file is not self.config
+        assert states.config_file.bot_name == "New name"
+
+    def test_invalid_config(self):
+        """A wrong config is logged only once, and the old one is kept"""
+
+        self.modify(admins=None)
+
+        with patch("cmsysbot.system.log.getLogger") as get_logger:
+            main.reload_config(None, None)
+            main.reload_config(None, None)
+
+        assert states.config_file is self.config
+        assert get_logger.return_value.error.call_count == 1
+        assert not self.config.is_outdated()
@@ -0,0 +1,61 @@
+import shutil
+import tempfile
+import unittest
+from os import path
+from unittest.mock import MagicMock, patch
+
+from cmsysbot.utils import Config, Session
+
+try:
+    from cmsysbot.controller import menu
+except ImportError:  # pragma: no cover
+    menu = None
+
+
+@unittest.skipIf(menu is None, "python-telegram-bot is not available")
+class TestMenu(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        filepath = path.join(self.test_dir, "config.json")
+        shutil.copy("tests/res/config.json", filepath)
+
+        config = Config(filepath)
+        config.data["structure"] = [
+            {"name": "A1", "allowed_users": ["u1"], "sections": ["B1"]},
+            {"name": "A2", "allowed_users": ["u2"]},
+            "A3",
+        ]
+        config._Config__build_section_tree()
+
+        patcher = patch("cmsysbot.utils.states.config_file", config)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.update = MagicMock()
+        self.user_data = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def sections(self, route=None):
+        return [
+            s.name
+            for s in menu.accessible_sections(self.update, self.user_data, route or [])
+        ]
+
+    def test_telegram_username(self):
+        self.update.effective_user.username = "u1"
+
+        assert self.sections() == ["A1", "A3"]
+        assert self.sections(["A1"]) == ["B1"]
+
+    def test_session_username(self):
+        self.update.effective_user.username = "u1"
+        Session.get_from(self.user_data).username = "u2"
+
+        assert self.sections() == ["A1", "A2", "A3"]
+
+    def test_without_username(self):
+        self.update.effective_user.username = None
+
+        assert self.sections() == ["A3"]
@@ -0,0 +1,152 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+try:
+    from telegram.error import RetryAfter
+
+    from cmsysbot.view.outbox import Outbox, PendingMessage
+except ImportError:  # pragma: no cover
+    Outbox = None
+
+
+class FakeClock:
+    """Stand-in for the condition of the outbox: waiting just moves the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.waits = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def wait(self, timeout=None):
+        assert timeout is not None, "Nothing left to send"
+
+        self.waits.append(timeout)
+        self.now += timeout
+
+    def notify(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+@unittest.skipIf(Outbox is None, "python-telegram-bot is not available")
+class TestOutbox(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+        patcher = patch("time.monotonic", self.clock.monotonic)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.bot = MagicMock()
+        self.outbox = self.new_outbox()
+
+    def new_outbox(self, **kwargs) -> "Outbox":
+        outbox = Outbox(**kwargs)
+
+        # The requests are sent by the test instead of the background thread
+        outbox._Outbox__condition = self.clock
+        outbox._Outbox__thread = True
+
+        return outbox
+
+    def send_next(self, outbox: "Outbox" = None):
+        outbox = outbox or self.outbox
+
+        chat_id, batch = outbox._Outbox__next_batch()
+        outbox._Outbox__deliver(chat_id, batch)
+
+        return chat_id, batch
+
+    def test_merge_text_messages(self):
+        pending = [self.outbox.send_text(self.bot, 1, text) for text in "abc"]
+
+        _, batch = self.send_next()
+
+        assert len(batch) == 3
+        self.bot.send_message.assert_called_once_with(
+            chat_id=1, text="a\n\nb\n\nc", parse_mode=None
+        )
+        assert all(p.result() is self.bot.send_message.return_value for p in pending)
+
+    def test_dont_merge(self):
+        """Messages with keyboard, or that will be edited, are sent alone"""
+
+        self.outbox.send_text(self.bot, 1, "a", reply_markup=MagicMock())
+        self.outbox.send_text(self.bot, 1, "b", mergeable=False)
+        self.outbox.send_text(self.bot, 1, "c")
+        self.outbox.send_text(self.bot, 1, "d", parse_mode="HTML")
+
+        batches = [len(self.send_next()[1]) for _ in range(4)]
+
+        assert batches == [1, 1, 1, 1]
+
+    def test_merge_up_to_max_length(self):
+        self.outbox.send_text(self.bot, 1, "a" * 3000)
+        self.outbox.send_text(self.bot, 1, "b" * 3000)
+
+        assert len(self.send_next()[1]) == 1
+        assert len(self.send_next()[1]) == 1
+
+    def test_chat_interval(self):
+        self.outbox.send(1, lambda: "first")
+        self.outbox.send(1, lambda: "second")
+        self.outbox.send(2, lambda: "other chat")
+
+        chats = [self.send_next()[0] for _ in range(3)]
+
+        # The other chat doesn't wait for the first one
+        assert chats == [1, 2, 1]
+        assert self.clock.waits == [1]
+
+    def test_global_rate(self):
+        outbox = self.new_outbox(global_rate=2, chat_interval=0)
+
+        for chat_id in range(3):
+            outbox.send(chat_id, lambda: None)
+
+        for _ in range(3):
+            self.send_next(outbox)
+
+        assert self.clock.waits == [1]
+
+    def test_retry_after(self):
+        request = MagicMock(side_effect=[RetryAfter(5), "sent"])
+
+        pending = self.outbox.send(1, request)
+
+        self.send_next()
+        assert not pending.done()
+
+        # Sent again after the requested time
+        self.send_next()
+        assert self.clock.waits == [5]
+        assert pending.result() == "sent"
+
+    def test_failed_request(self):
+        pending = self.outbox.send(1, MagicMock(side_effect=ValueError("Bad")))
+
+        self.send_next()
+
+        with self.assertRaises(ValueError):
+            pending.result()
+
+    def test_edit_pending_message(self):
+        """A queued message can be edited before it has been sent"""
+
+        pending = self.outbox.send_text(self.bot, 1, "Running", mergeable=False)
+        assert isinstance(pending, PendingMessage) and pending.chat_id == 1
+
+        self.outbox.send(1, lambda: pending.result().edit_text(text="Done"))
+
+        self.send_next()
+        self.send_next()
+
+        message = self.bot.send_message.return_value
+        message.edit_text.assert_called_once_with(text="Done")
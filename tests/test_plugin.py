@@ -0,0 +1,165 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent import futures
+from unittest.mock import MagicMock, patch
+
+from cmsysbot.system import Plugin, PluginContext, PluginVar
+from cmsysbot.utils import Computer
+
+PLUGIN_BODY = """#!/bin/bash
+
+# CMSysBot: {
+# "root": "True",
+# "source": "remote",
+# "arguments": ["$USERNAME", "$TARGET_IP", "$TARGET_MAC", "Enter a value: "]
+# }
+
+echo $@
+"""
+
+
+class TestPlugin(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.plugin_path = os.path.join(self.test_dir, "my_plugin")
+
+        with open(self.plugin_path, "w") as plugin_file:
+            plugin_file.write(PLUGIN_BODY)
+
+        self.plugin = Plugin(self.plugin_path)
+
+        self.session = MagicMock()
+        self.session.username = "user"
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def test_parse_header(self):
+        assert self.plugin.name == "my_plugin"
+        assert self.plugin.root is True
+        assert self.plugin.source == PluginVar.SOURCE_REMOTE
+        assert list(self.plugin.arguments) == [
+            "$USERNAME",
+            "$TARGET_IP",
+            "$TARGET_MAC",
+            "Enter a value: ",
+        ]
+
+    def test_digest_changes_with_content(self):
+        """The digest should be cached, but computed again when the file changes"""
+
+        digest = self.plugin.digest
+
+        assert self.plugin.digest == digest
+
+        with open(self.plugin_path, "a") as plugin_file:
+            plugin_file.write("echo edited\n")
+
+        assert self.plugin.digest != digest
+
+    def test_execution_mode(self):
+        assert self.plugin.execution == PluginVar.EXECUTION_COPY
+        assert Plugin("plugins/run_command").execution == PluginVar.EXECUTION_STDIN
+
+    @patch("cmsysbot.utils.states.config_file")
+    def test_run_through_stdin(self, config_mock):
+        """Plugins with "stdin" execution shouldn't be copied to the computers"""
+
+        config_mock.fanout = False
+
+        self.plugin.data["execution"] = PluginVar.EXECUTION_STDIN
+
+        self.session.executor = futures.ThreadPoolExecutor()
+        self.session.computers.get_included_computers.return_value = [
+            Computer({"name": "PC1", "ip": "10.0.0.1", "status": "alive"})
+        ]
+        self.session.run_on_remote.return_value = ("out", "")
+
+        assert list(self.plugin.run(self.session)) == [("PC1", "10.0.0.1", "out", "")]
+
+        self.session.copy_to_remote.assert_not_called()
+        command = self.session.run_on_remote.call_args[0][1]
+        assert command.startswith("bash -s -- user 10.0.0.1")
+        assert self.session.run_on_remote.call_args[0][3] == PLUGIN_BODY
+
+    def test_create_context(self):
+        """Should replace the session arguments without modifying the plugin"""
+
+        self.plugin["Enter a value: "] = '"value"'
+
+        context = self.plugin.create_context(self.session)
+
+        assert context.arguments[PluginVar.USERNAME] == "user"
+        assert context.arguments["Enter a value: "] == '"value"'
+        assert self.plugin[PluginVar.USERNAME] == ""
+
+    def test_render_per_computer(self):
+        """Each computer should get its own arguments from the same context"""
+
+        context = self.plugin.create_context(self.session)
+
+        pc1 = Computer({"name": "PC1", "ip": "10.0.0.1", "mac": "aa"})
+        pc2 = Computer({"name": "PC2", "ip": "10.0.0.2", "mac": "bb"})
+
+        assert context.render(pc1) == ["user", "10.0.0.1", "aa", ""]
+        assert context.render(pc2) == ["user", "10.0.0.2", "bb", ""]
+
+        command = context.command("/tmp/my_plugin", pc1)
+        assert command == "/tmp/my_plugin user 10.0.0.1 aa "
+
+    def test_context_is_read_only(self):
+        context = PluginContext({"$TARGET_IP": ""})
+
+        with self.assertRaises(TypeError):
+            context.arguments["$TARGET_IP"] = "10.0.0.1"
+
+    @patch("cmsysbot.utils.states.config_file")
+    def test_run_fanout(self, config_mock):
+        """Each computer should get a result, even if the helper stops early"""
+
+        config_mock.fanout = True
+        config_mock.get_max_workers.return_value = 4
+        config_mock.output_max_size = 65536
+        self.session.password = "password"
+
+        self.session.computers.get_included_computers.return_value = [
+            Computer({"name": "PC1", "ip": "10.0.0.1", "status": "alive"}),
+            Computer({"name": "PC2", "ip": "10.0.0.2", "status": "alive"}),
+            Computer({"name": "PC3", "ip": "10.0.0.3"}),
+        ]
+
+        def stream_on_bridge(command, data):
+            job = json.loads(data)
+            assert [host["ip"] for host in job["hosts"]] == ["10.0.0.1", "10.0.0.2"]
+
+            yield "Traceback (most recent call last):"
+            yield json.dumps(
+                {"name": "PC1", "ip": "10.0.0.1", "stdout": "out", "stderr": ""}
+            )
+
+        self.session.stream_on_bridge.side_effect = stream_on_bridge
+
+        assert list(self.plugin.run(self.session)) == [
+            ("PC3", "10.0.0.3", "The computer is off", ""),
+            ("PC1", "10.0.0.1", "out", ""),
+            ("PC2", "10.0.0.2", "", "No result from the bridge computer"),
+        ]
+
+    @patch("cmsysbot.utils.states.config_file")
+    def test_fanout_without_python3(self, config_mock):
+        """Without python3 on the bridge, each computer is run from the bot"""
+
+        config_mock.fanout = True
+        self.session.has_python3.return_value = False
+        self.session.executor = futures.ThreadPoolExecutor()
+
+        self.session.computers.get_included_computers.return_value = [
+            Computer({"name": "PC1", "ip": "10.0.0.1", "status": "alive"})
+        ]
+        self.session.run_on_remote.return_value = ("out", "")
+
+        assert list(self.plugin.run(self.session)) == [("PC1", "10.0.0.1", "out", "")]
+        self.session.stream_on_bridge.assert_not_called()
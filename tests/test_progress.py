@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import patch
+
+from cmsysbot.system import PluginProgress
+
+
+class TestPluginProgress(unittest.TestCase):
+    def setUp(self):
+        self.progress = PluginProgress(min_interval=3)
+
+        for label in ["PC1", "PC2", "PC3"]:
+            self.progress.add(label)
+
+    def test_counters(self):
+        self.progress.start("PC1")
+        self.progress.start("PC2")
+        self.progress.finish("PC1")
+
+        assert self.progress.total == 3
+        assert self.progress.pending == 1
+        assert self.progress.running == 1
+        assert self.progress.done == 1
+        assert not self.progress.finished
+
+        self.progress.start("PC3")
+        self.progress.finish("PC2", failed=True)
+        self.progress.finish("PC3")
+
+        assert self.progress.done == 2
+        assert self.progress.failed == 1
+        assert self.progress.finished
+
+    @patch("time.monotonic")
+    def test_slowest(self, monotonic_mock):
+        for start, label in enumerate(["PC2", "PC1", "PC3"]):
+            monotonic_mock.return_value = start
+            self.progress.start(label)
+
+        monotonic_mock.return_value = 10
+
+        assert self.progress.slowest(2) == [("PC2", 10), ("PC1", 9)]
+
+    @patch("time.monotonic")
+    def test_should_refresh(self, monotonic_mock):
+        """Refreshes should be rate limited, except when the run has finished"""
+
+        monotonic_mock.return_value = 100
+        assert self.progress.should_refresh()
+
+        monotonic_mock.return_value = 101
+        assert not self.progress.should_refresh()
+
+        monotonic_mock.return_value = 104
+        assert self.progress.should_refresh()
+
+        for label in ["PC1", "PC2", "PC3"]:
+            self.progress.finish(label)
+
+        assert self.progress.should_refresh()
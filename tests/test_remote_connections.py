@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from cmsysbot.utils.remote_connections import RemoteConnections
+
+
+class TestRemoteConnections(unittest.TestCase):
+    def setUp(self):
+        self.bridge_client = MagicMock()
+        self.remotes = RemoteConnections(self.bridge_client, "user", "pass", 300)
+
+    @patch("paramiko.SSHClient")
+    def test_reuse_connection(self, ssh_client_mock):
+        """Should only open one connection per host while it's alive"""
+
+        client = self.remotes.get("10.0.0.1")
+
+        assert self.remotes.get("10.0.0.1") is client
+        assert ssh_client_mock.call_count == 1
+        assert self.bridge_client.get_transport().open_channel.call_count == 1
+
+        self.remotes.get("10.0.0.2")
+
+        assert ssh_client_mock.call_count == 2
+        assert len(self.remotes) == 2
+
+    @patch("paramiko.SSHClient")
+    def test_reconnect_dead_connection(self, ssh_client_mock):
+        """Should replace a connection whose transport is no longer active"""
+
+        client = self.remotes.get("10.0.0.1")
+        client.get_transport().is_active.return_value = False
+
+        self.remotes.get("10.0.0.1")
+
+        client.close.assert_called_once()
+        assert ssh_client_mock.call_count == 2
+
+    @patch("time.monotonic")
+    @patch("paramiko.SSHClient")
+    def test_evict_idle(self, _, monotonic_mock):
+        """Should close the connections unused for more than `idle_timeout`"""
+
+        monotonic_mock.return_value = 0
+        client = self.remotes.get("10.0.0.1")
+        self.remotes.release("10.0.0.1", client)
+
+        monotonic_mock.return_value = 301
+        self.remotes.evict_idle()
+
+        client.close.assert_called_once()
+        assert len(self.remotes) == 0
+
+    @patch("time.monotonic")
+    @patch("paramiko.SSHClient", side_effect=lambda: MagicMock())
+    def test_dont_evict_in_use(self, _, monotonic_mock):
+        """A connection running a long command is not closed for being idle"""
+
+        monotonic_mock.return_value = 0
+        client = self.remotes.get("10.0.0.1")
+
+        monotonic_mock.return_value = 400
+        self.remotes.get("10.0.0.2")
+
+        client.close.assert_not_called()
+
+        # Idle since it was released, not since it was acquired
+        self.remotes.release("10.0.0.1", client)
+
+        monotonic_mock.return_value = 500
+        self.remotes.evict_idle()
+        client.close.assert_not_called()
+
+        monotonic_mock.return_value = 701
+        self.remotes.evict_idle()
+        client.close.assert_called_once()
+
+    @patch("paramiko.SSHClient", side_effect=lambda: MagicMock())
+    def test_connection(self, _):
+        with self.remotes.connection("10.0.0.1") as client:
+            pass
+
+        # Released: it's evicted once idle
+        self.remotes.idle_timeout = -1
+        self.remotes.evict_idle()
+
+        client.close.assert_called_once()
+
+    @patch("paramiko.SSHClient", side_effect=lambda: MagicMock())
+    def test_close(self, _):
+        """Should close all the open connections"""
+
+        clients = [self.remotes.get(ip) for ip in ["10.0.0.1", "10.0.0.2"]]
+
+        self.remotes.close()
+
+        for client in clients:
+            client.close.assert_called_once()
+
+        assert len(self.remotes) == 0
@@ -0,0 +1,93 @@
+import io
+import json
+import sys
+import unittest
+from importlib.machinery import SourceFileLoader
+from importlib.util import module_from_spec, spec_from_loader
+from unittest.mock import patch
+
+# The helper has no .py extension, as it's copied as is to the bridge computer
+loader = SourceFileLoader("_remote_fanout", "plugins/_remote_fanout")
+fanout = module_from_spec(spec_from_loader(loader.name, loader))
+loader.exec_module(fanout)
+
+JOB = {
+    "plugin": "plugins/run_command",
+    "remote_path": "/tmp/cmsysbot-user/run_command-0123",
+    "stdin": False,
+    "root": False,
+    "password": "password",
+    "concurrency": 2,
+    "hosts": [],
+}
+
+
+class TestRemoteFanout(unittest.TestCase):
+    def test_send_result(self):
+        """Each result should be a single JSON line"""
+
+        with patch("sys.stdout", new=io.StringIO()) as stdout:
+            fanout.send_result(
+                {"name": "PC1", "ip": "10.0.0.1"}, "line 1\nline 2", "error"
+            )
+
+        assert stdout.getvalue().count("\n") == 1
+        assert json.loads(stdout.getvalue()) == {
+            "name": "PC1",
+            "ip": "10.0.0.1",
+            "stdout": "line 1\nline 2",
+            "stderr": "error",
+        }
+
+    def test_run_keeps_the_end(self):
+        """Only the last bytes of a long output are kept in memory and sent"""
+
+        code = "import sys; print('x' * 100000); print('end', file=sys.stderr)"
+
+        returncode, stdout, stderr = fanout.run(
+            [sys.executable, "-c", code], None, "ignored", max_size=1000
+        )
+
+        assert returncode == 0
+        assert stdout.startswith("[... 99001 bytes omitted ...]\n")
+        assert stdout.endswith("x" * 999 + "\n")
+        assert stderr == "end\n"
+
+    @patch.object(fanout, "run", return_value=(0, "out", ""))
+    def test_copy_without_overwrite(self, run_mock):
+        host = {"name": "PC1", "ip": "10.0.0.1", "arguments": ["a"]}
+
+        assert fanout.run_on_host(JOB, host, {}) == ("out", "")
+
+        # The read-only copy of a previous run is never written again, and it's only
+        # reused from a directory owned by the user
+        copy, execute = [c[0][0] for c in run_mock.call_args_list]
+        check = fanout.PRIVATE_DIR_CHECK.format("/tmp/cmsysbot-user")
+        assert copy[-1].startswith(
+            f"{check} && {{ test -e /tmp/cmsysbot-user/run_command-0123 || "
+        )
+        assert execute[-1] == "/tmp/cmsysbot-user/run_command-0123 a"
+
+    @patch.object(fanout, "run", return_value=(0, "out", ""))
+    def test_root_through_stdin(self, run_mock):
+        job = dict(JOB, stdin=True, root=True)
+        host = {"name": "PC1", "ip": "10.0.0.1", "arguments": []}
+
+        fanout.run_on_host(job, host, {})
+
+        command = run_mock.call_args[0][0][-1]
+        stdin = run_mock.call_args[0][2]
+
+        assert command == fanout.SUDO_FROM_STDIN + "bash -s --"
+        assert "password" not in command
+        assert stdin.startswith("password\n")
+
+    def test_main(self):
+        job = dict(JOB, hosts=[{"name": "PC1", "ip": "10.0.0.1", "arguments": []}])
+
+        with patch("sys.stdin", new=io.StringIO(json.dumps(job))), patch(
+            "sys.stdout", new=io.StringIO()
+        ) as stdout, patch.object(fanout, "run_on_host", side_effect=OSError("x")):
+            fanout.main()
+
+        assert json.loads(stdout.getvalue())["stderr"] == "x"
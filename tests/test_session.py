@@ -0,0 +1,140 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from paramiko import ssh_exception
+
+from cmsysbot.utils import Session
+from cmsysbot.utils.capture import STDOUT
+from cmsysbot.utils.session import PRIVATE_DIR_CHECK, SUDO_FROM_STDIN
+
+
+class TestSession(unittest.TestCase):
+    def setUp(self):
+        self.session = Session("user", "password", "10.0.0.1")
+        self.session.remotes = MagicMock()
+
+        self.client = self.session.remotes.get.return_value
+        self.session.remotes.connection.return_value.__enter__.return_value = (
+            self.client
+        )
+        self.sftp = self.client.open_sftp.return_value
+
+        # Exit status of the commands run on the remote computer
+        self.stdout = MagicMock()
+        self.stdout.channel.recv_exit_status.return_value = 0
+        self.client.exec_command.return_value = (MagicMock(), self.stdout, MagicMock())
+
+    @patch("cmsysbot.utils.states.config_file")
+    def test_private_dirs(self, config_mock):
+        config_mock.bridge_tmp_dir = "/tmp/"
+        config_mock.remote_tmp_dir = "/var/tmp"
+
+        assert self.session.bridge_dir == "/tmp/cmsysbot-user"
+        assert self.session.remote_dir == "/var/tmp/cmsysbot-user"
+
+    def test_copy_to_remote(self):
+        self.sftp.stat.side_effect = FileNotFoundError
+
+        self.session.copy_to_remote(
+            "10.0.0.2", "plugins/a", "/tmp/cmsysbot-user/a-123", 0o555
+        )
+
+        self.client.exec_command.assert_called_once_with(
+            PRIVATE_DIR_CHECK.format("/tmp/cmsysbot-user")
+        )
+        self.sftp.put.assert_called_once_with(
+            "plugins/a", "/tmp/cmsysbot-user/a-123", confirm=True
+        )
+        self.sftp.chmod.assert_called_once_with("/tmp/cmsysbot-user/a-123", 0o555)
+
+    def test_copy_to_remote_already_present(self):
+        # The read-only copy of a previous run is not overwritten
+        self.session.copy_to_remote(
+            "10.0.0.2", "plugins/a", "/tmp/cmsysbot-user/a-123", 0o555
+        )
+
+        self.sftp.put.assert_not_called()
+        self.sftp.close.assert_called_once()
+
+    def test_copy_to_remote_not_private(self):
+        """A directory created by another user is never used"""
+
+        self.stdout.channel.recv_exit_status.return_value = 1
+
+        with self.assertRaises(PermissionError):
+            self.session.copy_to_remote(
+                "10.0.0.2", "plugins/a", "/tmp/cmsysbot-user/a-123", 0o555
+            )
+
+        self.client.open_sftp.assert_not_called()
+
+    def test_copy_to_bridge(self):
+        self.session.client = self.client
+        self.sftp.stat.side_effect = FileNotFoundError
+
+        for _ in range(2):
+            self.session.copy_to_bridge(
+                "plugins/a", "/tmp/cmsysbot-user/a-123", 0o555
+            )
+
+        # Both the directory and the file are only checked once per session
+        self.client.exec_command.assert_called_once_with(
+            PRIVATE_DIR_CHECK.format("/tmp/cmsysbot-user")
+        )
+        self.sftp.put.assert_called_once()
+
+    def test_has_python3(self):
+        self.session.client = self.client
+        self.stdout.channel.recv_exit_status.return_value = 1
+
+        assert not self.session.has_python3()
+
+        # Checked again until found (for example, after the bridge initialization)
+        self.stdout.channel.recv_exit_status.return_value = 0
+
+        assert self.session.has_python3()
+        assert self.session.has_python3()
+        assert self.client.exec_command.call_count == 2
+
+    @patch("cmsysbot.utils.states.config_file")
+    def test_stream_on_bridge(self, config_mock):
+        config_mock.output_spill_size = 1024
+        config_mock.output_max_size = 1024
+
+        self.session.client = self.client
+        chunks = [(STDOUT, b"a" * 100), (STDOUT, b"a\nb\nc"), (STDOUT, b"c\nd")]
+
+        with patch("cmsysbot.utils.session.iter_channel", return_value=chunks):
+            lines = list(self.session.stream_on_bridge("helper", "{}"))
+
+        assert lines == ["a" * 101, "b", "cc", "d"]
+        self.stdout.channel.close.assert_called_once()
+
+    @patch("cmsysbot.utils.states.config_file")
+    def test_run_on_remote_connection_lost(self, _):
+        self.client.exec_command.side_effect = ssh_exception.ChannelException(
+            2, "Connect failed"
+        )
+
+        stdout, stderr = self.session.run_on_remote("10.0.0.2", "ls", False)
+
+        assert stdout == ""
+        assert stderr.startswith("Connection lost")
+        self.session.remotes.release.assert_called_once_with("10.0.0.2", self.client)
+
+    @patch("cmsysbot.utils.states.config_file")
+    def test_run_on_remote_root_through_stdin(self, _):
+        """The password must never reach the script sent through stdin"""
+
+        stdin = MagicMock()
+        self.client.exec_command.return_value = (stdin, MagicMock(), MagicMock())
+
+        with patch.object(Session, "_Session__read_output", return_value=("", "")):
+            self.session.run_on_remote("10.0.0.2", "bash -s --", True, "echo hi\n")
+
+        command = self.client.exec_command.call_args[0][0]
+        assert command == SUDO_FROM_STDIN + "bash -s --"
+        assert "password" not in command
+
+        # Consumed by `read` before sudo runs the script with the rest of stdin
+        stdin.write.assert_called_once_with("password\necho hi\n")
@@ -0,0 +1,100 @@
+import shutil
+import tempfile
+import unittest
+from os import path
+from unittest.mock import patch
+
+from cmsysbot.utils import Computer, Config
+from cmsysbot.utils.sqlite_storage import Database, SqliteComputers
+
+
+class TestSqliteStorage(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+        # Creates an empty .json file for each section
+        shutil.copy("tests/res/config.json", self.test_dir)
+        self.config = Config(path.join(self.test_dir, "config.json"))
+
+        shutil.copy(
+            "tests/res/computers.json", path.join(self.test_dir, "A1/B1/C1.json")
+        )
+
+        self.database = Database(path.join(self.test_dir, "computers.db"))
+
+    def tearDown(self):
+        self.database.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_import_json_tree(self):
+        imported = self.database.import_json_tree(self.config)
+
+        assert imported == ["A1/B1/C1", "A1/B1/C2", "A2"]
+
+        computers = SqliteComputers(self.database, "A1/B1/C1")
+        assert [c.name for c in computers] == ["PC1", "PC2", "PC3", "PC4"]
+        assert computers.find("b4:2a:3b:ef:a6:a3").ip == "10.209.30.34"
+
+        # Already imported sections are skipped
+        assert self.database.import_json_tree(self.config) == []
+
+    def test_save(self):
+        self.database.import_json_tree(self.config)
+
+        computers = SqliteComputers(self.database, "A1/B1/C1")
+        computers.set_ip(computers.find("b4:2a:3b:ef:a6:a3"), "10.0.0.1")
+        computers.remove("40:c1:2e:c6:23:03")
+        computers.save()
+
+        computers = SqliteComputers(self.database, "A1/B1/C1")
+        assert [c.name for c in computers] == ["PC2", "PC3", "PC4"]
+        assert computers.find("b4:2a:3b:ef:a6:a3").ip == "10.0.0.1"
+
+    def test_status_history(self):
+        self.database.import_json_tree(self.config)
+
+        with patch("time.time", return_value=500):
+            computers = SqliteComputers(self.database, "A1/B1/C1")
+
+        with patch("time.time", return_value=1000):
+            computers.apply_status(
+                {"10.209.30.128": Computer.Status.ON, "10.209.30.34": "alive"}
+            )
+
+        with patch("time.time", return_value=2000):
+            computers.apply_status({"10.209.30.128": Computer.Status.OFF})
+
+            # Unchanged status are not recorded again
+            computers.apply_status({"10.209.30.34": Computer.Status.ON})
+
+        with patch("time.time", return_value=2000 + 3 * 24 * 3600):
+            unreachable = self.database.unreachable_for(3 * 24 * 3600)
+
+        # PC2 and PC4 have been unreachable since they were loaded
+        assert unreachable == [
+            ("A1/B1/C1", "b3:ca:dc:3f:34:44", "10.209.30.207", 500),
+            ("A1/B1/C1", "20:c0:6e:a5:c0:dc", "10.209.30.43", 500),
+            ("A1/B1/C1", "40:c1:2e:c6:23:03", "10.209.30.128", 2000),
+        ]
+
+    def test_initial_status_history(self):
+        """Computers already unreachable when loaded are found too"""
+
+        self.database.import_json_tree(self.config)
+
+        with patch("time.time", return_value=1000):
+            computers = SqliteComputers(self.database, "A1/B1/C1")
+            computers.apply_status({"10.209.30.128": Computer.Status.ON})
+
+        # Loading the section again doesn't record the status again
+        with patch("time.time", return_value=5000):
+            SqliteComputers(self.database, "A1/B1/C1")
+
+        with patch("time.time", return_value=1000 + 3 * 24 * 3600):
+            unreachable = self.database.unreachable_for(3 * 24 * 3600)
+
+        assert [mac for _, mac, _, _ in unreachable] == [
+            "b3:ca:dc:3f:34:44",
+            "b4:2a:3b:ef:a6:a3",
+            "20:c0:6e:a5:c0:dc",
+        ]
@@ -0,0 +1,308 @@
+import json
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from cmsysbot.system import status
+from cmsysbot.system.status import StatusChanges, StatusSchedule, parse_status
+from cmsysbot.utils import Computer
+
+
+def fake_session(bridge_ip="10.0.0.1", route=("A", "B")):
+    session = MagicMock(bridge_ip=bridge_ip, route=list(route), connected=True)
+    session.computers = MagicMock()
+
+    computers = [
+        Computer({"name": "PC2", "ip": "10.0.0.2", "mac": "aa"}),
+        Computer({"name": "PC3", "ip": "10.0.0.3", "mac": "bb"}),
+    ]
+    session.computers.__iter__.side_effect = lambda: iter(computers)
+    session.computers.get_included.side_effect = lambda: iter(computers)
+
+    return session
+
+
+class TestStatus(unittest.TestCase):
+    def setUp(self):
+        self.job_queue = MagicMock()
+
+        plugin_patcher = patch("cmsysbot.system.status.Plugin")
+        self.plugin = plugin_patcher.start().return_value
+        self.plugin.run.side_effect = lambda *args, **kwargs: iter(
+            [("Bridge", "10.0.0.1", "10.0.0.2 is alive\n10.0.0.3 is unreachable", "")]
+        )
+        self.addCleanup(plugin_patcher.stop)
+
+        config_patcher = patch("cmsysbot.utils.states.config_file")
+        self.config = config_patcher.start()
+        self.config.check_status_max_interval = 600
+        self.config.status_agent = False
+        self.addCleanup(config_patcher.stop)
+
+    def tearDown(self):
+        status._pollers.clear()
+
+    def test_parse_status(self):
+        assert parse_status("1.1.1.1 is alive\n2.2.2.2 is unreachable\n") == {
+            "1.1.1.1": "alive",
+            "2.2.2.2": "unreachable",
+        }
+
+    def test_parse_status_skips_other_lines(self):
+        stdout = "[... 10 bytes omitted ...]\n.2 is\n1.1.1.1 is alive\n"
+
+        assert parse_status(stdout) == {"1.1.1.1": "alive"}
+
+    def test_failed_first_sweep(self):
+        self.plugin.run.side_effect = RuntimeError("No connection")
+
+        poller = status.subscribe(fake_session(), self.job_queue, 60)
+
+        # The poller keeps checking on the next intervals
+        self.job_queue.run_repeating.assert_called_once()
+        assert poller.job is self.job_queue.run_repeating.return_value
+        assert poller.last_statuses == {}
+
+    def test_single_sweep_for_all_sessions(self):
+        session1 = fake_session()
+        session2 = fake_session()
+
+        poller = status.subscribe(session1, self.job_queue, 60)
+        assert status.subscribe(session2, self.job_queue, 60) is poller
+
+        # A single job and a single sweep
+        self.job_queue.run_repeating.assert_called_once()
+        assert self.plugin.run.call_count == 1
+
+        # The second session gets the last result without a new sweep
+        session2.computers.apply_status.assert_called_once_with(
+            {"10.0.0.2": "alive", "10.0.0.3": "unreachable"}
+        )
+
+        # All the computers are due again after the min interval
+        job = MagicMock(context=poller)
+        with patch("time.monotonic", return_value=time.monotonic() + 60):
+            status._job_sweep(None, job)
+
+        assert self.plugin.run.call_count == 2
+        assert session1.computers.apply_status.call_count == 2
+        assert session2.computers.apply_status.call_count == 2
+
+    def test_different_sections(self):
+        poller1 = status.subscribe(fake_session(), self.job_queue, 60)
+        poller2 = status.subscribe(fake_session(route=["C"]), self.job_queue, 60)
+
+        assert poller1 is not poller2
+
+    def test_stop_without_sessions(self):
+        session1 = fake_session()
+        session2 = fake_session()
+
+        poller = status.subscribe(session1, self.job_queue, 60)
+        status.subscribe(session2, self.job_queue, 60)
+
+        status.unsubscribe(session1)
+        session2.connected = False
+
+        job = MagicMock(context=poller)
+        status._job_sweep(None, job)
+
+        job.schedule_removal.assert_called_once()
+        assert self.plugin.run.call_count == 1
+        assert status._pollers == {}
+
+    def test_status_changes(self):
+        pc1 = Computer({"name": "PC1", "mac": "aa", "status": Computer.Status.ON})
+        pc2 = Computer({"name": "PC2", "mac": "bb"})
+
+        changes = StatusChanges()
+        changes.add([pc1, pc2])
+        changes.add([pc1])
+
+        assert changes.up == [pc1]
+        assert changes.down == [pc2]
+        assert len(changes) == 2
+
+    def test_listeners(self):
+        pc1 = Computer({"name": "PC1", "mac": "aa", "status": Computer.Status.ON})
+
+        session1 = fake_session()
+        session2 = fake_session()
+        listener1 = MagicMock()
+        listener2 = MagicMock()
+
+        poller = status.subscribe(session1, self.job_queue, 60, listener=listener1)
+        status.subscribe(session2, self.job_queue, 60, listener=listener2)
+
+        # Loading the current status is not notified
+        listener1.assert_not_called()
+        listener2.assert_not_called()
+
+        # Both sessions share the changed computer, notified only once
+        session1.computers.apply_status.return_value = [pc1]
+        session2.computers.apply_status.return_value = [pc1]
+
+        poller.sweep(now=time.monotonic() + 60)
+
+        listener1.assert_called_once()
+        changes = listener1.call_args[0][0]
+        assert changes.up == [pc1] and changes.down == []
+        listener2.assert_called_once_with(changes)
+
+        # Nothing changed
+        session1.computers.apply_status.return_value = []
+        session2.computers.apply_status.return_value = []
+        status.unsubscribe(session2)
+
+        status._job_sweep(None, MagicMock(context=poller))
+        poller.sweep(now=time.monotonic() + 120)
+
+        listener1.assert_called_once()
+        assert session2 not in poller.listeners
+
+    def test_schedule_backoff(self):
+        schedule = StatusSchedule(10, 35)
+
+        # New ips are always due
+        assert schedule.is_due("10.0.0.2", 0)
+
+        schedule.checked(["10.0.0.2", "10.0.0.3"], [], 0)
+        assert schedule.intervals == {"10.0.0.2": 10, "10.0.0.3": 10}
+
+        # Doubled without changes, up to the max interval
+        schedule.checked(["10.0.0.2", "10.0.0.3"], [], 10)
+        schedule.checked(["10.0.0.2", "10.0.0.3"], ["10.0.0.3"], 30)
+        schedule.checked(["10.0.0.2"], [], 70)
+
+        assert schedule.intervals == {"10.0.0.2": 35, "10.0.0.3": 10}
+        assert not schedule.is_due("10.0.0.2", 100)
+        assert schedule.is_due("10.0.0.2", 105)
+
+        schedule.hurry(["10.0.0.2"], 80)
+        assert schedule.is_due("10.0.0.2", 80)
+        assert schedule.intervals["10.0.0.2"] == 10
+
+    def test_sweep_only_due_computers(self):
+        session = fake_session()
+        poller = status.subscribe(session, self.job_queue, 10)
+
+        now = time.monotonic()
+        poller.schedule.next_check["10.0.0.3"] = now + 1000
+
+        poller.sweep(now=now + 10)
+
+        computers = self.plugin.run.call_args[1]["computers"]
+        assert [c.ip for c in computers] == ["10.0.0.2"]
+
+        # The output is parsed, so it must be complete
+        assert self.plugin.run.call_args[1]["truncate"] is False
+
+        # Nothing due, nothing sent
+        poller.sweep(now=now + 11)
+        assert self.plugin.run.call_count == 2
+
+    def test_hurry(self):
+        session = fake_session()
+        poller = status.subscribe(session, self.job_queue, 10)
+
+        now = time.monotonic()
+        for ip in poller.schedule.next_check:
+            poller.schedule.next_check[ip] = now + 1000
+
+        status.hurry(session)
+
+        now = time.monotonic()
+        assert all(poller.schedule.is_due(ip, now) for ip in ["10.0.0.2", "10.0.0.3"])
+
+    @patch("time.sleep")
+    def test_agent(self, sleep_mock):
+        session1 = fake_session()
+        session2 = fake_session()
+
+        def stream_on_bridge(command, data):
+            assert json.loads(data) == {"ips": ["10.0.0.2", "10.0.0.3"], "interval": 5}
+
+            yield '{"10.0.0.2":"alive","10.0.0.3":"unreachable"}'
+            yield "{}"
+
+            # The session running the agent disconnects
+            session1.connected = False
+            yield '{"10.0.0.3":"alive"}'
+
+        session1.stream_on_bridge.side_effect = stream_on_bridge
+
+        # The agent is started again on the other session, until it disconnects
+        def stream_on_bridge2(command, data):
+            session2.connected = False
+            yield "{}"
+
+        session2.stream_on_bridge.side_effect = stream_on_bridge2
+
+        poller = status.StatusPoller(session1.bridge_ip, session1.route)
+        poller.sessions = [session1, session2]
+        status._pollers[(session1.bridge_ip, tuple(session1.route))] = poller
+
+        poller.run_agent(5)
+
+        # Only the records with changes are published
+        assert [c[0][0] for c in session2.computers.apply_status.call_args_list] == [
+            {"10.0.0.2": "alive", "10.0.0.3": "unreachable"},
+            {"10.0.0.3": "alive"},
+        ]
+        assert poller.last_statuses == {"10.0.0.2": "alive", "10.0.0.3": "alive"}
+        session2.stream_on_bridge.assert_called_once()
+        self.plugin.run.assert_not_called()
+        assert status._pollers == {}
+
+    def test_subscribe_agent(self):
+        self.config.status_agent = True
+
+        with patch.object(status.StatusPoller, "run_agent") as run_agent:
+            status.subscribe(fake_session(), self.job_queue, 30)
+
+        run_agent.assert_called_once_with(30)
+        self.job_queue.run_repeating.assert_not_called()
+
+    def test_subscribe_agent_without_python3(self):
+        """The computers are polled if the bridge can't run the agent"""
+
+        self.config.status_agent = True
+        session = fake_session()
+        session.has_python3.return_value = False
+
+        with patch.object(status.StatusPoller, "run_agent") as run_agent:
+            status.subscribe(session, self.job_queue, 30)
+
+        run_agent.assert_not_called()
+        self.job_queue.run_repeating.assert_called_once()
+
+    @patch("time.sleep")
+    def test_agent_backoff(self, sleep_mock):
+        session = fake_session()
+
+        # The agent can't run on the bridge: the stream ends without records
+        session.stream_on_bridge.side_effect = lambda command, data: iter([])
+
+        def sleep(delay):
+            if sleep_mock.call_count == 4:
+                session.connected = False
+
+        sleep_mock.side_effect = sleep
+
+        poller = status.StatusPoller(
+            session.bridge_ip, session.route, min_interval=5, max_interval=30
+        )
+        poller.sessions = [session]
+
+        poller.run_agent(5)
+
+        assert [c[0][0] for c in sleep_mock.call_args_list] == [5, 10, 20, 30]
+        assert session.stream_on_bridge.call_count == 4
+
+    def test_agent_without_sessions(self):
+        poller = status.StatusPoller("10.0.0.1", ["A"])
+
+        # The last session unsubscribed before the thread started
+        poller.run_agent(5)
+
+        self.plugin.run.assert_not_called()
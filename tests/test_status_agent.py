@@ -0,0 +1,29 @@
+import unittest
+from importlib.machinery import SourceFileLoader
+from importlib.util import module_from_spec, spec_from_loader
+from unittest.mock import MagicMock, patch
+
+# The agent has no .py extension, as it's copied as is to the bridge computer
+loader = SourceFileLoader("_status_agent", "plugins/_status_agent")
+agent = module_from_spec(spec_from_loader(loader.name, loader))
+loader.exec_module(agent)
+
+
+class TestStatusAgent(unittest.TestCase):
+    @patch("subprocess.run")
+    def test_check_skips_other_lines(self, run_mock):
+        """Unexpected lines of fping must not stop the agent"""
+
+        run_mock.return_value = MagicMock(
+            stdout=(
+                b"10.0.0.1 is alive\n"
+                b"10.0.0.2 is unreachable\n"
+                b"ICMP Host Unreachable from 10.0.0.254 for ICMP Echo sent to x\n"
+                b"10.0.0.1 is alive (duplicate)\n"
+            )
+        )
+
+        assert agent.check(["10.0.0.1", "10.0.0.2", "10.0.0.3"]) == {
+            "10.0.0.1": "alive",
+            "10.0.0.2": "unreachable",
+        }